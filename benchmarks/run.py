@@ -0,0 +1,323 @@
+"""
+Benchmarks the MCP tools against a local stub Service Atlas API.
+
+    uv run benchmarks/run.py --services 500 --latency 20 --iterations 50 --output results.json
+    uv run benchmarks/run.py --compare results.json
+
+Each tool is called through an in-process FastMCP client, so a call goes through the same dispatch, caching
+and api client code as in production, only the Service Atlas API is replaced by the stub.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import time
+import tomllib
+from datetime import date, datetime, timedelta, timezone
+from importlib import import_module
+
+BENCHMARKS_PATH = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(BENCHMARKS_PATH)
+SRC_PATH = os.path.join(PROJECT_ROOT, "src")
+for path in (BENCHMARKS_PATH, SRC_PATH):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from stub_api import GRAPH_SHAPES, Catalog, StubApi  # noqa: E402
+
+BATCH_SIZE = 10
+# Scenario names are the tool name, optionally followed by a variant, e.g. get_all_services:tabular
+VARIANT_SEPARATOR = ":"
+TABULAR = "tabular"
+
+
+def scenarios(catalog: Catalog) -> dict:
+    """
+    Builds the benchmarked tool calls
+    :param catalog: the stub data, used to pick valid ids
+    :return: map of scenario name to a function taking the iteration number and returning the tool arguments
+    """
+    services = [service["id"] for service in catalog.services]
+    teams = [team["id"] for team in catalog.teams]
+    team_names = [team["name"] for team in catalog.teams]
+    pages = max((len(services) + 24) // 25, 1)
+    # Services with the most dependents make the heaviest blast radius walks
+    hubs = sorted(services, key=lambda service_id: len(catalog.dependents[service_id]), reverse=True)[:10]
+    today = date.today()
+
+    def service(i: int) -> str:
+        return services[i % len(services)]
+
+    def batch(i: int) -> list:
+        return [service(i * BATCH_SIZE + offset) for offset in range(BATCH_SIZE)]
+
+    def releases(i: int) -> dict:
+        return {"start": (today - timedelta(days=30)).isoformat(), "end": (today + timedelta(days=1)).isoformat()}
+
+    base = {
+        "get_services": lambda i: {"page": 1 + i % pages},
+        "get_all_services": lambda i: {},
+        "find_service_by_name": lambda i: {"query": catalog.by_id[service(i)]["name"]},
+        "find_team_by_name": lambda i: {"query": team_names[i % len(team_names)]},
+        "get_service_types": lambda i: {},
+        "get_teams_by_service": lambda i: {"service_id": service(i)},
+        "get_teams_for_services": lambda i: {"service_ids": batch(i)},
+        "get_service_risk": lambda i: {"service_id": service(i)},
+        "get_service_risks": lambda i: {"service_ids": batch(i), "top_n": 5},
+        "get_service_dependencies": lambda i: {"service_id": service(i)},
+        "get_service_dependents": lambda i: {"service_id": service(i)},
+        "get_blast_radius": lambda i: {"service_id": hubs[i % len(hubs)]},
+        "get_all_teams": lambda i: {},
+        "get_services_by_team": lambda i: {"team_id": teams[i % len(teams)]},
+        "get_debt": lambda i: {},
+        "get_debts_for_service": lambda i: {"service_id": service(i)},
+        "get_releases": releases,
+    }
+    # The same calls with the tabular encoding, to measure the response size it saves
+    for tool in ("get_all_services", "get_all_teams", "get_services_by_team", "get_debt", "get_releases"):
+        base[f"{tool}{VARIANT_SEPARATOR}{TABULAR}"] = lambda i, make_args=base[tool]: {**make_args(i), TABULAR: True}
+    return base
+
+
+def tool_name(scenario: str) -> str:
+    return scenario.partition(VARIANT_SEPARATOR)[0]
+
+
+def percentile(sorted_values: list, q: float) -> float:
+    """
+    Nearest rank percentile
+    :param sorted_values: values in ascending order
+    :param q: the percentile, between 0 and 100
+    :return: the value at the percentile, 0 for no values
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(q / 100 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+async def run_tool(client, stub: StubApi, make_args, name: str, iterations: int, concurrency: int) -> dict:
+    """
+    Calls one tool repeatedly with up to `concurrency` calls in flight
+    :return: latency percentiles in milliseconds, throughput, error count, upstream request counts and the mean
+        size of the response text in bytes
+    """
+    latencies = []
+    sizes = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def call(i: int):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            result = await client.call_tool(name, make_args(i), raise_on_error=False)
+            latencies.append((time.perf_counter() - started) * 1000)
+            if result.is_error:
+                errors += 1
+                return
+            sizes.append(sum(len(getattr(content, "text", "").encode("utf-8")) for content in result.content))
+
+    upstream_before = stub.total_requests()
+    started = time.perf_counter()
+    await asyncio.gather(*(call(i) for i in range(iterations)))
+    elapsed = time.perf_counter() - started
+    upstream = stub.total_requests() - upstream_before
+    latencies.sort()
+    return {
+        "calls": iterations,
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "mean_ms": round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+        "max_ms": round(latencies[-1], 3) if latencies else 0.0,
+        "throughput_per_s": round(iterations / elapsed, 2) if elapsed else 0.0,
+        "upstream_requests": upstream,
+        "upstream_requests_per_call": round(upstream / iterations, 3) if iterations else 0.0,
+        "response_bytes": round(sum(sizes) / len(sizes)) if sizes else 0,
+    }
+
+
+def size_reductions(results: dict) -> dict:
+    """
+    Compares the response size of each tabular scenario with the same tool returning objects
+    :param results: results per scenario
+    :return: map of tool name to the object and tabular response sizes and the reduction in percent
+    """
+    reductions = {}
+    suffix = f"{VARIANT_SEPARATOR}{TABULAR}"
+    for scenario, result in results.items():
+        tool = scenario.removesuffix(suffix)
+        if tool == scenario or tool not in results:
+            continue
+        objects, tabular = results[tool]["response_bytes"], result["response_bytes"]
+        reductions[tool] = {
+            "objects_bytes": objects,
+            "tabular_bytes": tabular,
+            "reduction_percent": round((objects - tabular) / objects * 100, 1) if objects else 0.0,
+        }
+    return reductions
+
+
+def parse_latencies(values: list, scale: float = 1.0) -> dict:
+    """
+    Parses repeated TEMPLATE=VALUE options, e.g. /services/{id}/dependents=50
+    """
+    parsed = {}
+    for value in values or []:
+        template, _, number = value.rpartition("=")
+        if not template:
+            raise argparse.ArgumentTypeError(f"Expected TEMPLATE=VALUE, got '{value}'")
+        parsed[template] = float(number) * scale
+    return parsed
+
+
+def parse_args(argv: list = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the Service Atlas MCP tools against a stub API")
+    parser.add_argument("--services", type=int, default=200, help="number of services in the catalog")
+    parser.add_argument("--teams", type=int, default=20, help="number of teams in the catalog")
+    parser.add_argument("--shape", choices=GRAPH_SHAPES, default="random", help="dependency graph shape")
+    parser.add_argument("--fan-out", type=int, default=3, help="dependencies per service (random) or hubs (hub)")
+    parser.add_argument("--latency", type=float, default=5.0, help="ms added to every stub response")
+    parser.add_argument("--latency-for", action="append", metavar="TEMPLATE=MS",
+                        help="ms added to one endpoint template, repeatable")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of stub responses that are 503s")
+    parser.add_argument("--error-rate-for", action="append", metavar="TEMPLATE=RATE",
+                        help="error rate for one endpoint template, repeatable")
+    parser.add_argument("--iterations", type=int, default=20, help="calls per tool")
+    parser.add_argument("--concurrency", type=int, default=4, help="concurrent calls per tool")
+    parser.add_argument("--tools", nargs="*", help="tools to benchmark, defaults to every read-only tool")
+    parser.add_argument("--no-cache", action="store_true", help="disable the response cache")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write the results to this json file")
+    parser.add_argument("--compare", help="compare against a previous results json file")
+    parser.add_argument("--threshold", type=float, default=20.0,
+                        help="percent increase in p50/p95 that counts as a regression when comparing")
+    return parser.parse_args(argv)
+
+
+def project_version() -> str:
+    with open(os.path.join(PROJECT_ROOT, "pyproject.toml"), "rb") as file:
+        return tomllib.load(file)["project"]["version"]
+
+
+async def run(args: argparse.Namespace) -> dict:
+    """
+    Starts the stub api, points the server at it and benchmarks each tool in turn
+    :return: the results report
+    """
+    catalog = Catalog(services=args.services, teams=args.teams, shape=args.shape, fan_out=args.fan_out,
+                      seed=args.seed)
+    stub = StubApi(
+        catalog,
+        latency=args.latency / 1000,
+        latencies=parse_latencies(args.latency_for, scale=1 / 1000),
+        error_rate=args.error_rate,
+        error_rates=parse_latencies(args.error_rate_for),
+        seed=args.seed,
+    )
+    all_scenarios = scenarios(catalog)
+    tools = args.tools or list(all_scenarios)
+    if TABULAR in tools:
+        # Shorthand for benchmarking the tabular encoding against objects
+        tools = [scenario for scenario in all_scenarios if scenario.endswith(f"{VARIANT_SEPARATOR}{TABULAR}")
+                 or f"{scenario}{VARIANT_SEPARATOR}{TABULAR}" in all_scenarios]
+    unknown = [tool for tool in tools if tool not in all_scenarios]
+    if unknown:
+        raise ValueError(f"No benchmark scenario for: {', '.join(unknown)}")
+
+    with stub:
+        # The api caller reads its configuration when the server modules are first imported
+        os.environ["API_URL"] = stub.url
+        os.environ.pop("API_CACHE_PATH", None)
+        if args.no_cache:
+            os.environ["API_CACHE_ENABLED"] = "false"
+        from fastmcp import Client
+
+        mcp_server = import_module("mcp_server")
+        mcp_server.setup()
+        results = {}
+        async with Client(mcp_server.mcp) as client:
+            for tool in tools:
+                results[tool] = await run_tool(
+                    client, stub, all_scenarios[tool], tool_name(tool), args.iterations, max(args.concurrency, 1)
+                )
+        upstream = stub.request_counts()
+
+    return {
+        "version": project_version(),
+        "created": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "config": {
+            key: value for key, value in vars(args).items() if key not in ("output", "compare", "threshold")
+        },
+        "tools": results,
+        "size_reductions": size_reductions(results),
+        "upstream_requests_by_endpoint": upstream,
+    }
+
+
+def compare(report: dict, baseline: dict, threshold: float) -> list:
+    """
+    Compares p50/p95 latency per tool against a baseline report
+    :param report: the current results
+    :param baseline: previous results
+    :param threshold: percent increase that counts as a regression
+    :return: list of rows, each with the tool, metric, baseline, current, change in percent and regression flag
+    """
+    rows = []
+    for tool, result in report["tools"].items():
+        previous = baseline.get("tools", {}).get(tool)
+        if previous is None:
+            continue
+        for metric in ("p50_ms", "p95_ms", "upstream_requests_per_call"):
+            before, after = previous.get(metric, 0), result[metric]
+            change = (after - before) / before * 100 if before else 0.0
+            rows.append({
+                "tool": tool, "metric": metric, "baseline": before, "current": after,
+                "change_percent": round(change, 1), "regression": change > threshold,
+            })
+    return rows
+
+
+def print_report(report: dict):
+    header = (f"{'tool':<34}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'calls/s':>10}{'upstream':>10}"
+              f"{'bytes':>10}{'errors':>8}")
+    print(header)
+    print("-" * len(header))
+    for tool, result in report["tools"].items():
+        print(f"{tool:<34}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}{result['p99_ms']:>10.2f}"
+              f"{result['throughput_per_s']:>10.1f}{result['upstream_requests']:>10}{result['response_bytes']:>10}"
+              f"{result['errors']:>8}")
+    if report.get("size_reductions"):
+        print(f"\n{'tabular encoding':<34}{'objects':>10}{'tabular':>10}{'saved':>10}")
+        for tool, sizes in report["size_reductions"].items():
+            print(f"{tool:<34}{sizes['objects_bytes']:>10}{sizes['tabular_bytes']:>10}"
+                  f"{sizes['reduction_percent']:>9.1f}%")
+
+
+def main(argv: list = None) -> int:
+    args = parse_args(argv)
+    report = asyncio.run(run(args))
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+    if not args.compare:
+        return 0
+    with open(args.compare, encoding="utf-8") as file:
+        baseline = json.load(file)
+    rows = compare(report, baseline, args.threshold)
+    print(f"\nCompared with {args.compare} (version {baseline.get('version')}):")
+    for row in rows:
+        flag = "  REGRESSION" if row["regression"] else ""
+        print(f"{row['tool']:<34}{row['metric']:<28}{row['baseline']:>10}{row['current']:>10}"
+              f"{row['change_percent']:>+9.1f}%{flag}")
+    return 1 if any(row["regression"] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
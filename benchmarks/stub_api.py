@@ -0,0 +1,273 @@
+import json
+import os
+import random
+import sys
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# The stub routes requests with the same endpoint templates the server uses for its cache and metrics
+SRC_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if SRC_PATH not in sys.path:
+    sys.path.insert(0, SRC_PATH)
+
+from endpoints import endpoint_template  # noqa: E402
+
+GRAPH_SHAPES = ("random", "hub", "chain")
+DEBT_TYPES = ("code", "documentation", "testing", "architecture")
+RISK_LEVELS = ("low", "medium", "high")
+
+
+def _id(kind: int, index: int) -> str:
+    return f"{index:08x}-0000-4000-8{kind:03x}-{index:012x}"
+
+
+class Catalog:
+    """
+    Deterministic fake Service Atlas data: services, teams, the dependency graph, debts and releases
+    """
+
+    def __init__(self, services: int = 200, teams: int = 20, shape: str = "random", fan_out: int = 3,
+                 seed: int = 42):
+        """
+        :param services: number of services
+        :param teams: number of teams, each service is owned by one or two teams
+        :param shape: dependency graph shape. random: each service depends on up to fan_out earlier services,
+            hub: every service depends on a few hub services, chain: each service depends on the previous one
+        :param fan_out: max dependencies per service for the random shape, number of hubs for the hub shape
+        :param seed: random seed, the same arguments always produce the same catalog
+        """
+        if shape not in GRAPH_SHAPES:
+            raise ValueError(f"Unsupported graph shape '{shape}', expected one of {', '.join(GRAPH_SHAPES)}")
+        rng = random.Random(seed)
+        self.teams = [{"id": _id(1, index), "name": f"team-{index}"} for index in range(max(teams, 1))]
+        self.services = [
+            {
+                "id": _id(2, index),
+                "name": f"service-{index}",
+                "description": f"Benchmark service {index}",
+                "type": rng.choice(("service", "database", "queue")),
+                "tier": rng.randint(1, 4),
+                "url": f"https://example.com/service-{index}",
+            }
+            for index in range(max(services, 1))
+        ]
+        self.by_id = {service["id"]: service for service in self.services}
+        self.owners = {
+            service["id"]: rng.sample(self.teams, k=min(len(self.teams), rng.randint(1, 2)))
+            for service in self.services
+        }
+        self.dependencies = {service["id"]: [] for service in self.services}
+        for index, service in enumerate(self.services):
+            if shape == "chain":
+                targets = [index - 1] if index else []
+            elif shape == "hub":
+                targets = [] if index < fan_out else rng.sample(range(fan_out), k=min(fan_out, 2))
+            else:
+                targets = rng.sample(range(index), k=min(index, rng.randint(0, fan_out)))
+            for target in targets:
+                dependency = dict(self.services[target])
+                dependency["version"] = f"{rng.randint(1, 5)}.0"
+                self.dependencies[service["id"]].append(dependency)
+        self.dependents = {service["id"]: [] for service in self.services}
+        for service_id, dependencies in self.dependencies.items():
+            for dependency in dependencies:
+                self.dependents[dependency["id"]].append(dict(self.by_id[service_id]))
+        self.debts = {
+            service["id"]: [
+                {"id": _id(3, index * 10 + count), "title": f"debt {count}", "type": rng.choice(DEBT_TYPES)}
+                for count in range(rng.randint(0, 3))
+            ]
+            for index, service in enumerate(self.services)
+        }
+        today = date.today()
+        self.releases = sorted(
+            (
+                {
+                    "serviceId": service["id"],
+                    "serviceName": service["name"],
+                    "version": f"{rng.randint(1, 9)}.{rng.randint(0, 20)}.0",
+                    "releaseDate": (today - timedelta(days=rng.randint(0, 90))).isoformat(),
+                }
+                for service in self.services
+                for _ in range(rng.randint(0, 3))
+            ),
+            key=lambda release: release["releaseDate"],
+        )
+
+    def risk(self, service_id: str) -> dict:
+        dependents = len(self.dependents[service_id])
+        score = min(100, dependents * 10 + self.by_id[service_id]["tier"] * 5)
+        level = RISK_LEVELS[0] if score < 40 else RISK_LEVELS[1] if score < 70 else RISK_LEVELS[2]
+        counts = {}
+        for debt in self.debts[service_id]:
+            counts[debt["type"]] = counts.get(debt["type"], 0) + 1
+        return {
+            "changeRisk": {"level": level, "score": score},
+            "healthRisk": {"dependentCount": dependents, "debtCount": counts},
+        }
+
+
+def _page(items: list, query: dict) -> list:
+    page = int(query.get("page", 1))
+    size = int(query.get("pageSize", 25))
+    return items[(page - 1) * size:page * size]
+
+
+class StubApi:
+    """
+    Stub Service Atlas API serving a Catalog over HTTP on a background thread, with optional per endpoint
+    latency and error injection
+    """
+
+    def __init__(self, catalog: Catalog, latency: float = 0.0, latencies: dict = None, error_rate: float = 0.0,
+                 error_rates: dict = None, seed: int = 42):
+        """
+        :param catalog: the data to serve
+        :param latency: seconds added to every response
+        :param latencies: seconds added per endpoint template, overriding latency
+        :param error_rate: share of requests answered with a 503
+        :param error_rates: share of requests answered with a 503 per endpoint template, overriding error_rate
+        """
+        self.catalog = catalog
+        self.latency = latency
+        self.latencies = latencies or {}
+        self.error_rate = error_rate
+        self.error_rates = error_rates or {}
+        self.__rng = random.Random(seed)
+        self.__lock = threading.Lock()
+        self.__counts = {}
+        self.__server = None
+        self.__thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.__server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> "StubApi":
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are written separately, without this delayed ACKs add ~40ms per response
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                stub._handle(self, "GET")
+
+            def do_POST(self):
+                stub._handle(self, "POST")
+
+            def do_PUT(self):
+                stub._handle(self, "PUT")
+
+            def log_message(self, *args):
+                pass
+
+        self.__server = ThreadingHTTPServer((host, port), Handler)
+        self.__server.daemon_threads = True
+        self.__thread = threading.Thread(target=self.__server.serve_forever, daemon=True)
+        self.__thread.start()
+        return self
+
+    def stop(self):
+        if self.__server is not None:
+            self.__server.shutdown()
+            self.__server.server_close()
+            self.__server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def request_counts(self) -> dict:
+        """
+        :return: number of requests served per "METHOD template"
+        """
+        with self.__lock:
+            return dict(self.__counts)
+
+    def total_requests(self) -> int:
+        with self.__lock:
+            return sum(self.__counts.values())
+
+    def _handle(self, handler: BaseHTTPRequestHandler, method: str):
+        parsed = urlparse(handler.path)
+        template = endpoint_template(parsed.path)
+        with self.__lock:
+            name = f"{method} {template}"
+            self.__counts[name] = self.__counts.get(name, 0) + 1
+            fail = self.__rng.random() < self.error_rates.get(template, self.error_rate)
+        length = int(handler.headers.get("Content-Length") or 0)
+        body = handler.rfile.read(length) if length else b""
+        delay = self.latencies.get(template, self.latency)
+        if delay:
+            time.sleep(delay)
+        if fail:
+            return self.__send(handler, 503, {"error": "injected failure"})
+        query = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+        segments = [segment for segment in parsed.path.split("/") if segment]
+        try:
+            status, payload = self.__route(method, template, segments, query, body)
+        except KeyError:
+            status, payload = 404, {"error": "not found"}
+        self.__send(handler, status, payload)
+
+    def __route(self, method: str, template: str, segments: list, query: dict, body: bytes) -> tuple:
+        catalog = self.catalog
+        if method != "GET":
+            # Writes are accepted and echoed without changing the catalog, so runs stay repeatable
+            return (201 if method == "POST" else 200), json.loads(body or b"{}")
+        if template == "/services":
+            return 200, _page(catalog.services, query)
+        if template == "/services/search":
+            needle = query.get("query", "").lower()
+            return 200, [service for service in catalog.services if needle in service["name"].lower()][:25]
+        if template == "/services/types":
+            return 200, ["service", "database", "queue"]
+        if template == "/services/{id}":
+            return 200, catalog.by_id[segments[1]]
+        if template == "/services/{id}/teams":
+            return 200, catalog.owners[segments[1]]
+        if template == "/services/{id}/dependencies":
+            return 200, catalog.dependencies[segments[1]]
+        if template == "/services/{id}/dependents":
+            return 200, catalog.dependents[segments[1]]
+        if template == "/services/{id}/debt":
+            return 200, catalog.debts[segments[1]]
+        if template == "/teams":
+            return 200, _page(catalog.teams, query)
+        if template == "/teams/{id}/services":
+            return 200, [
+                catalog.by_id[service_id] for service_id, owners in catalog.owners.items()
+                if any(team["id"] == segments[1] for team in owners)
+            ]
+        if template == "/reports/services/debt":
+            counts = {}
+            for service_id, debts in catalog.debts.items():
+                if debts:
+                    counts[service_id] = len(debts)
+            return 200, [{"id": service_id, "name": catalog.by_id[service_id]["name"], "count": count}
+                         for service_id, count in counts.items()]
+        if template == "/reports/services/{id}/risk":
+            if segments[2] not in catalog.by_id:
+                raise KeyError(segments[2])
+            return 200, catalog.risk(segments[2])
+        if template == "/releases/{start}/{end}":
+            start, end = segments[1], segments[2]
+            return 200, [release for release in catalog.releases if start <= release["releaseDate"] < end]
+        raise KeyError(template)
+
+    @staticmethod
+    def __send(handler: BaseHTTPRequestHandler, status: int, payload):
+        data = json.dumps(payload).encode("utf-8")
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(data)))
+        handler.end_headers()
+        handler.wfile.write(data)
@@ -1,27 +1,380 @@
+import asyncio
+import contextvars
+import functools
+import inspect
+import json
 import os
+import threading
+import time
 
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
 
+from cache import DEFAULT_TTLS, ResponseCache
+from config import env_bool, env_float, env_int
+from deadlines import AdaptiveTimeouts, DeadlineExceeded, expired, remaining, request_timeout
+from disk_cache import DiskCache
+from metrics import observe_upstream
+from endpoints import endpoint_template
+from resilience import TIMEOUT_ERRORS, TRANSPORT_ERRORS, CircuitBreakers, record_retry, retry_delay
+from tracing import tracer, upstream_span
+from singleflight import AsyncSingleFlight, FlightTimeout, SingleFlight
+from throttling import BACKGROUND, Throttle, current_priority
+
+
+def _cache_from_env() -> ResponseCache:
+    """
+    Builds the GET response cache. API_CACHE_TTLS is a JSON object of endpoint template to ttl in seconds,
+    overriding the defaults, e.g. {"/services/types": 3600}. When API_CACHE_PATH is set responses are also
+    persisted to that sqlite file, bounded by API_CACHE_DISK_MAX_BYTES.
+    """
+    max_bytes = env_int("API_CACHE_MAX_BYTES", 32 * 1024 * 1024)
+    if not env_bool("API_CACHE_ENABLED", True):
+        max_bytes = 0
+    ttls = dict(DEFAULT_TTLS)
+    overrides = os.getenv("API_CACHE_TTLS")
+    if overrides:
+        ttls.update({template: float(ttl) for template, ttl in json.loads(overrides).items()})
+    store = None
+    path = os.getenv("API_CACHE_PATH")
+    if path and max_bytes > 0:
+        store = DiskCache(os.path.expanduser(path), max_bytes=env_int("API_CACHE_DISK_MAX_BYTES", 256 * 1024 * 1024))
+    return ResponseCache(max_bytes=max_bytes, ttls=ttls, store=store)
+
+
+class _BaseApiCaller:
+    """
+    Configuration and bookkeeping shared by the sync and async api callers
+    """
 
-class ApiCaller:
     def __init__(self):
         api_url = os.getenv("API_URL")
         if not api_url:
             api_url = "http://localhost:8080"
-        self.__api_url = api_url
+        self._api_url = api_url
+        # Connection pool settings. Connections are kept alive between calls and the whole pool is
+        # recycled once it is older than the max connection age, so DNS/load balancer changes are picked up.
+        self._pool_size = env_int("API_POOL_SIZE", 10)
+        self._keep_alive = env_bool("API_KEEP_ALIVE", True)
+        self._max_connection_age = env_float("API_CONNECTION_MAX_AGE", 300.0)
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._cache = _cache_from_env()
+        # Concurrent identical GETs share one upstream request when single flight is enabled
+        self._single_flight = env_bool("API_SINGLE_FLIGHT", True)
+        self._flight = None
+        self._breakers = CircuitBreakers()
+        self._timeouts = AdaptiveTimeouts()
+        self._throttle = Throttle()
+
+    def _build_url(self, url: str) -> str:
+        """
+        Joins a url fragment onto the base url
+        :param url: the url fragment, with or without a leading slash
+        :return: the absolute url
+        """
+        if not url.startswith("/"):
+            url = f"/{url}"
+        return f"{self._api_url}{url}"
+
+    def _cache_lookup(self, url: str, params: dict = None, ttl: float = None) -> tuple:
+        """
+        Looks a GET request up in the response cache
+        :param url: the url fragment
+        :param params: the query params
+        :param ttl: the request's ttl, defaults to the endpoint template's ttl
+        :return: (key, hit, value). The key is None when the cache is disabled
+        """
+        if not self._cache.enabled:
+            return None, False, None
+        key = self._cache.key(url, params)
+        # Loaded once per lookup, for the cached value or for the validators of an expired one
+        self._cache.load(key)
+        if not (self._cache.ttl_for(url) if ttl is None else ttl):
+            return key, False, None
+        hit, value = self._cache.get(key, load=False)
+        return key, hit, value
+
+    def _flight_key(self, url: str, params: dict = None) -> tuple:
+        """
+        Builds the single flight key of a GET request. Background refreshes share requests among themselves
+        only, so a tool call never waits on a request queued behind the background limits.
+        :param url: the url fragment
+        :param params: the query params
+        :return: hashable key of the request and, for background callers, their priority class
+        """
+        key = self._cache.key(url, params)
+        return key + (BACKGROUND,) if current_priority() == BACKGROUND else key
+
+    def _revalidation(self, key: tuple) -> tuple:
+        """
+        Finds a stored response that can be revalidated instead of downloaded again
+        :param key: the cache key, or None when the cache is disabled
+        :return: (entry, conditional request headers), both None when there is nothing to revalidate
+        """
+        entry = self._cache.revalidation_entry(key, load=False) if key is not None else None
+        if entry is None:
+            return None, None
+        return entry, entry.conditional_headers()
+
+    def _store(self, key: tuple, response, value, ttl: float = None):
+        """
+        Stores a parsed GET response along with its validators
+        :param key: the cache key, or None when the cache is disabled
+        :param response: the http response
+        :param value: the parsed response body
+        :param ttl: the request's ttl, defaults to the endpoint template's ttl
+        """
+        if key is None:
+            return
+        self._cache.put(
+            key, value, len(response.content), ttl=ttl,
+            etag=response.headers.get("ETag"), last_modified=response.headers.get("Last-Modified"),
+        )
+
+    def _timeout(self, url: str) -> float:
+        """
+        :param url: the url fragment
+        :return: the endpoint's adaptive timeout, shortened to the time left before the tool call's deadline
+        :raises DeadlineExceeded: when the deadline has passed
+        """
+        return request_timeout(url, self._timeouts.timeout_for(url))
+
+    def _after_attempt(self, method: str, url: str, attempt: int, elapsed: float, response=None,
+                       error: Exception = None):
+        """
+        Records the outcome of one request attempt on the endpoint's latency and circuit, and decides whether to
+        retry. Only GETs are retried, since they are idempotent, and only when the retry fits in the deadline.
+        :param method: the http method
+        :param url: the url fragment
+        :param attempt: number of attempts already made, minus one
+        :param elapsed: seconds the attempt took
+        :param response: the response, None if the attempt raised
+        :param error: the transport error raised by the attempt
+        :return: seconds to wait before retrying, or None to return the response or raise the error
+        :raises DeadlineExceeded: when the attempt failed because the deadline was reached
+        """
+        if error is not None and expired():
+            raise DeadlineExceeded(endpoint_template(url)) from error
+        if error is None or isinstance(error, TIMEOUT_ERRORS):
+            self._timeouts.observe(url, elapsed)
+        self._breakers.record(url, failed=error is not None or response.status_code >= 500)
+        if method != "GET":
+            return None
+        delay = retry_delay(attempt, response, error)
+        left = remaining()
+        if delay is not None and left is not None and delay >= left:
+            delay = None
+        if delay is not None:
+            record_retry(method, url, response, error)
+        return delay
+
+    def throttle_stats(self) -> dict:
+        """
+        Returns rate limiter and concurrency limit statistics
+        :return: dictionary of the configured limits, requests in flight and queueing time
+        """
+        return self._throttle.stats()
+
+    def timeout_stats(self) -> dict:
+        """
+        Returns the adaptive timeouts
+        :return: dictionary of endpoint template to sample count, p99 latency and timeout
+        """
+        return self._timeouts.stats()
+
+    def resilience_stats(self) -> dict:
+        """
+        Returns circuit breaker statistics
+        :return: dictionary of circuit breaker counters and per endpoint circuit states
+        """
+        return self._breakers.stats()
+
+    def cache_stats(self) -> dict:
+        """
+        Returns response cache statistics
+        :return: dictionary of hit/miss/eviction counters
+        """
+        return self._cache.stats()
+
+    def coalescing_stats(self) -> dict:
+        """
+        Returns single flight statistics
+        :return: dictionary with upstream GETs made and upstream GETs saved by coalescing
+        """
+        stats = self._flight.stats()
+        stats["enabled"] = self._single_flight
+        return stats
+
+    def _pool_settings(self) -> dict:
+        return {
+            "pool_size": self._pool_size,
+            "keep_alive": self._keep_alive,
+            "max_connection_age": self._max_connection_age,
+            "requests": self._requests,
+        }
+
+
+class ApiCaller(_BaseApiCaller):
+    def __init__(self):
+        super().__init__()
+        self.__session = None
+        self.__session_started = 0.0
+        self.__stats = {"sessions_created": 0, "retired_connections": 0, "retired_requests": 0}
+        self._flight = SingleFlight()
+
+    def __get_session(self):
+        """
+        Returns the pooled session, creating or recycling it as required
+        :return: a requests session
+        """
+        with self._lock:
+            now = time.monotonic()
+            expired = self.__session is not None and now - self.__session_started > self._max_connection_age
+            if expired:
+                self.__retire_session()
+            if self.__session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=self._pool_size, pool_maxsize=self._pool_size)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                if not self._keep_alive:
+                    session.headers["Connection"] = "close"
+                self.__session = session
+                self.__session_started = now
+                self.__stats["sessions_created"] += 1
+            self._requests += 1
+            return self.__session
+
+    def __retire_session(self):
+        """
+        Closes the current session, keeping its connection counts for the pool stats.
+        Must be called while holding the lock.
+        """
+        connections, served = self.__connection_counts(self.__session)
+        self.__stats["retired_connections"] += connections
+        self.__stats["retired_requests"] += served
+        self.__session.close()
+        self.__session = None
+
+    @staticmethod
+    def __connection_counts(session) -> tuple:
+        """
+        Reads how many connections were opened and how many requests they served from the urllib3 pools
+        :param session: the session to inspect
+        :return: (connections opened, requests served)
+        """
+        connections = 0
+        served = 0
+        adapters = getattr(session, "adapters", None) or {}
+        seen = set()
+        for adapter in adapters.values():
+            if id(adapter) in seen:
+                continue
+            seen.add(id(adapter))
+            pools = getattr(getattr(adapter, "poolmanager", None), "pools", None)
+            if pools is None:
+                continue
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                connections += getattr(pool, "num_connections", 0)
+                served += getattr(pool, "num_requests", 0)
+        return connections, served
+
+    def pool_stats(self) -> dict:
+        """
+        Returns connection pool statistics
+        :return: dictionary of pool settings and connection reuse counters
+        """
+        with self._lock:
+            connections, served = self.__connection_counts(self.__session)
+            connections += self.__stats["retired_connections"]
+            served += self.__stats["retired_requests"]
+            reused = max(served - connections, 0)
+            stats = self._pool_settings()
+            stats.update({
+                "sessions_created": self.__stats["sessions_created"],
+                "connections_opened": connections,
+                "connections_reused": reused,
+                "reuse_rate": round(reused / served, 4) if served else 0.0,
+            })
+            return stats
+
+    def close(self):
+        """
+        Closes all pooled connections
+        """
+        with self._lock:
+            if self.__session is not None:
+                self.__retire_session()
 
-    def call_get(self, url: str, params: dict = None):
+    def __send(self, method: str, url: str, **kwargs):
+        """
+        Sends a request through the endpoint's circuit breaker and the throttle, retrying GETs that fail transiently
+        """
+        attempt = 0
+        while True:
+            self._breakers.before_request(url)
+            priority = self._throttle.acquire(url)
+            try:
+                timeout = self._timeout(url)
+                started = time.perf_counter()
+                response = self.__request(method, url, timeout, **kwargs)
+            except TRANSPORT_ERRORS as error:
+                delay = self._after_attempt(method, url, attempt, time.perf_counter() - started, error=error)
+                if delay is None:
+                    raise
+            else:
+                delay = self._after_attempt(method, url, attempt, time.perf_counter() - started, response=response)
+                if delay is None:
+                    return response
+            finally:
+                self._throttle.release(priority)
+            time.sleep(delay)
+            attempt += 1
+
+    def __request(self, method: str, url: str, timeout: float, **kwargs):
+        with observe_upstream(method, url) as observation, upstream_span(method, url) as span:
+            send = getattr(self.__get_session(), method.lower())
+            response = send(self._build_url(url), timeout=timeout, **kwargs)
+            observation.record(response)
+            span.set(status=response.status_code, bytes=observation.size)
+            return response
+
+    def call_get(self, url: str, params: dict = None, ttl: float = None):
         """
         Calls the api with a get request
         :param url: the url fragment to append to the base url
         :param params: any query params to append to the url
+        :param ttl: seconds to serve the response from cache, defaults to the endpoint template's ttl. Used for
+            responses known not to change, e.g. releases of past days
         :return: json response
         """
-        if not url.startswith("/"):
-            url = f"/{url}"
-        response = requests.get(f"{self.__api_url}{url}", params=params, timeout=10)
+        key, hit, value = self._cache_lookup(url, params, ttl)
+        if hit:
+            return value
+        if not self._single_flight:
+            return self.__fetch(url, params, key, ttl)
+        try:
+            return self._flight.do(
+                self._flight_key(url, params), lambda: self.__fetch(url, params, key, ttl), timeout=remaining()
+            )
+        except FlightTimeout:
+            raise DeadlineExceeded(endpoint_template(url)) from None
+
+    def __fetch(self, url: str, params: dict, key: tuple, ttl: float = None):
+        entry, headers = self._revalidation(key)
+        response = self.__send("GET", url, params=params, headers=headers)
+        if entry is not None and response.status_code == 304:
+            return self._cache.not_modified(key, entry, ttl)
         response.raise_for_status()
-        return response.json()
+        with tracer.span("decode"):
+            value = response.json()
+        self._store(key, response, value, ttl)
+        return value
 
     def call_post(self, url: str, body: dict = None):
         """
@@ -30,10 +383,9 @@ class ApiCaller:
         :param body: the body of the post request
         :return: JSON response
         """
-        if not url.startswith("/"):
-            url = f"/{url}"
-        response = requests.post(f"{self.__api_url}{url}", json=body, timeout=10)
+        response = self.__send("POST", url, json=body)
         response.raise_for_status()
+        self._cache.invalidate_for_write(url)
         if not response.content:
             return None
         return response.json()
@@ -45,13 +397,320 @@ class ApiCaller:
         :param body: the body of the put request
         :return: JSON response
         """
-        if not url.startswith("/"):
-            url = f"/{url}"
-        response = requests.put(f"{self.__api_url}{url}", json=body, timeout=10)
+        response = self.__send("PUT", url, json=body)
         response.raise_for_status()
+        self._cache.invalidate_for_write(url)
         if not response.content:
             return None
         return response.json()
 
 
-api_caller = ApiCaller()
+class AsyncApiCaller(_BaseApiCaller):
+    """
+    Asyncio api caller backed by a pooled httpx.AsyncClient, so many upstream requests can share one event loop
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.__client = None
+        self.__client_loop = None
+        self.__client_started = 0.0
+        self.__clients_created = 0
+        # Clients replaced by a newer one, mapped to their in-flight request count. They are closed once drained.
+        self.__retired = {}
+        self.__in_flight = {}
+        self._flight = AsyncSingleFlight()
+
+    async def __acquire_client(self):
+        """
+        Returns the pooled client for the running loop, creating or recycling it as required
+        :return: an httpx async client
+        """
+        loop = asyncio.get_running_loop()
+        idle = None
+        with self._lock:
+            now = time.monotonic()
+            expired = self.__client is not None and now - self.__client_started > self._max_connection_age
+            if self.__client is not None and (expired or self.__client_loop is not loop):
+                if self.__client_loop is loop:
+                    in_flight = self.__in_flight.pop(self.__client, 0)
+                    if in_flight:
+                        self.__retired[self.__client] = in_flight
+                    else:
+                        idle = self.__client
+                else:
+                    # A client cannot outlive the loop it was created on, so it is simply dropped
+                    self.__in_flight.pop(self.__client, None)
+                self.__client = None
+            if self.__client is None:
+                limits = httpx.Limits(
+                    max_connections=self._pool_size,
+                    max_keepalive_connections=self._pool_size if self._keep_alive else 0,
+                    keepalive_expiry=self._max_connection_age,
+                )
+                headers = {} if self._keep_alive else {"Connection": "close"}
+                self.__client = httpx.AsyncClient(limits=limits, headers=headers, timeout=10)
+                self.__client_loop = loop
+                self.__client_started = now
+                self.__clients_created += 1
+            client = self.__client
+            self.__in_flight[client] = self.__in_flight.get(client, 0) + 1
+            self._requests += 1
+        if idle is not None:
+            await idle.aclose()
+        return client
+
+    async def __release_client(self, client):
+        """
+        Marks a request as finished on a client, closing the client if it was retired and is now idle
+        :param client: the client the request was made with
+        """
+        with self._lock:
+            if client in self.__retired:
+                self.__retired[client] -= 1
+                if self.__retired[client] > 0:
+                    return
+                del self.__retired[client]
+            else:
+                self.__in_flight[client] = self.__in_flight.get(client, 1) - 1
+                return
+        await client.aclose()
+
+    async def __send(self, method: str, url: str, **kwargs):
+        """
+        Sends a request through the endpoint's circuit breaker and the throttle, retrying GETs that fail transiently
+        """
+        attempt = 0
+        while True:
+            self._breakers.before_request(url)
+            priority = await self._throttle.acquire_async(url)
+            try:
+                timeout = self._timeout(url)
+                started = time.perf_counter()
+                response = await self.__request(method, url, timeout, **kwargs)
+            except TRANSPORT_ERRORS as error:
+                delay = self._after_attempt(method, url, attempt, time.perf_counter() - started, error=error)
+                if delay is None:
+                    raise
+            else:
+                delay = self._after_attempt(method, url, attempt, time.perf_counter() - started, response=response)
+                if delay is None:
+                    return response
+            finally:
+                self._throttle.release(priority)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def __request(self, method: str, url: str, timeout: float, **kwargs):
+        with observe_upstream(method, url) as observation, upstream_span(method, url) as span:
+            client = await self.__acquire_client()
+            try:
+                response = await client.request(method, self._build_url(url), timeout=timeout, **kwargs)
+            finally:
+                await self.__release_client(client)
+            observation.record(response)
+            span.set(status=response.status_code, bytes=observation.size)
+            return response
+
+    async def __cache_io(self, func, *args):
+        """
+        Runs a cache operation that writes through to the persistent store on a worker thread, so sqlite I/O,
+        lock waits and the serialization of large responses never block the event loop
+        """
+        if not self._cache.persistent:
+            return func(*args)
+        return await asyncio.to_thread(func, *args)
+
+    def pool_stats(self) -> dict:
+        """
+        Returns connection pool statistics
+        :return: dictionary of pool settings and client counters
+        """
+        with self._lock:
+            stats = self._pool_settings()
+            stats.update({
+                "clients_created": self.__clients_created,
+                "in_flight": sum(self.__in_flight.values()) + sum(self.__retired.values()),
+            })
+            return stats
+
+    async def aclose(self):
+        """
+        Closes all pooled connections
+        """
+        with self._lock:
+            clients = list(self.__retired)
+            if self.__client is not None:
+                clients.append(self.__client)
+            self.__client = None
+            self.__retired.clear()
+            self.__in_flight.clear()
+        for client in clients:
+            await client.aclose()
+
+    async def call_get(self, url: str, params: dict = None, ttl: float = None):
+        """
+        Calls the api with a get request
+        :param url: the url fragment to append to the base url
+        :param params: any query params to append to the url
+        :param ttl: seconds to serve the response from cache, defaults to the endpoint template's ttl. Used for
+            responses known not to change, e.g. releases of past days
+        :return: json response
+        """
+        if self._cache.persistent and not self._cache.holds(self._cache.key(url, params)):
+            key, hit, value = await asyncio.to_thread(self._cache_lookup, url, params, ttl)
+        else:
+            key, hit, value = self._cache_lookup(url, params, ttl)
+        if hit:
+            return value
+        if not self._single_flight:
+            return await self.__fetch(url, params, key, ttl)
+        try:
+            # A caller joining a request started by another tool call still gives up at its own deadline
+            return await self._flight.do(
+                self._flight_key(url, params), lambda: self.__fetch(url, params, key, ttl), timeout=remaining()
+            )
+        except FlightTimeout:
+            raise DeadlineExceeded(endpoint_template(url)) from None
+
+    async def __fetch(self, url: str, params: dict, key: tuple, ttl: float = None):
+        entry, headers = self._revalidation(key)
+        response = await self.__send("GET", url, params=params, headers=headers)
+        if entry is not None and response.status_code == 304:
+            return await self.__cache_io(self._cache.not_modified, key, entry, ttl)
+        response.raise_for_status()
+        with tracer.span("decode"):
+            value = response.json()
+        await self.__cache_io(self._store, key, response, value, ttl)
+        return value
+
+    async def call_post(self, url: str, body: dict = None):
+        """
+        Calls the api with a post request
+        :param url: the url fragment to append to the base url
+        :param body: the body of the post request
+        :return: JSON response
+        """
+        response = await self.__send("POST", url, json=body)
+        response.raise_for_status()
+        await self.__cache_io(self._cache.invalidate_for_write, url)
+        if not response.content:
+            return None
+        return response.json()
+
+    async def call_put(self, url: str, body: dict = None):
+        """
+        Calls the api with a put request
+        :param url: the url fragment to append to the base url
+        :param body: the body of the put request
+        :return: JSON response
+        """
+        response = await self.__send("PUT", url, json=body)
+        response.raise_for_status()
+        await self.__cache_io(self._cache.invalidate_for_write, url)
+        if not response.content:
+            return None
+        return response.json()
+
+
+async def call_api(method, *args, **kwargs):
+    """
+    Awaits an api caller method from async tool code. Synchronous callers are run on a worker thread so they
+    do not block the event loop.
+    :param method: a bound call_get/call_post/call_put method of an api caller
+    :return: the method's result
+    """
+    if inspect.iscoroutinefunction(method):
+        return await method(*args, **kwargs)
+    result = await asyncio.to_thread(method, *args, **kwargs)
+    if inspect.isawaitable(result):
+        return await result
+    return result
+
+
+class _EntryPointLoop:
+    """
+    Event loop on a daemon thread that runs tool coroutines for synchronous callers. It outlives each call, so
+    background snapshot refreshes and other loop-bound state keep working from one call to the next.
+    """
+
+    def __init__(self):
+        self.__loop = None
+        self.__lock = threading.Lock()
+
+    def run(self, coroutine):
+        """
+        Runs a coroutine on the loop and blocks until it finishes. Context variables of the calling thread, such
+        as a deadline, are carried over to it.
+        :param coroutine: the coroutine to run
+        :return: the coroutine's result
+        """
+        with self.__lock:
+            if self.__loop is None:
+                self.__loop = asyncio.new_event_loop()
+                threading.Thread(target=self.__loop.run_forever, name="api-entry-points", daemon=True).start()
+        return asyncio.run_coroutine_threadsafe(_in_context(contextvars.copy_context(), coroutine), self.__loop).result()
+
+
+async def _in_context(context: contextvars.Context, coroutine):
+    for variable, value in context.items():
+        variable.set(value)
+    return await coroutine
+
+
+_entry_point_loop = _EntryPointLoop()
+
+
+def sync_compatible(func):
+    """
+    Keeps an async tool or resource callable from synchronous code when API_CLIENT=sync. Called without a running
+    event loop, the decorated function runs the coroutine and returns its result; called from async code, e.g. by
+    FastMCP, it returns the coroutine to await as before. With the async client the function is returned as is.
+    :param func: the async tool or resource function
+    :return: the function, or a wrapper that can be called both ways
+    """
+    if _client_mode() != "sync":
+        return func
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        coroutine = func(*args, **kwargs)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return _entry_point_loop.run(coroutine)
+        return coroutine
+
+    return inspect.markcoroutinefunction(wrapper)
+
+
+async def close_api_caller(caller=None):
+    """
+    Closes the pooled connections of an api caller, used when the server shuts down
+    :param caller: the caller to close, defaults to the shared api_caller
+    """
+    caller = caller or api_caller
+    if isinstance(caller, AsyncApiCaller):
+        await caller.aclose()
+    else:
+        caller.close()
+
+
+def create_api_caller():
+    """
+    Creates the api caller selected by the API_CLIENT env variable: 'async' (default) or 'sync'
+    :return: an AsyncApiCaller or ApiCaller
+    """
+    mode = _client_mode()
+    if mode == "sync":
+        return ApiCaller()
+    if mode != "async":
+        raise ValueError(f"Unsupported API_CLIENT '{mode}', expected 'async' or 'sync'")
+    return AsyncApiCaller()
+
+
+def _client_mode() -> str:
+    return os.getenv("API_CLIENT", "async").strip().lower()
+
+
+api_caller = create_api_caller()
@@ -0,0 +1,56 @@
+import asyncio
+
+from config import env_int
+from throttling import FAN_OUT, request_priority
+
+# Largest number of ids accepted by a single batch tool call
+MAX_BATCH_SIZE = 100
+
+
+def batch_concurrency() -> int:
+    """
+    Max concurrent upstream requests made by one batch tool call, from API_BATCH_CONCURRENCY (default 8)
+    """
+    return max(env_int("API_BATCH_CONCURRENCY", 8), 1)
+
+
+def unique_ids(ids: list, name: str = "ids") -> list:
+    """
+    Validates a batch of ids and removes duplicates, keeping the original order
+    :param ids: list of ids
+    :param name: parameter name used in error messages
+    :return: de-duplicated list of ids
+    """
+    ids = list(dict.fromkeys(item for item in ids or [] if item))
+    if not ids:
+        raise ValueError(f"{name} must contain at least one id")
+    if len(ids) > MAX_BATCH_SIZE:
+        raise ValueError(f"{name} can contain at most {MAX_BATCH_SIZE} ids")
+    return ids
+
+
+async def fan_out(func, keys: list, limit: int = None) -> tuple:
+    """
+    Calls an async function for every key with bounded concurrency, collecting failures per key instead of
+    failing the whole batch. The calls' api requests are queued behind the tool calls' single requests.
+    :param func: async callable taking a key
+    :param keys: keys to call the function with
+    :param limit: max concurrent calls, defaults to API_BATCH_CONCURRENCY
+    :return: (results, errors) dictionaries keyed by key, errors holding the exception message
+    """
+    semaphore = asyncio.Semaphore(limit or batch_concurrency())
+
+    async def call(key):
+        async with semaphore:
+            return await func(key)
+
+    with request_priority(FAN_OUT):
+        outcomes = await asyncio.gather(*(call(key) for key in keys), return_exceptions=True)
+    results = {}
+    errors = {}
+    for key, outcome in zip(keys, outcomes):
+        if isinstance(outcome, Exception):
+            errors[key] = str(outcome) or type(outcome).__name__
+        else:
+            results[key] = outcome
+    return results, errors
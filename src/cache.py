@@ -0,0 +1,300 @@
+import threading
+import time
+from collections import OrderedDict
+
+from endpoints import endpoint_template
+
+# How long (in seconds) a GET response is served from cache, per endpoint template.
+# Responses from endpoints that are not listed here are only kept if they carry an ETag or Last-Modified
+# validator, and are then revalidated on every request.
+DEFAULT_TTLS = {
+    "/services/types": 6 * 60 * 60,
+    "/teams": 10 * 60,
+    "/teams/{id}/services": 5 * 60,
+    "/services": 5 * 60,
+    "/services/search": 2 * 60,
+    "/services/{id}/teams": 5 * 60,
+    "/services/{id}/debt": 2 * 60,
+    "/services/{id}/dependencies": 2 * 60,
+    "/services/{id}/dependents": 2 * 60,
+    "/reports/services/debt": 2 * 60,
+    "/reports/services/{id}/risk": 2 * 60,
+    "/releases/{start}/{end}": 5 * 60,
+}
+
+# Cached endpoint templates made stale by a successful write to a template.
+# Writes to templates not listed here clear the whole cache.
+INVALIDATIONS = {
+    "/services": [
+        "/services", "/services/search", "/teams/{id}/services", "/services/{id}/teams",
+    ],
+    "/services/{id}": [
+        "/services", "/services/search", "/teams/{id}/services", "/services/{id}/dependencies",
+        "/services/{id}/dependents", "/reports/services/debt", "/reports/services/{id}/risk",
+        "/releases/{start}/{end}",
+    ],
+    "/services/{id}/dependency": [
+        "/services/{id}/dependencies", "/services/{id}/dependents", "/reports/services/{id}/risk",
+    ],
+    "/services/{id}/debt": [
+        "/services/{id}/debt", "/reports/services/debt", "/reports/services/{id}/risk",
+    ],
+}
+
+
+class _Entry:
+    __slots__ = ("template", "value", "size", "expires", "etag", "last_modified")
+
+    def __init__(self, template: str, value, size: int, expires: float, etag: str = None, last_modified: str = None):
+        self.template = template
+        self.value = value
+        self.size = size
+        self.expires = expires
+        self.etag = etag
+        self.last_modified = last_modified
+
+    def has_validators(self) -> bool:
+        return bool(self.etag or self.last_modified)
+
+    def conditional_headers(self) -> dict:
+        """
+        :return: the If-None-Match/If-Modified-Since headers to revalidate this entry with
+        """
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """
+    Thread-safe TTL cache for parsed GET responses, evicting least recently used entries once the
+    total size of the cached response bodies exceeds max_bytes.
+    Expired entries that carry an ETag or Last-Modified validator are kept (until evicted) so they can be
+    revalidated with a conditional request instead of downloaded again.
+    Cached values are shared between callers and must be treated as read-only.
+    With a persistent store every stored response is also written through to it, and responses missing from
+    memory are looked up there, so cached responses survive a restart of the server.
+    """
+
+    def __init__(self, max_bytes: int, ttls: dict = None, store=None):
+        """
+        :param max_bytes: max total size of the cached response bodies held in memory, 0 disables the cache
+        :param ttls: ttl in seconds per endpoint template, defaults to DEFAULT_TTLS
+        :param store: optional persistent store, e.g. a DiskCache
+        """
+        self.__max_bytes = max_bytes
+        self.__ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.__store = store
+        self.__entries = OrderedDict()
+        self.__keys_by_template = {}
+        self.__bytes = 0
+        self.__lock = threading.Lock()
+        self.__counters = {
+            "hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0,
+            "revalidations": 0, "not_modified": 0, "bytes_saved": 0, "disk_loads": 0,
+        }
+
+    @staticmethod
+    def key(path: str, params: dict = None) -> tuple:
+        """
+        Builds the cache key for a request
+        :param path: the url fragment
+        :param params: the query params
+        :return: hashable key of the path and sorted params
+        """
+        if not path.startswith("/"):
+            path = f"/{path}"
+        return path, tuple(sorted((str(k), str(v)) for k, v in (params or {}).items()))
+
+    @property
+    def enabled(self) -> bool:
+        return self.__max_bytes > 0
+
+    @property
+    def persistent(self) -> bool:
+        """
+        Whether operations may read or write the persistent store, i.e. block on disk I/O
+        """
+        return self.__store is not None and self.enabled
+
+    def holds(self, key: tuple) -> bool:
+        """
+        :return: whether the key is held in memory, in which case get and revalidation_entry do no disk I/O
+        """
+        with self.__lock:
+            return key in self.__entries
+
+    def ttl_for(self, path: str) -> float:
+        """
+        Returns the ttl for a path, 0 when responses from the endpoint are never served without revalidation
+        :param path: the url fragment
+        :return: ttl in seconds
+        """
+        if not self.enabled:
+            return 0
+        return self.__ttls.get(endpoint_template(path), 0)
+
+    def get(self, key: tuple, load: bool = True) -> tuple:
+        """
+        Looks up a cached response
+        :param key: key built by ResponseCache.key
+        :param load: whether to look the key up in the persistent store when it is not held in memory, False
+            when load was called for the key already
+        :return: (True, value) on a hit, otherwise (False, None)
+        """
+        if load:
+            self.load(key)
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is not None and entry.expires <= time.monotonic():
+                if not entry.has_validators():
+                    self.__remove(key)
+                    self.__counters["expirations"] += 1
+                entry = None
+            if entry is None:
+                self.__counters["misses"] += 1
+                return False, None
+            self.__entries.move_to_end(key)
+            self.__counters["hits"] += 1
+            return True, entry.value
+
+    def put(self, key: tuple, value, size: int, ttl: float = None, etag: str = None, last_modified: str = None):
+        """
+        Stores a response, evicting least recently used entries to stay within the byte budget
+        :param key: key built by ResponseCache.key
+        :param value: the parsed response body
+        :param size: size of the raw response body in bytes
+        :param ttl: seconds to serve the entry without revalidation, defaults to the endpoint template's ttl
+        :param etag: the response's ETag header, if any
+        :param last_modified: the response's Last-Modified header, if any
+        """
+        template = endpoint_template(key[0])
+        if ttl is None:
+            ttl = self.ttl_for(key[0])
+        if not self.enabled or size > self.__max_bytes or (ttl <= 0 and not (etag or last_modified)):
+            return
+        ttl = max(ttl, 0)
+        with self.__lock:
+            self.__insert(key, _Entry(template, value, size, time.monotonic() + ttl, etag, last_modified))
+        if self.__store is not None:
+            self.__store.put(key, template, value, size, time.time() + ttl, etag, last_modified)
+
+    def __insert(self, key: tuple, entry: _Entry):
+        """
+        Adds an entry to memory, evicting least recently used entries. Must be called while holding the lock.
+        """
+        if key in self.__entries:
+            self.__remove(key)
+        self.__entries[key] = entry
+        self.__keys_by_template.setdefault(entry.template, set()).add(key)
+        self.__bytes += entry.size
+        while self.__bytes > self.__max_bytes:
+            oldest = next(iter(self.__entries))
+            self.__remove(oldest)
+            self.__counters["evictions"] += 1
+
+    def load(self, key: tuple):
+        """
+        Copies a response from the persistent store into memory when it is not already held there
+        :param key: key built by ResponseCache.key
+        """
+        if self.__store is None or not self.enabled:
+            return
+        with self.__lock:
+            if key in self.__entries:
+                return
+        row = self.__store.get(key)
+        if row is None:
+            return
+        template, value, size, expires, etag, last_modified = row
+        remaining = expires - time.time()
+        if (remaining <= 0 and not (etag or last_modified)) or size > self.__max_bytes:
+            return
+        with self.__lock:
+            if key in self.__entries:
+                return
+            self.__insert(key, _Entry(template, value, size, time.monotonic() + remaining, etag, last_modified))
+            self.__counters["disk_loads"] += 1
+
+    def revalidation_entry(self, key: tuple, load: bool = True):
+        """
+        Returns the stored entry for a key if it can be revalidated with a conditional request
+        :param key: key built by ResponseCache.key
+        :param load: whether to look the key up in the persistent store when it is not held in memory, False
+            when load was called for the key already
+        :return: the entry, or None when there is nothing to revalidate
+        """
+        if load:
+            self.load(key)
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is None or not entry.has_validators():
+                return None
+            self.__counters["revalidations"] += 1
+            return entry
+
+    def not_modified(self, key: tuple, entry: _Entry, ttl: float = None):
+        """
+        Records a 304 Not Modified for a revalidated entry, storing it again with a fresh ttl
+        :param key: key built by ResponseCache.key
+        :param entry: the entry returned by revalidation_entry
+        :param ttl: the request's ttl, defaults to the endpoint template's ttl
+        :return: the entry's parsed value
+        """
+        with self.__lock:
+            self.__counters["not_modified"] += 1
+            self.__counters["bytes_saved"] += entry.size
+        self.put(key, entry.value, entry.size, ttl=ttl, etag=entry.etag, last_modified=entry.last_modified)
+        return entry.value
+
+    def invalidate_for_write(self, path: str):
+        """
+        Drops cached responses that a successful write to the path may have made stale
+        :param path: the url fragment that was written to
+        """
+        templates = INVALIDATIONS.get(endpoint_template(path))
+        with self.__lock:
+            if templates is None:
+                keys = list(self.__entries)
+            else:
+                keys = [key for template in templates for key in self.__keys_by_template.get(template, ())]
+            for key in keys:
+                self.__remove(key)
+            self.__counters["invalidations"] += len(keys)
+        if self.__store is not None:
+            self.__store.delete_templates(templates)
+
+    def clear(self):
+        with self.__lock:
+            self.__entries.clear()
+            self.__keys_by_template.clear()
+            self.__bytes = 0
+        if self.__store is not None:
+            self.__store.delete_templates()
+
+    def stats(self) -> dict:
+        """
+        Returns cache counters
+        :return: dictionary of hit/miss/eviction counters and current size
+        """
+        with self.__lock:
+            stats = dict(self.__counters)
+            lookups = stats["hits"] + stats["misses"]
+            stats.update({
+                "entries": len(self.__entries),
+                "bytes": self.__bytes,
+                "max_bytes": self.__max_bytes,
+                "hit_rate": round(stats["hits"] / lookups, 4) if lookups else 0.0,
+            })
+        stats["disk"] = self.__store.stats() if self.__store is not None else None
+        return stats
+
+    def __remove(self, key: tuple):
+        entry = self.__entries.pop(key)
+        self.__bytes -= entry.size
+        keys = self.__keys_by_template.get(entry.template)
+        if keys is not None:
+            keys.discard(key)
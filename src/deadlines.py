@@ -0,0 +1,155 @@
+import contextvars
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from fastmcp.server.middleware import Middleware
+
+from config import env_bool, env_float, env_int
+from endpoints import endpoint_template
+
+_deadline = contextvars.ContextVar("atlas_deadline", default=None)
+
+# Timeouts firing this close to the deadline are blamed on the deadline rather than the endpoint
+_DEADLINE_SLACK = 0.05
+
+
+class DeadlineExceeded(TimeoutError):
+    """
+    Raised when a tool call has no time left for another api request
+    """
+
+    def __init__(self, endpoint: str):
+        super().__init__(f"The tool call ran out of time before {endpoint} answered")
+        self.endpoint = endpoint
+
+
+@contextmanager
+def deadline(seconds: float | None):
+    """
+    Gives the code in the block a time budget, shared by every api request it makes, including requests made by
+    tasks and threads started from it. A nested deadline can only shorten the budget.
+    :param seconds: the budget, None or 0 for no deadline
+    """
+    if not seconds or seconds <= 0:
+        yield
+        return
+    at = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(at if current is None else min(at, current))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> float | None:
+    """
+    :return: seconds left before the current deadline, None when there is no deadline
+    """
+    at = _deadline.get()
+    return None if at is None else at - time.monotonic()
+
+
+def expired() -> bool:
+    left = remaining()
+    return left is not None and left <= _DEADLINE_SLACK
+
+
+def request_timeout(path: str, timeout: float) -> float:
+    """
+    Shortens a request timeout to the time left before the deadline
+    :param path: the url fragment, used in the error message
+    :param timeout: the endpoint's timeout
+    :return: the timeout to use
+    :raises DeadlineExceeded: when the deadline has passed
+    """
+    left = remaining()
+    if left is None:
+        return timeout
+    if left <= 0:
+        raise DeadlineExceeded(endpoint_template(path))
+    return min(timeout, left)
+
+
+class AdaptiveTimeouts:
+    """
+    Request timeouts per endpoint template, derived from observed latency: API_TIMEOUT_MULTIPLIER (default 3)
+    times the p99 of the endpoint's last 200 requests, clamped between API_TIMEOUT_MIN (default 1) and API_TIMEOUT
+    seconds (default 10). Endpoints with fewer than API_TIMEOUT_MIN_SAMPLES requests (default 20) use API_TIMEOUT.
+    Disabled with API_ADAPTIVE_TIMEOUTS=false, every request then uses API_TIMEOUT.
+    """
+
+    WINDOW = 200
+    # The p99 is recomputed every this many samples rather than on every request
+    RECOMPUTE_EVERY = 10
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__samples = {}
+        self.__p99 = {}
+        self.__pending = {}
+
+    @staticmethod
+    def default_timeout() -> float:
+        return env_float("API_TIMEOUT", 10.0)
+
+    def observe(self, path: str, seconds: float):
+        """
+        Records how long a request took. Timed out requests are recorded with the time they were allowed, so a
+        slowing endpoint raises its own timeout instead of failing at the old one.
+        :param path: the url fragment, grouped by its endpoint template
+        :param seconds: the request duration
+        """
+        endpoint = endpoint_template(path)
+        with self.__lock:
+            samples = self.__samples.get(endpoint)
+            if samples is None:
+                samples = self.__samples[endpoint] = deque(maxlen=self.WINDOW)
+            samples.append(seconds)
+            pending = self.__pending.get(endpoint, 0) + 1
+            if endpoint not in self.__p99 or pending >= self.RECOMPUTE_EVERY:
+                ordered = sorted(samples)
+                self.__p99[endpoint] = ordered[min(int(len(ordered) * 0.99), len(ordered) - 1)]
+                pending = 0
+            self.__pending[endpoint] = pending
+
+    def timeout_for(self, path: str) -> float:
+        """
+        :param path: the url fragment, grouped by its endpoint template
+        :return: the request timeout in seconds
+        """
+        default = self.default_timeout()
+        if not env_bool("API_ADAPTIVE_TIMEOUTS", True):
+            return default
+        endpoint = endpoint_template(path)
+        with self.__lock:
+            samples = self.__samples.get(endpoint)
+            if samples is None or len(samples) < env_int("API_TIMEOUT_MIN_SAMPLES", 20):
+                return default
+            p99 = self.__p99[endpoint]
+        timeout = p99 * env_float("API_TIMEOUT_MULTIPLIER", 3.0)
+        return min(max(timeout, env_float("API_TIMEOUT_MIN", 1.0)), default)
+
+    def stats(self) -> dict:
+        """
+        :return: dictionary of endpoint template to its sample count, p99 latency and current timeout, in seconds
+        """
+        with self.__lock:
+            endpoints = {endpoint: (len(samples), self.__p99.get(endpoint)) for endpoint, samples in self.__samples.items()}
+        return {
+            endpoint: {"samples": count, "p99": round(p99, 4), "timeout": round(self.timeout_for(endpoint), 3)}
+            for endpoint, (count, p99) in sorted(endpoints.items())
+        }
+
+
+class ToolDeadlineMiddleware(Middleware):
+    """
+    Gives every tool call a deadline of TOOL_DEADLINE seconds (default 30, 0 to disable), which bounds the
+    timeouts and retries of the api requests it makes
+    """
+
+    async def on_call_tool(self, context, call_next):
+        with deadline(env_float("TOOL_DEADLINE", 30.0)):
+            return await call_next(context)
@@ -1,6 +1,7 @@
 from fastmcp import FastMCP
 
-from api_calls import api_caller
+from api_calls import api_caller, call_api, sync_compatible
+from tabular import tabulate
 
 debt_mcp = FastMCP("Debt MCP")
 
@@ -10,50 +11,58 @@ def prompt_get_debt() -> str:
     return """
         To get a list of all services and the count of all debts associated with them, use the tool `get_debt` or the resource `serviceatlas://debts`. 
         The returned data will be an array of objects with the format {name: <service name>, count: <number of debts>, id: <service id>}.
+        Set `tabular` to true on the tools to get a `columns` header and `rows` of values instead, which is much smaller for long reports.
         If you wish to get a list of debts for a specific service, use the tool `get_debts_for_service` passing in the service id or the resource `serviceatlas://debts/{service_id}`.
     """
 
 
 @debt_mcp.tool(annotations={"readOnlyHint": True, "title": "Get Debt Report"})
-def get_debt():
+@sync_compatible
+async def get_debt(tabular: bool = False):
     """
     Gets a report of all services that have open debts and a count of the number of debts associated with them
+    :param tabular: set to true to return the report as a `columns` header and `rows` of values instead of objects
     :return:
     """
-    return api_caller.call_get('/reports/services/debt')
+    return tabulate(await call_api(api_caller.call_get, '/reports/services/debt'), tabular)
 
 
 @debt_mcp.resource(uri='serviceatlas://debts', name='Debt Report', mime_type='application/json')
-def get_debts_resource():
+@sync_compatible
+async def get_debts_resource():
     """
     Gets a report of all services that have open debts and a count of the number of debts associated with them
     :return:
     """
-    return api_caller.call_get('/reports/services/debt')
+    return await call_api(api_caller.call_get, '/reports/services/debt')
 
 
 @debt_mcp.tool(annotations={"readOnlyHint": True, "title": "Get Debts for Service"})
-def get_debts_for_service(service_id: str):
+@sync_compatible
+async def get_debts_for_service(service_id: str, tabular: bool = False):
     """
     Gets the debts for a specific service
     :param service_id:
+    :param tabular: set to true to return the debts as a `columns` header and `rows` of values instead of objects
     :return:
     """
-    return api_caller.call_get(f'/services/{service_id}/debt')
+    return tabulate(await call_api(api_caller.call_get, f'/services/{service_id}/debt'), tabular)
 
 
 @debt_mcp.resource(uri='serviceatlas://debts/{service_id}', name='Debts by Service', mime_type='application/json')
-def get_debts_for_service_resource(service_id: str):
+@sync_compatible
+async def get_debts_for_service_resource(service_id: str):
     """
     Gets the debts for a specific service
     :param service_id:
     :return:
     """
-    return api_caller.call_get(f'/services/{service_id}/debt')
+    return await call_api(api_caller.call_get, f'/services/{service_id}/debt')
 
 
 @debt_mcp.tool(annotations={"title": "Create Debt"})
-def create_debt(service_id: str, title: str, description: str, debt_type: str):
+@sync_compatible
+async def create_debt(service_id: str, title: str, description: str, debt_type: str):
     """
     Creates a new debt item for a service
     :param service_id: The ID of the service
@@ -68,4 +77,4 @@ def create_debt(service_id: str, title: str, description: str, debt_type: str):
         "type": debt_type,
         "status": "pending"
     }
-    return api_caller.call_post(f'/services/{service_id}/debt', body=body)
+    return await call_api(api_caller.call_post, f'/services/{service_id}/debt', body=body)
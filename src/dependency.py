@@ -1,11 +1,24 @@
 from fastmcp import FastMCP
 from fastmcp.server.transforms import ResourcesAsTools
-from api_calls import api_caller
+from api_calls import api_caller, call_api, sync_compatible
+from batching import fan_out
+from graph import EDGE_ATTRIBUTES, GraphSnapshot
+from projection import COMPACT_FIELDS, parse_fields, project
 
 dependency_mcp = FastMCP("Dependency MCP")
 
 dependency_mcp.add_transform(ResourcesAsTools(dependency_mcp))
 
+# Default fields of dependency/dependent results, the compact service profile plus the edge attributes
+EDGE_FIELDS = COMPACT_FIELDS + list(EDGE_ATTRIBUTES)
+
+
+async def _fetch(url: str, params: dict = None):
+    return await call_api(api_caller.call_get, url, params=params)
+
+
+graph_snapshot = GraphSnapshot(_fetch)
+
 @dependency_mcp.prompt('get_service_dependencies_and_dependents')
 def prompt_get_service_dependencies_and_dependents(service_id: str) -> str:
     """
@@ -14,9 +27,14 @@ def prompt_get_service_dependencies_and_dependents(service_id: str) -> str:
     :return:
     """
     return f"""
-        To get a list of dependencies for a service, use the resource: `serviceatlas://services/{service_id}/dependencies`. It will return a list of dependencies. 
+        To get a list of dependencies for a service, use the resource: `serviceatlas://services/{service_id}/dependencies`. It will return an object with a `dependencies` list. 
+        
+        To get a list of dependents for a service, use the resource: `serviceatlas://services/{service_id}/dependents`. It will return an object with a `dependents` list. 
         
-        To get a list of dependents for a service, use the resource: `serviceatlas://services/{service_id}/dependents`. It will return a list of dependents. 
+        Each service in the lists only has its id, name, tier, type and the edge's version and interaction_type, add e.g. `?fields=id,name,description` to choose the fields or `?fields=*` for full objects.
+        
+        These are answered from an in-memory snapshot of the dependency graph when it is fresh; `source` and `snapshot_age_seconds` say where the answer came from. 
+        Use the `get_service_dependencies`/`get_service_dependents` tools with `live` set to true if the user has just changed the graph outside this conversation.
         
         To create a dependency connection between two entities, use the tool: `create_dependency`, passing in the 'service_id' (service that depends), 'dependency_id' (service it depends on), and optionally 'version' and 'interaction_type'.
         
@@ -32,7 +50,8 @@ def prompt_get_service_dependencies_and_dependents(service_id: str) -> str:
 
 
 @dependency_mcp.tool()
-def create_dependency(service_id: str, dependency_id: str, version: str = None, interaction_type: str = None):
+@sync_compatible
+async def create_dependency(service_id: str, dependency_id: str, version: str = None, interaction_type: str = None):
     """
     Creates a dependency connection between two entities.
     The service_id will depend on the dependency_id. The service_id is the consumer/caller that relies on dependency_id
@@ -52,7 +71,8 @@ def create_dependency(service_id: str, dependency_id: str, version: str = None,
         body["version"] = version
     if interaction_type:
         body["interaction_type"] = interaction_type
-    response = api_caller.call_post(f'/services/{service_id}/dependency', body=body)
+    response = await call_api(api_caller.call_post, f'/services/{service_id}/dependency', body=body)
+    graph_snapshot.record_dependency(service_id, dependency_id, version, interaction_type)
     return response if response else '{"status": "success"}'
 
 @dependency_mcp.tool(annotations={"readOnlyHint": True, "title": "Remove Dependency"})
@@ -67,40 +87,158 @@ def remove_dependency():
     pass
 
 @dependency_mcp.tool(annotations={"readOnlyHint": True, "title": "Get Service Dependencies"})
-def get_service_dependencies(service_id: str):
+@sync_compatible
+async def get_service_dependencies(service_id: str, live: bool = False, fields: list[str] = None):
     """
-    Gets a list of services that this service depends on
+    Gets a list of services that this service depends on. Answered from the in-memory dependency graph snapshot
+    when it is fresh, otherwise from the api.
     :param service_id: the guid for the service
-    :return: a list of dependency objects
+    :param live: set to true to skip the snapshot and read from the api, e.g. right after a change
+    :param fields: optional list of service fields to return, defaults to id, name, tier, type, version and
+        interaction_type. Use ["*"] for every field
+    :return: object with a `dependencies` list, the `source` (snapshot or live) and the `snapshot_age_seconds`
     """
-    return api_caller.call_get(f'/services/{service_id}/dependencies')
+    return await _query_graph(service_id, "dependencies", live, fields)
 
 
-@dependency_mcp.resource(uri='serviceatlas://services/{service_id}/dependencies', name='Service Dependencies', mime_type='application/json')
-def get_service_dependencies_resource(service_id: str):
+@dependency_mcp.resource(uri='serviceatlas://services/{service_id}/dependencies{?fields}', name='Service Dependencies', mime_type='application/json')
+@sync_compatible
+async def get_service_dependencies_resource(service_id: str, fields: str = None):
     """
     Gets a list of services that this service depends on
     :param service_id: the guid for the service
-    :return: a list of dependency objects
+    :param fields: optional comma separated list of service fields to return, defaults to
+        id,name,tier,type,version,interaction_type. Use * for every field
+    :return: object with a `dependencies` list, the `source` (snapshot or live) and the `snapshot_age_seconds`
     """
-    return api_caller.call_get(f'/services/{service_id}/dependencies')
+    return await _query_graph(service_id, "dependencies", fields=fields)
 
 
 @dependency_mcp.tool(annotations={"readOnlyHint": True, "title": "Get Service Dependents"})
-def get_service_dependents(service_id: str):
+@sync_compatible
+async def get_service_dependents(service_id: str, live: bool = False, fields: list[str] = None):
     """
-    Gets a list of services that depend on this service
+    Gets a list of services that depend on this service. Answered from the in-memory dependency graph snapshot
+    when it is fresh, otherwise from the api.
     :param service_id: the guid for the service
-    :return: a list of dependent objects
+    :param live: set to true to skip the snapshot and read from the api, e.g. right after a change
+    :param fields: optional list of service fields to return, defaults to id, name, tier, type, version and
+        interaction_type. Use ["*"] for every field
+    :return: object with a `dependents` list, the `source` (snapshot or live) and the `snapshot_age_seconds`
     """
-    return api_caller.call_get(f'/services/{service_id}/dependents')
+    return await _query_graph(service_id, "dependents", live, fields)
 
 
-@dependency_mcp.resource(uri='serviceatlas://services/{service_id}/dependents', name='Service Dependents', mime_type='application/json')
-def get_service_dependents_resource(service_id: str):
+@dependency_mcp.resource(uri='serviceatlas://services/{service_id}/dependents{?fields}', name='Service Dependents', mime_type='application/json')
+@sync_compatible
+async def get_service_dependents_resource(service_id: str, fields: str = None):
     """
     Gets a list of services that depend on this service
     :param service_id: the guid for the service
-    :return: a list of dependent objects
+    :param fields: optional comma separated list of service fields to return, defaults to
+        id,name,tier,type,version,interaction_type. Use * for every field
+    :return: object with a `dependents` list, the `source` (snapshot or live) and the `snapshot_age_seconds`
+    """
+    return await _query_graph(service_id, "dependents", fields=fields)
+
+
+async def _query_graph(service_id: str, direction: str, live: bool = False, fields=None) -> dict:
+    """
+    Answers a dependencies/dependents query from the graph snapshot, falling back to the api when the snapshot
+    is disabled, stale, or does not know the service
+    :param service_id: the guid for the service
+    :param direction: 'dependencies' or 'dependents'
+    :param live: skip the snapshot
+    :param fields: list or comma separated string of fields to keep on each service, defaults to EDGE_FIELDS
+    :return: query result with its source and snapshot age
+    """
+    fields = parse_fields(fields, EDGE_FIELDS)
+    graph = None if live else graph_snapshot.current()
+    if graph is not None:
+        results = getattr(graph, direction)(service_id)
+        if results is not None:
+            return {
+                direction: project(results, fields), "source": "snapshot",
+                "snapshot_age_seconds": round(graph.age(), 3),
+            }
+    results = await call_api(api_caller.call_get, f'/services/{service_id}/{direction}')
+    return {direction: project(results, fields), "source": "live", "snapshot_age_seconds": None}
+
+
+@dependency_mcp.tool(annotations={"readOnlyHint": True, "title": "Get Blast Radius"})
+@sync_compatible
+async def get_blast_radius(service_id: str, max_depth: int = 3, max_nodes: int = 200):
     """
-    return api_caller.call_get(f'/services/{service_id}/dependents')
\ No newline at end of file
+    Walks the dependents of a service breadth first, returning every service that could be affected if it failed,
+    the depth at which it is reached, its owning teams, and the dependency edges between them. Edges between services
+    owned by different teams are flagged as cross team escalation points.
+    Services at max_depth whose own dependents were not walked carry an `unexplored_dependents` count.
+    Prefer this over repeatedly calling get_service_dependents and get_teams_by_service.
+    :param service_id: the guid for the origin service
+    :param max_depth: how many levels of dependents to walk (default: 3)
+    :param max_nodes: max number of services to include, including the origin (default: 200)
+    :return: blast radius object with nodes, edges, cross team edge count, a depth_limited flag set when max_depth
+        cut the walk short, and a truncated flag set when max_depth or max_nodes did
+    """
+    if not service_id:
+        raise ValueError("service_id is required")
+    if max_depth < 0 or max_nodes < 1:
+        raise ValueError("max_depth must be at least 0 and max_nodes at least 1")
+
+    async def fetch(key: tuple):
+        node_id, kind = key
+        return await call_api(api_caller.call_get, f'/services/{node_id}/{kind}')
+
+    nodes = {service_id: {"id": service_id, "depth": 0}}
+    edges = []
+    errors = []
+    node_limited = False
+    depth_limited = False
+    frontier = [service_id]
+    depth = 0
+    while frontier:
+        # Dependents of the last level are fetched too, to tell whether max_depth cut the walk short
+        keys = [(node_id, kind) for node_id in frontier for kind in ("teams", "dependents")]
+        results, failures = await fan_out(fetch, keys)
+        for (node_id, kind), error in failures.items():
+            errors.append({"service_id": node_id, "path": kind, "error": error})
+        next_frontier = []
+        for node_id in frontier:
+            teams = results.get((node_id, "teams"))
+            nodes[node_id]["teams"] = [{"id": team.get("id"), "name": team.get("name")} for team in teams or []]
+            unexplored = 0
+            for dependent in results.get((node_id, "dependents")) or []:
+                dependent_id = dependent.get("id")
+                if not dependent_id:
+                    continue
+                if dependent_id not in nodes:
+                    if depth >= max_depth:
+                        unexplored += 1
+                        continue
+                    if len(nodes) >= max_nodes:
+                        node_limited = True
+                        continue
+                    nodes[dependent_id] = {"id": dependent_id, "name": dependent.get("name"), "depth": depth + 1}
+                    next_frontier.append(dependent_id)
+                edges.append({"dependent": dependent_id, "dependency": node_id})
+            if unexplored:
+                nodes[node_id]["unexplored_dependents"] = unexplored
+                depth_limited = True
+        frontier = next_frontier
+        depth += 1
+
+    for edge in edges:
+        dependent_teams = {team["id"] for team in nodes[edge["dependent"]].get("teams", [])}
+        dependency_teams = {team["id"] for team in nodes[edge["dependency"]].get("teams", [])}
+        edge["cross_team"] = bool(dependent_teams and dependency_teams and not dependent_teams & dependency_teams)
+
+    return {
+        "origin": service_id,
+        "max_depth": max_depth,
+        "nodes": list(nodes.values()),
+        "edges": edges,
+        "cross_team_edges": sum(1 for edge in edges if edge["cross_team"]),
+        "depth_limited": depth_limited,
+        "truncated": node_limited or depth_limited,
+        "errors": errors,
+    }
@@ -0,0 +1,174 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    template TEXT NOT NULL,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    expires REAL NOT NULL,
+    etag TEXT,
+    last_modified TEXT
+);
+CREATE INDEX IF NOT EXISTS responses_template ON responses (template);
+"""
+
+# Number of writes between two prunes of the database
+_PRUNE_EVERY = 500
+
+
+class DiskCache:
+    """
+    SQLite backed store for cached GET responses, shared by every server process using the same file so a new
+    session starts warm. The database runs in WAL mode so concurrent processes can read while one writes.
+    The file is only opened on first use, keeping server startup free of disk I/O.
+    Expiry times are stored as wall clock timestamps since they have to survive restarts.
+    Storage errors (locked or corrupt files, full disks) are counted and otherwise ignored, the cache
+    then behaves as if the entry was not stored.
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        """
+        :param path: path of the sqlite database file, created if missing
+        :param max_bytes: max total size of the stored response bodies, oldest entries are pruned beyond it
+        """
+        self.__path = path
+        self.__max_bytes = max_bytes
+        self.__connection = None
+        self.__lock = threading.Lock()
+        self.__writes = 0
+        self.__counters = {"reads": 0, "hits": 0, "writes": 0, "deletes": 0, "pruned": 0, "errors": 0}
+
+    @staticmethod
+    def encode_key(key: tuple) -> str:
+        path, params = key
+        return json.dumps([path, [list(param) for param in params]], separators=(",", ":"))
+
+    def __connect(self) -> sqlite3.Connection:
+        """
+        Opens the database on first use. Must be called while holding the lock.
+        """
+        if self.__connection is None:
+            directory = os.path.dirname(os.path.abspath(self.__path))
+            os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.__path, timeout=5, check_same_thread=False, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(_SCHEMA)
+            self.__connection = connection
+            self.__prune(connection)
+        return self.__connection
+
+    def __prune(self, connection: sqlite3.Connection):
+        """
+        Drops expired entries that cannot be revalidated, then the soonest expiring entries until the
+        stored bodies fit in max_bytes. Must be called while holding the lock.
+        """
+        pruned = connection.execute(
+            "DELETE FROM responses WHERE expires <= ? AND etag IS NULL AND last_modified IS NULL", (time.time(),)
+        ).rowcount
+        total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total > self.__max_bytes:
+            excess = total - self.__max_bytes
+            doomed = []
+            for key, size in connection.execute("SELECT key, size FROM responses ORDER BY expires"):
+                if excess <= 0:
+                    break
+                doomed.append((key,))
+                excess -= size
+            connection.executemany("DELETE FROM responses WHERE key = ?", doomed)
+            pruned += len(doomed)
+        self.__counters["pruned"] += pruned
+
+    def get(self, key: tuple):
+        """
+        Reads a stored response
+        :param key: key built by ResponseCache.key
+        :return: tuple of (template, value, size, expires, etag, last_modified) or None when not stored
+        """
+        with self.__lock:
+            self.__counters["reads"] += 1
+            try:
+                row = self.__connect().execute(
+                    "SELECT template, value, size, expires, etag, last_modified FROM responses WHERE key = ?",
+                    (self.encode_key(key),),
+                ).fetchone()
+            except (sqlite3.Error, OSError):
+                self.__counters["errors"] += 1
+                return None
+            if row is None:
+                return None
+            template, value, size, expires, etag, last_modified = row
+            try:
+                value = json.loads(value)
+            except ValueError:
+                self.__counters["errors"] += 1
+                return None
+            self.__counters["hits"] += 1
+            return template, value, size, expires, etag, last_modified
+
+    def put(self, key: tuple, template: str, value, size: int, expires: float, etag: str = None,
+            last_modified: str = None):
+        """
+        Stores a response, replacing any previous entry for the key
+        :param key: key built by ResponseCache.key
+        :param template: the endpoint template of the key's path
+        :param value: the parsed response body, which must be json serializable
+        :param size: size of the raw response body in bytes
+        :param expires: wall clock time (time.time()) after which the entry must be revalidated
+        :param etag: the response's ETag header, if any
+        :param last_modified: the response's Last-Modified header, if any
+        """
+        with self.__lock:
+            try:
+                connection = self.__connect()
+                connection.execute(
+                    "INSERT OR REPLACE INTO responses (key, template, value, size, expires, etag, last_modified) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (self.encode_key(key), template, json.dumps(value), size, expires, etag, last_modified),
+                )
+                self.__counters["writes"] += 1
+                self.__writes += 1
+                if self.__writes % _PRUNE_EVERY == 0:
+                    self.__prune(connection)
+            except (sqlite3.Error, OSError, TypeError, ValueError):
+                self.__counters["errors"] += 1
+
+    def delete_templates(self, templates: list = None):
+        """
+        Deletes stored responses
+        :param templates: endpoint templates to delete, or None to delete every response
+        """
+        with self.__lock:
+            try:
+                connection = self.__connect()
+                if templates is None:
+                    deleted = connection.execute("DELETE FROM responses").rowcount
+                else:
+                    deleted = sum(
+                        connection.execute("DELETE FROM responses WHERE template = ?", (template,)).rowcount
+                        for template in templates
+                    )
+                self.__counters["deletes"] += deleted
+            except (sqlite3.Error, OSError):
+                self.__counters["errors"] += 1
+
+    def close(self):
+        with self.__lock:
+            if self.__connection is not None:
+                self.__connection.close()
+                self.__connection = None
+
+    def stats(self) -> dict:
+        """
+        Returns disk cache counters
+        :return: dictionary of read/write counters and the database path
+        """
+        with self.__lock:
+            stats = dict(self.__counters)
+            stats.update({"path": self.__path, "max_bytes": self.__max_bytes, "open": self.__connection is not None})
+            return stats
@@ -0,0 +1,56 @@
+import re
+
+# Known Service Atlas API routes. Placeholders match any single path segment.
+ENDPOINT_TEMPLATES = [
+    "/services",
+    "/services/search",
+    "/services/types",
+    "/services/{id}",
+    "/services/{id}/teams",
+    "/services/{id}/debt",
+    "/services/{id}/dependencies",
+    "/services/{id}/dependents",
+    "/services/{id}/dependency",
+    "/teams",
+    "/teams/{id}/services",
+    "/reports/services/debt",
+    "/reports/services/{id}/risk",
+    "/releases/{start}/{end}",
+]
+
+_ID_SEGMENT = re.compile(r"^([0-9a-fA-F-]{8,}|\d+|\d{4}-\d{2}-\d{2})$")
+
+
+def _split(path: str) -> list:
+    return [segment for segment in path.split("?")[0].split("/") if segment]
+
+
+def _compile():
+    compiled = []
+    for template in ENDPOINT_TEMPLATES:
+        segments = _split(template)
+        literals = sum(1 for segment in segments if not segment.startswith("{"))
+        compiled.append((template, segments, literals))
+    # Prefer the most specific template, so /services/search wins over /services/{id}
+    compiled.sort(key=lambda item: item[2], reverse=True)
+    return compiled
+
+
+_COMPILED = _compile()
+
+
+def endpoint_template(path: str) -> str:
+    """
+    Maps a concrete api path onto its route template, e.g. /services/abc/teams -> /services/{id}/teams.
+    Unknown paths have id-like segments replaced so they still group together.
+    :param path: the url fragment, with or without a leading slash
+    :return: the endpoint template
+    """
+    segments = _split(path)
+    for template, template_segments, _ in _COMPILED:
+        if len(template_segments) != len(segments):
+            continue
+        if all(t.startswith("{") or t == s for t, s in zip(template_segments, segments)):
+            return template
+    return "/" + "/".join("{id}" if _ID_SEGMENT.match(segment) else segment for segment in segments)
+
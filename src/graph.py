@@ -0,0 +1,218 @@
+import asyncio
+import contextvars
+import time
+
+from config import env_bool, env_float, env_int
+from pagination import fetch_all_pages
+from throttling import BACKGROUND, request_priority
+
+# Edge attributes copied from dependency objects onto the reverse (dependent) edges
+EDGE_ATTRIBUTES = ("version", "interaction_type")
+
+
+class DependencyGraph:
+    """
+    Adjacency index of the service dependency graph. Forward edges point from a service
+    to the services it depends on, reverse edges from a service to the services that depend on it.
+    The lists returned by the query methods are shared and must be treated as read-only.
+    """
+
+    def __init__(self, services: list, dependencies: dict):
+        """
+        :param services: list of service objects
+        :param dependencies: map of service id to the list of dependency objects returned by the api
+        """
+        self.built_at = time.monotonic()
+        self.__services = {service["id"]: service for service in services if service.get("id")}
+        self.__forward = {service_id: list(deps) for service_id, deps in dependencies.items()}
+        self.__reverse = {}
+        for service_id, deps in self.__forward.items():
+            for dependency in deps:
+                self.__add_reverse(service_id, dependency)
+
+    def __add_reverse(self, service_id: str, dependency: dict):
+        dependent = dict(self.__services.get(service_id, {"id": service_id}))
+        for attribute in EDGE_ATTRIBUTES:
+            if attribute in dependency:
+                dependent[attribute] = dependency[attribute]
+        self.__reverse.setdefault(dependency.get("id"), []).append(dependent)
+
+    def age(self) -> float:
+        """
+        :return: seconds since the graph was built
+        """
+        return time.monotonic() - self.built_at
+
+    def has_service(self, service_id: str) -> bool:
+        return service_id in self.__services or service_id in self.__forward
+
+    def dependencies(self, service_id: str) -> list | None:
+        """
+        :param service_id: the guid for the service
+        :return: dependency objects of the service, or None when the service is not in the graph
+        """
+        if not self.has_service(service_id):
+            return None
+        return self.__forward.get(service_id, [])
+
+    def dependents(self, service_id: str) -> list | None:
+        """
+        :param service_id: the guid for the service
+        :return: services that depend on the service, or None when the service is not in the graph
+        """
+        if not self.has_service(service_id):
+            return None
+        return self.__reverse.get(service_id, [])
+
+    def add_dependency(self, service_id: str, dependency_id: str, version: str = None, interaction_type: str = None) -> bool:
+        """
+        Records a dependency created after the graph was built
+        :return: True if the edge was recorded, False if either service is unknown to the graph
+        """
+        if service_id not in self.__services or dependency_id not in self.__services:
+            return False
+        dependency = dict(self.__services[dependency_id])
+        if version:
+            dependency["version"] = version
+        if interaction_type:
+            dependency["interaction_type"] = interaction_type
+        # Copy on write so lists already handed out to callers never change underneath them
+        self.__forward[service_id] = self.__forward.get(service_id, []) + [dependency]
+        self.__reverse[dependency_id] = list(self.__reverse.get(dependency_id, []))
+        self.__add_reverse(service_id, dependency)
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "services": len(self.__services),
+            "edges": sum(len(deps) for deps in self.__forward.values()),
+            "age_seconds": round(self.age(), 3),
+        }
+
+
+async def build_graph(fetch, concurrency: int = 10) -> DependencyGraph:
+    """
+    Builds a dependency graph from the api by listing every service and fetching each service's dependencies
+    :param fetch: async callable taking (url, params) and returning the parsed response
+    :param concurrency: max concurrent dependency requests
+    :return: the dependency graph
+    :raises RuntimeError: when the service listing was cut short, as the graph would then miss the dependents of
+        the services left out
+    """
+    page_size = env_int("API_SERVICES_PAGE_SIZE", 25)
+    listing = await fetch_all_pages(lambda page: fetch('/services', {"page": page, "pageSize": page_size}))
+    if listing["truncated"]:
+        raise RuntimeError(
+            f"The service listing stopped after {listing['pages']} pages, before its end; raise API_MAX_PAGES "
+            "to build the dependency graph"
+        )
+    services = [service for service in listing["items"] if service.get("id")]
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch_dependencies(service_id: str):
+        async with semaphore:
+            return service_id, await fetch(f'/services/{service_id}/dependencies', None) or []
+
+    results = await asyncio.gather(*(fetch_dependencies(service["id"]) for service in services))
+    return DependencyGraph(services, dict(results))
+
+
+class GraphSnapshot:
+    """
+    Holds the current dependency graph and rebuilds it in the background once it is older than the refresh
+    interval (GRAPH_REFRESH_INTERVAL seconds, default 300). Disabled with GRAPH_SNAPSHOT_ENABLED=false.
+    """
+
+    def __init__(self, fetch):
+        """
+        :param fetch: async callable taking (url, params) used to build the graph
+        """
+        self.__fetch = fetch
+        self.__graph = None
+        self.__refresh_task = None
+        self.__refreshes = 0
+        self.__failures = 0
+        # Dependencies created while a rebuild is in flight, replayed onto the rebuilt graph
+        self.__recorded = None
+        # Bumped by invalidate, so a rebuild that started before a write does not install outdated services
+        self.__generation = 0
+
+    @staticmethod
+    def enabled() -> bool:
+        return env_bool("GRAPH_SNAPSHOT_ENABLED", True)
+
+    @staticmethod
+    def refresh_interval() -> float:
+        return env_float("GRAPH_REFRESH_INTERVAL", 300.0)
+
+    def current(self) -> DependencyGraph | None:
+        """
+        Returns the graph if it is fresh. When it is missing or stale a background rebuild is started and None
+        is returned, so the caller falls back to a live read.
+        :return: a fresh dependency graph or None
+        """
+        if not self.enabled():
+            return None
+        graph = self.__graph
+        if graph is not None and graph.age() <= self.refresh_interval():
+            return graph
+        if self.__refresh_task is None or self.__refresh_task.done():
+            # Run in a fresh context so the rebuild's requests are not attributed to the triggering tool call
+            self.__refresh_task = asyncio.get_running_loop().create_task(
+                self.__background_refresh(), context=contextvars.Context()
+            )
+        return None
+
+    async def refresh(self) -> DependencyGraph:
+        """
+        Rebuilds the graph from the api
+        :return: the new graph
+        """
+        generation = self.__generation
+        self.__recorded = []
+        try:
+            graph = await build_graph(self.__fetch, concurrency=env_int("GRAPH_BUILD_CONCURRENCY", 10))
+            for edge in self.__recorded:
+                graph.add_dependency(*edge)
+        finally:
+            self.__recorded = None
+        if generation == self.__generation:
+            self.__graph = graph
+        self.__refreshes += 1
+        return graph
+
+    async def __background_refresh(self):
+        try:
+            with request_priority(BACKGROUND):
+                await self.refresh()
+        except Exception:
+            # A failed rebuild leaves the previous graph in place; the next query retries
+            self.__failures += 1
+
+    def record_dependency(self, service_id: str, dependency_id: str, version: str = None, interaction_type: str = None):
+        """
+        Applies a newly created dependency to the current graph, dropping the graph if it cannot be applied
+        """
+        if self.__recorded is not None:
+            self.__recorded.append((service_id, dependency_id, version, interaction_type))
+        graph = self.__graph
+        if graph is not None and not graph.add_dependency(service_id, dependency_id, version, interaction_type):
+            self.__graph = None
+
+    def invalidate(self):
+        """
+        Drops the graph after a service was updated, as dependency results carry the service's name, tier and
+        type. Queries read live until it is rebuilt.
+        """
+        self.__generation += 1
+        self.__graph = None
+
+    def stats(self) -> dict:
+        graph = self.__graph
+        return {
+            "enabled": self.enabled(),
+            "refresh_interval": self.refresh_interval(),
+            "refreshes": self.__refreshes,
+            "failures": self.__failures,
+            "graph": graph.stats() if graph is not None else None,
+        }
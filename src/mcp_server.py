@@ -1,16 +1,60 @@
+import argparse
 import asyncio
 import os
 import sys
+from contextlib import asynccontextmanager
+from importlib import import_module
 
 from fastmcp import FastMCP
 
-from debt import debt_mcp
-from services import service_mcp
-from teams import teams_mcp
-from releases import release_mcp
-from dependency import dependency_mcp
+import deadlines
+import metrics
+import tracing
+from config import env_bool, env_float, env_int
+from startup import LazyServerProvider, format_import_report, import_report
 
-mcp = FastMCP("Service Atlas MCP")
+TRANSPORTS = ("stdio", "http")
+
+# Sub-servers in mount order, as (module, attribute). The modules are only imported by setup(), or on first use
+# when mounted lazily, so importing this module stays cheap.
+SUB_SERVERS = [
+    ("debt", "debt_mcp"),
+    ("teams", "teams_mcp"),
+    ("services", "service_mcp"),
+    ("releases", "release_mcp"),
+    ("dependency", "dependency_mcp"),
+]
+_LAZY_ATTRIBUTES = {attribute: module for module, attribute in SUB_SERVERS}
+_LAZY_ATTRIBUTES["graph_snapshot"] = "dependency"
+
+
+def __getattr__(name: str):
+    module = _LAZY_ATTRIBUTES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(import_module(module), name)
+
+
+@asynccontextmanager
+async def lifespan(server):
+    """
+    Closes the pooled api connections once the server stops, after in-flight calls have drained
+    """
+    try:
+        yield {}
+    finally:
+        # Nothing to close if no sub-server was ever loaded
+        api_calls = sys.modules.get("api_calls")
+        if api_calls is not None:
+            await api_calls.close_api_caller()
+
+
+mcp = FastMCP(
+    "Service Atlas MCP", lifespan=lifespan,
+    middleware=[
+        metrics.ToolMetricsMiddleware(), tracing.ToolTracingMiddleware(), deadlines.ToolDeadlineMiddleware(),
+    ],
+)
 
 
 def log(message: str):
@@ -20,11 +64,16 @@ def log(message: str):
 
 
 def setup():
-    mcp.mount(debt_mcp)
-    mcp.mount(teams_mcp)
-    mcp.mount(service_mcp)
-    mcp.mount(release_mcp)
-    mcp.mount(dependency_mcp)
+    """
+    Mounts the sub-servers. With MCP_LAZY_STARTUP=true each sub-server's module is only imported when a
+    request first needs it, instead of while the server starts.
+    """
+    lazy = env_bool("MCP_LAZY_STARTUP", False)
+    for module, attribute in SUB_SERVERS:
+        if lazy:
+            mcp.add_provider(LazyServerProvider(module, attribute))
+        else:
+            mcp.mount(getattr(import_module(module), attribute))
 
 
 @mcp.tool("get_version")
@@ -43,6 +92,61 @@ def get_website():
     return {"url": url}
 
 
+@mcp.tool(annotations={"readOnlyHint": True, "title": "Get Server Stats"})
+def get_server_stats():
+    """
+    Reports how the MCP server is performing: per endpoint latency, status and payload size metrics for
+    Service Atlas API requests, per tool latency and outcome metrics, and the cache, connection pool,
+    request coalescing, circuit breaker, adaptive timeout, rate limiter, dependency graph snapshot and name search
+    index statistics.
+    :return: dictionary of server statistics
+    """
+    import api_calls
+    from dependency import graph_snapshot
+    from search import search_snapshot
+
+    caller = api_calls.api_caller
+    return {
+        "metrics": metrics.registry.snapshot(),
+        "cache": caller.cache_stats(),
+        "pool": caller.pool_stats(),
+        "coalescing": caller.coalescing_stats(),
+        "resilience": caller.resilience_stats(),
+        "timeouts": caller.timeout_stats(),
+        "throttle": caller.throttle_stats(),
+        "graph": graph_snapshot.stats(),
+        "search": search_snapshot.stats(),
+    }
+
+
+@mcp.tool(annotations={"readOnlyHint": True, "title": "Get Recent Traces"})
+def get_traces(limit: int = 20, tool: str = None, min_duration_ms: float = None):
+    """
+    Returns recent tool call traces, newest first, to find out where the time of a slow call went.
+    Each trace has the tool call's duration and its child spans: one per Service Atlas API request
+    (endpoint template, status, bytes, duration) and one per response decode. Time not covered by
+    child spans was spent in the server itself. Tracing is enabled with the TRACING env variable.
+    :param limit: max traces to return, default 20
+    :param tool: only return traces of this tool
+    :param min_duration_ms: only return traces that took at least this many milliseconds
+    :return: dictionary with whether tracing is enabled and the list of traces
+    """
+    tracer = tracing.tracer
+    return {
+        "enabled": tracer.enabled,
+        "traces": tracer.recent(limit=limit, name=tool, min_duration_ms=min_duration_ms),
+    }
+
+
+async def metrics_endpoint(request):
+    """
+    Serves the metrics in the Prometheus text format
+    """
+    from starlette.responses import PlainTextResponse
+
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
+
 @mcp.prompt("analyze_service_risk_and_impact")
 def analyze_service_risk_and_impact() -> str:
     """
@@ -56,6 +160,9 @@ service relationships, assess risk, and facilitate incident and gameday scenario
 ## Your tools
 - get_services — get a paginated list of all services
 - find_service_by_name — look up a service by name to get its ID and metadata
+- get_blast_radius — walk every service that transitively depends on a given 
+  service in one call, returning the depth of each affected service, its owning 
+  teams, and flagging cross-team edges
 - get_service_dependents — find services that depend on a given service (inbound 
   edges — who would be affected if this service failed)
 - get_service_dependencies — find services that a given service depends on 
@@ -63,7 +170,10 @@ service relationships, assess risk, and facilitate incident and gameday scenario
 - get_service_risk — retrieve the change risk report for a service, including a 
   risk level (low / medium / high), a numeric score, dependent count, and open 
   debt counts by category
+- get_service_risks — retrieve risk reports for many services at once, ranked 
+  by change risk score
 - get_teams_by_service — find which team owns a service
+- get_teams_for_services — find the owning teams of many services at once
 - get_debts_for_service — find open technical debts logged against a service
 
 ## How to traverse the graph
@@ -71,9 +181,14 @@ When asked about blast radius, failure impact, or scenario reasoning:
 1. Use find_service_by_name to resolve the service ID
 2. Call get_service_risk on the origin service before traversing — this sets the 
    stakes for the scenario
-3. Recursively call get_service_dependents to walk the dependency graph outward, 
-   tracking depth at each level
-4. For each affected service, call get_teams_by_service to identify owners
+3. Call get_blast_radius to walk the dependency graph outward. It returns every 
+   affected service with its depth and owning teams, so there is no need to call 
+   get_service_dependents or get_teams_by_service per service. If the result is 
+   truncated, say so and offer to go deeper from specific services: when it is 
+   depth_limited, the services with unexplored_dependents are where the walk 
+   stopped, so call get_blast_radius again from those
+4. Only fall back to recursively calling get_service_dependents and 
+   get_teams_by_service if get_blast_radius reports errors for a service
 5. Narrate findings as escalation stages (depth 1, depth 2, etc.) and flag 
    cross-team boundaries as escalation points
 6. Conclude with open questions for the room — surface unknowns, single points 
@@ -123,12 +238,102 @@ commentary when relevant; prioritise code debt as the most operationally signifi
 """
 
 
-def main():
+# Metrics live in each worker's memory, so with several workers a scrape would read whichever worker answered
+METRICS_WORKERS_ERROR = "MCP_METRICS_PATH requires a single worker, as each worker process keeps its own metrics"
+
+
+def parse_args(argv: list = None) -> argparse.Namespace:
+    """
+    Parses the server options. Every option defaults to its environment variable, so the server can be
+    configured either way.
+    :param argv: command line arguments, without the program name, defaults to sys.argv[1:]
+    :return: the parsed options
+    """
+    parser = argparse.ArgumentParser(description="Service Atlas MCP server")
+    parser.add_argument("--transport", choices=TRANSPORTS, default=os.getenv("MCP_TRANSPORT", "stdio").lower(),
+                        help="stdio (default) serves one client, http serves many clients over streamable HTTP")
+    parser.add_argument("--host", default=os.getenv("MCP_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=env_int("MCP_PORT", 8000))
+    parser.add_argument("--path", default=os.getenv("MCP_HTTP_PATH", "/mcp"))
+    parser.add_argument("--workers", type=int, default=env_int("MCP_WORKERS", 1),
+                        help="number of http worker processes")
+    parser.add_argument("--shutdown-timeout", type=float, default=env_float("MCP_SHUTDOWN_TIMEOUT", 30.0),
+                        help="seconds to wait for in-flight http requests to finish on shutdown")
+    parser.add_argument("--lazy", action="store_true", default=env_bool("MCP_LAZY_STARTUP", False),
+                        help="import each sub-server on first use instead of at startup")
+    parser.add_argument("--import-report", action="store_true",
+                        help="print how long startup imports take, then exit without serving")
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.workers > 1 and os.getenv("MCP_METRICS_PATH"):
+        parser.error(METRICS_WORKERS_ERROR)
+    return args
+
+
+def create_http_app():
+    """
+    Builds the streamable HTTP app for one worker, configured from the MCP_* environment variables.
+    Sessions are stateless when several workers serve the same port, since a client's requests can land on any
+    worker process.
+    :return: the ASGI app
+    :raises RuntimeError: when MCP_METRICS_PATH is set with more than one worker
+    """
+    setup()
+    metrics_path = os.getenv("MCP_METRICS_PATH")
+    if metrics_path and env_int("MCP_WORKERS", 1) > 1:
+        raise RuntimeError(METRICS_WORKERS_ERROR)
+    if metrics_path:
+        mcp.custom_route(metrics_path, methods=["GET"])(metrics_endpoint)
+    stateless = env_int("MCP_WORKERS", 1) > 1 or env_bool("MCP_STATELESS_HTTP", False)
+    return mcp.http_app(path=os.getenv("MCP_HTTP_PATH", "/mcp"), transport="http", stateless_http=stateless)
+
+
+def run_http(args: argparse.Namespace):
+    """
+    Serves the MCP server over streamable HTTP with uvicorn. On SIGINT/SIGTERM uvicorn stops accepting
+    connections and waits up to the shutdown timeout for in-flight calls before the pools are closed.
+    :param args: options from parse_args
+    """
+    import uvicorn
+
+    # Worker processes build their app from the environment, so the resolved options are exported to them
+    os.environ.update({
+        "MCP_HOST": args.host,
+        "MCP_PORT": str(args.port),
+        "MCP_HTTP_PATH": args.path,
+        "MCP_WORKERS": str(args.workers),
+    })
+    options = {
+        "host": args.host,
+        "port": args.port,
+        "workers": args.workers,
+        "lifespan": "on",
+        "timeout_graceful_shutdown": args.shutdown_timeout,
+    }
+    log(f"Serving Service Atlas MCP on http://{args.host}:{args.port}{args.path} with {args.workers} worker(s)")
+    if args.workers > 1:
+        uvicorn.run("mcp_server:create_http_app", factory=True, **options)
+    else:
+        uvicorn.run(create_http_app(), **options)
+
+
+def main(argv: list = None):
     """
     Main entry point for mcp service
+    :param argv: command line arguments, without the program name, defaults to sys.argv[1:]
     :return:
     """
     try:
+        args = parse_args(argv)
+        if args.lazy:
+            os.environ["MCP_LAZY_STARTUP"] = "true"
+        if args.import_report:
+            print(format_import_report(import_report()))
+            return
+        if args.transport == "http":
+            run_http(args)
+            return
         setup()
         # Run the FastMCP server with STDIO transport
         mcp.run()
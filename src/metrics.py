@@ -0,0 +1,253 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import asynccontextmanager, contextmanager
+
+from fastmcp.server.middleware import Middleware
+
+from config import env_bool
+from endpoints import endpoint_template
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# Name -> (type, help, histogram buckets)
+METRICS = {
+    "atlas_upstream_requests_total": ("counter", "Service Atlas API requests by endpoint template and status", None),
+    "atlas_upstream_request_duration_seconds": ("histogram", "Service Atlas API request latency", LATENCY_BUCKETS),
+    "atlas_upstream_response_bytes": ("histogram", "Service Atlas API response body size", SIZE_BUCKETS),
+    "atlas_upstream_in_flight": ("gauge", "Service Atlas API requests currently in flight", None),
+    "atlas_upstream_queue_seconds": ("histogram", "Time Service Atlas API requests waited for the rate limiter and concurrency limit", LATENCY_BUCKETS),
+    "atlas_upstream_queue_depth": ("gauge", "Service Atlas API requests waiting for a free slot, by priority class", None),
+    "atlas_upstream_retries_total": ("counter", "Service Atlas API GETs retried, by endpoint template and reason", None),
+    "atlas_upstream_circuit_open": ("gauge", "1 while the circuit breaker of an endpoint template is open", None),
+    "atlas_upstream_circuit_rejections_total": ("counter", "Service Atlas API requests failed fast by an open circuit", None),
+    "atlas_tool_calls_total": ("counter", "MCP tool calls by tool and outcome", None),
+    "atlas_tool_duration_seconds": ("histogram", "MCP tool call latency", LATENCY_BUCKETS),
+    "atlas_tool_in_flight": ("gauge", "MCP tool calls currently in flight", None),
+}
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "count", "sum", "max")
+
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        # One count per bucket plus the +Inf bucket, not cumulative
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimates a quantile as the upper bound of the bucket it falls in
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "mean": round(self.sum / self.count, 6) if self.count else 0.0,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "max": round(self.max, 6),
+        }
+
+
+class MetricsRegistry:
+    """
+    Thread-safe in-process registry of the counters, gauges and histograms listed in METRICS, labelled by
+    endpoint template or tool name. Disabled with METRICS_ENABLED=false, which turns recording into a no-op.
+    """
+
+    def __init__(self, enabled: bool = None):
+        self.enabled = env_bool("METRICS_ENABLED", True) if enabled is None else enabled
+        self.__lock = threading.Lock()
+        self.__series = {name: {} for name in METRICS}
+
+    @staticmethod
+    def __key(labels: dict) -> tuple:
+        return tuple(sorted(labels.items()))
+
+    def inc(self, name: str, labels: dict, amount: float = 1):
+        """
+        Increments a counter or moves a gauge
+        :param name: a counter or gauge from METRICS
+        :param labels: the series labels
+        :param amount: the increment, negative to decrease a gauge
+        """
+        if not self.enabled:
+            return
+        key = self.__key(labels)
+        with self.__lock:
+            series = self.__series[name]
+            series[key] = series.get(key, 0) + amount
+
+    def observe(self, name: str, labels: dict, value: float):
+        """
+        Records a histogram observation
+        :param name: a histogram from METRICS
+        :param labels: the series labels
+        :param value: the observed value
+        """
+        if not self.enabled:
+            return
+        key = self.__key(labels)
+        with self.__lock:
+            series = self.__series[name]
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = _Histogram(METRICS[name][2])
+            histogram.observe(value)
+
+    def reset(self):
+        with self.__lock:
+            self.__series = {name: {} for name in METRICS}
+
+    def snapshot(self) -> dict:
+        """
+        Returns every recorded series
+        :return: dictionary of metric name to a list of series, each with its labels and value, histograms are
+            summarized with count, sum, mean, estimated p50/p95/p99 and max
+        """
+        with self.__lock:
+            snapshot = {}
+            for name, series in self.__series.items():
+                if not series:
+                    continue
+                snapshot[name] = [
+                    {"labels": dict(key), **(value.summary() if isinstance(value, _Histogram) else {"value": value})}
+                    for key, value in sorted(series.items())
+                ]
+            return snapshot
+
+    def render(self) -> str:
+        """
+        Renders every series in the Prometheus text exposition format
+        :return: the metrics text
+        """
+        lines = []
+        with self.__lock:
+            for name, series in self.__series.items():
+                kind, help_text, _ = METRICS[name]
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for key, value in sorted(series.items()):
+                    if not isinstance(value, _Histogram):
+                        lines.append(f"{name}{_labels(key)} {_number(value)}")
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(value.buckets + ("+Inf",), value.counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_labels(key + (('le', _number(bound)),))} {cumulative}")
+                    lines.append(f"{name}_sum{_labels(key)} {_number(value.sum)}")
+                    lines.append(f"{name}_count{_labels(key)} {value.count}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(key: tuple) -> str:
+    if not key:
+        return ""
+    escaped = (
+        (name, str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')) for name, value in key
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def _number(value) -> str:
+    if isinstance(value, str):
+        return value
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+registry = MetricsRegistry()
+
+
+class UpstreamObservation:
+    __slots__ = ("status", "size")
+
+    def __init__(self):
+        self.status = "error"
+        self.size = 0
+
+    def record(self, response):
+        """
+        Records the status and body size of a response
+        :param response: a requests or httpx response
+        """
+        self.status = str(response.status_code)
+        self.size = len(response.content)
+
+
+@contextmanager
+def observe_upstream(method: str, path: str):
+    """
+    Measures one api request. The caller records the response on the yielded observation, requests that raise
+    before a response is recorded are counted with status 'error'.
+    :param method: the http method
+    :param path: the url fragment, reported by its endpoint template
+    """
+    if not registry.enabled:
+        yield UpstreamObservation()
+        return
+    labels = {"method": method, "endpoint": endpoint_template(path)}
+    observation = UpstreamObservation()
+    registry.inc("atlas_upstream_in_flight", labels)
+    started = time.perf_counter()
+    try:
+        yield observation
+    finally:
+        registry.observe("atlas_upstream_request_duration_seconds", labels, time.perf_counter() - started)
+        registry.inc("atlas_upstream_in_flight", labels, -1)
+        registry.inc("atlas_upstream_requests_total", {**labels, "status": observation.status})
+        if observation.status != "error":
+            registry.observe("atlas_upstream_response_bytes", labels, observation.size)
+
+
+@asynccontextmanager
+async def observe_tool(tool: str):
+    """
+    Measures one tool call, counting it as an error if the body raises
+    :param tool: the tool name
+    """
+    if not registry.enabled:
+        yield
+        return
+    labels = {"tool": tool}
+    outcome = "error"
+    registry.inc("atlas_tool_in_flight", labels)
+    started = time.perf_counter()
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        registry.observe("atlas_tool_duration_seconds", labels, time.perf_counter() - started)
+        registry.inc("atlas_tool_in_flight", labels, -1)
+        registry.inc("atlas_tool_calls_total", {**labels, "outcome": outcome})
+
+
+class ToolMetricsMiddleware(Middleware):
+    """
+    Records latency, outcome and in-flight metrics for every tool call, including tools of mounted servers
+    """
+
+    async def on_call_tool(self, context, call_next):
+        async with observe_tool(context.message.name):
+            return await call_next(context)
@@ -0,0 +1,59 @@
+import asyncio
+
+from config import env_int
+from deadlines import DeadlineExceeded
+
+
+def page_window() -> int:
+    """
+    Number of pages requested concurrently per window, from API_PAGE_WINDOW (default 4)
+    """
+    return max(env_int("API_PAGE_WINDOW", 4), 1)
+
+
+def max_pages() -> int:
+    """
+    Safety limit on the number of pages walked by a single fetch, from API_MAX_PAGES (default 500)
+    """
+    return max(env_int("API_MAX_PAGES", 500), 1)
+
+
+async def fetch_all_pages(fetch_page, window: int = None, limit: int = None, on_page=None) -> dict:
+    """
+    Fetches every page of a paginated endpoint. Pages are requested speculatively in concurrent windows
+    (pages 1..N, then N+1..2N, ...) until an empty page is seen or the page limit is reached.
+    :param fetch_page: async callable taking a 1-based page number and returning that page's list of items
+    :param window: pages to request concurrently, defaults to API_PAGE_WINDOW
+    :param limit: max pages to fetch, defaults to API_MAX_PAGES
+    :param on_page: optional async callable taking (page, items), called for each non-empty page as soon as it
+        arrives. It returns the items to keep for that page, so it can transform pages while others are in flight
+    :return: dictionary with the items in page order, the number of non-empty pages and a truncated flag
+        which is set when the page limit was reached before an empty page was seen, or when the tool call's
+        deadline passed first, in which case the pages fetched before the first late page are returned
+    """
+    window = window or page_window()
+    limit = limit or max_pages()
+
+    async def fetch(page: int):
+        result = await fetch_page(page)
+        if result and on_page is not None:
+            result = await on_page(page, result)
+        return result
+
+    items = []
+    pages = 0
+    next_page = 1
+    while next_page <= limit:
+        batch = range(next_page, min(next_page + window, limit + 1))
+        results = await asyncio.gather(*(fetch(page) for page in batch), return_exceptions=True)
+        for result in results:
+            if isinstance(result, DeadlineExceeded):
+                return {"items": items, "pages": pages, "truncated": True}
+            if isinstance(result, BaseException):
+                raise result
+            if not result:
+                return {"items": items, "pages": pages, "truncated": False}
+            items.extend(result)
+            pages += 1
+        next_page = batch.stop
+    return {"items": items, "pages": pages, "truncated": True}
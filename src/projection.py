@@ -0,0 +1,35 @@
+# Default field profile of service list results, enough to identify a service and judge its importance
+COMPACT_FIELDS = ["id", "name", "tier", "type"]
+
+# Field selection that disables projection and returns full objects
+ALL_FIELDS = "*"
+
+
+def parse_fields(fields, default: list = None) -> list | None:
+    """
+    Normalizes a field selection given as a list or a comma separated string
+    :param fields: list of field names, a comma separated string, "*" for every field, or None
+    :param default: fields to use when no selection is given, e.g. COMPACT_FIELDS
+    :return: list of field names, or None when full objects should be returned
+    """
+    if isinstance(fields, str):
+        fields = fields.split(",")
+    fields = [field.strip() for field in fields or [] if field and field.strip()]
+    if ALL_FIELDS in fields:
+        return None
+    if not fields:
+        return list(default) if default else None
+    return fields
+
+
+def project(items: list, fields: list | None) -> list:
+    """
+    Projects a list of objects down to the requested keys. Keys missing from an object are skipped.
+    :param items: list of objects from the api
+    :param fields: keys to keep, or None to keep everything
+    :return: list of projected objects, or items unchanged when it is not a list of objects
+    """
+    if not fields or not isinstance(items, list):
+        return items
+    return [{field: item[field] for field in fields if field in item} if isinstance(item, dict) else item
+            for item in items]
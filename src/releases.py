@@ -1,9 +1,19 @@
+import asyncio
+from datetime import date, timedelta
+
 from fastmcp import FastMCP
 
-from api_calls import api_caller
+from api_calls import api_caller, call_api, sync_compatible
+from batching import batch_concurrency
+from config import env_bool, env_float, env_int
+from tabular import tabulate
 
 release_mcp = FastMCP("Releases MCP")
 
+# A bucket is closed, its releases final, once this long has passed since its end. The margin allows for time zone
+# differences with the api and releases recorded late.
+CLOSED_AFTER = timedelta(days=1)
+
 
 @release_mcp.prompt('get_releases')
 def prompt_get_releases(start: str, end: str) -> str:
@@ -17,26 +27,99 @@ def prompt_get_releases(start: str, end: str) -> str:
         To get a list of all releases between two dates, use the tool `get_releases` or the resource `serviceatlas://releases/{start}/{end}`.
         If you wish to search for releases today, the end date will need to have a value of tomorrow. The return object will be 
         an array of release objects, with a service name, service id, version, and release date.
+        For long date ranges, set `tabular` to true on the tool to get a `columns` header and `rows` of values instead of one object per release.
     """
 
 
 @release_mcp.resource(uri='serviceatlas://releases/{start}/{end}', name='Get Releases in Date Range', mime_type='application/json')
-def get_releases_resource(start: str, end: str) -> list:
+@sync_compatible
+async def get_releases_resource(start: str, end: str) -> list:
     """
     Get a list of releases between two dates. Start date is inclusive, while the end date is an exclusive
     :param start: start date in the format YYYY-MM-DD (inclusive)
     :param end: end date in the format YYYY-MM-DD (exclusive)
     :return: list of releases
     """
-    return api_caller.call_get(f'/releases/{start}/{end}')
+    return await _fetch_releases(start, end)
 
 
 @release_mcp.tool(annotations={'readOnlyHint': True, 'title': 'Get Releases in Date Range'})
-def get_releases(start: str, end: str) -> list:
+@sync_compatible
+async def get_releases(start: str, end: str, tabular: bool = False) -> list | dict:
     """
     Get a list of releases between two dates. Start date is inclusive, while the end date is an exclusive
     :param start: start date in the format YYYY-MM-DD (inclusive)
     :param end: end date in the format YYYY-MM-DD (exclusive)
-    :return: list of releases
+    :param tabular: set to true to return the releases as a `columns` header and `rows` of values instead of objects
+    :return: list of releases, or a table of releases when tabular is set
+    """
+    return tabulate(await _fetch_releases(start, end), tabular)
+
+
+def release_buckets(start: date, end: date, history_before: date | None = None) -> list:
+    """
+    Splits a date window into the buckets its releases are fetched in: whole weeks from Monday to Monday, and
+    single days before the first and after the last whole week. Buckets are aligned to the calendar rather than
+    to the window, so overlapping windows share them. History ending on or before history_before is grouped into
+    whole calendar years and months instead, keeping long windows to a few dozen buckets.
+    :param start: first day of the window
+    :param end: day after the last day of the window
+    :param history_before: date up to which whole years and months are used, none to only use weeks and days
+    :return: list of (start, end) dates, end exclusive, in date order
+    """
+    buckets = []
+    day = start
+    while day < end:
+        candidates = []
+        week_limit = end
+        if history_before is not None:
+            history_end = min(end, history_before)
+            next_month = date(day.year + day.month // 12, day.month % 12 + 1, 1)
+            if day.day == 1:
+                if day.month == 1:
+                    candidates.append((date(day.year + 1, 1, 1), history_end))
+                candidates.append((next_month, history_end))
+            # Weeks stop at the next month that can be fetched whole
+            if next_month <= history_end:
+                week_limit = next_month
+        if day.weekday() == 0:
+            candidates.append((day + timedelta(days=7), week_limit))
+        bucket_end = next((until for until, limit in candidates if until <= limit), day + timedelta(days=1))
+        buckets.append((day, bucket_end))
+        day = bucket_end
+    return buckets
+
+
+async def _fetch_releases(start: str, end: str) -> list:
+    """
+    Fetches the releases of a window bucket by bucket, concurrently. Closed buckets are cached for
+    RELEASE_HISTORY_TTL seconds (default 30 days), as past releases do not change, while buckets reaching today
+    use the endpoint's usual ttl. Windows that are not a valid date range, that split into more than
+    RELEASE_MAX_BUCKETS buckets (default 64), or RELEASE_CHUNKING=false or API_CACHE_ENABLED=false, are fetched
+    in one request.
+    :param start: start date in the format YYYY-MM-DD (inclusive)
+    :param end: end date in the format YYYY-MM-DD (exclusive)
+    :return: list of releases in date order
     """
-    return api_caller.call_get(f'/releases/{start}/{end}')
+    try:
+        start_date, end_date = date.fromisoformat(start), date.fromisoformat(end)
+    except ValueError:
+        start_date = end_date = None
+    chunking = env_bool("RELEASE_CHUNKING", True) and env_bool("API_CACHE_ENABLED", True)
+    if not chunking or start_date is None or start_date >= end_date:
+        return await call_api(api_caller.call_get, f'/releases/{start}/{end}')
+
+    closed_before = date.today() - CLOSED_AFTER
+    buckets = release_buckets(start_date, end_date, history_before=closed_before)
+    if len(buckets) > env_int("RELEASE_MAX_BUCKETS", 64):
+        return await call_api(api_caller.call_get, f'/releases/{start}/{end}')
+    history_ttl = env_float("RELEASE_HISTORY_TTL", 30 * 24 * 60 * 60)
+    semaphore = asyncio.Semaphore(batch_concurrency())
+
+    async def fetch(bucket_start: date, bucket_end: date):
+        kwargs = {"ttl": history_ttl} if bucket_end <= closed_before else {}
+        async with semaphore:
+            return await call_api(api_caller.call_get, f'/releases/{bucket_start}/{bucket_end}', **kwargs)
+
+    results = await asyncio.gather(*(fetch(*bucket) for bucket in buckets))
+    return [release for result in results for release in result or []]
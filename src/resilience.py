@@ -0,0 +1,184 @@
+import random
+import threading
+import time
+
+import httpx
+import requests
+
+from config import env_bool, env_float, env_int
+from endpoints import endpoint_template
+from metrics import registry
+
+# Responses worth another attempt: rate limited, or a gateway/upstream that is briefly unavailable
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+
+# Errors raised before a response was received, e.g. refused connections and timeouts
+TRANSPORT_ERRORS = (requests.ConnectionError, requests.Timeout, httpx.TransportError)
+TIMEOUT_ERRORS = (requests.Timeout, httpx.TimeoutException)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of calling an endpoint whose circuit is open
+    """
+
+    def __init__(self, endpoint: str, retry_after: float):
+        super().__init__(
+            f"The Service Atlas API is failing for {endpoint}, requests to it are paused for {retry_after:.0f}s"
+        )
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+
+
+def _retry_after(response) -> float | None:
+    """
+    Reads a Retry-After header given in seconds
+    """
+    value = response.headers.get("Retry-After") if response is not None else None
+    try:
+        return max(float(value), 0.0) if value else None
+    except ValueError:
+        # HTTP dates are rare from this api and not worth parsing; fall back to the backoff
+        return None
+
+
+def retry_delay(attempt: int, response=None, error: Exception = None) -> float | None:
+    """
+    Decides whether a GET is tried again. Retries are bounded by API_RETRIES (default 2) and spaced by
+    exponential backoff with full jitter, starting at API_RETRY_BASE_DELAY seconds (default 0.1) and capped at
+    API_RETRY_MAX_DELAY seconds (default 2). A Retry-After header is honoured when it is within the cap.
+    :param attempt: number of attempts already made, minus one
+    :param response: the response of the attempt, None if it raised
+    :param error: the transport error raised by the attempt
+    :return: seconds to wait before the next attempt, or None to not retry
+    """
+    if attempt >= max(env_int("API_RETRIES", 2), 0):
+        return None
+    if error is None and response.status_code not in RETRY_STATUSES:
+        return None
+    cap = env_float("API_RETRY_MAX_DELAY", 2.0)
+    retry_after = _retry_after(response)
+    if retry_after is not None:
+        return retry_after if retry_after <= cap else None
+    return random.uniform(0, min(cap, env_float("API_RETRY_BASE_DELAY", 0.1) * 2 ** attempt))
+
+
+def record_retry(method: str, path: str, response=None, error: Exception = None):
+    reason = type(error).__name__ if error is not None else str(response.status_code)
+    registry.inc("atlas_upstream_retries_total", {"method": method, "endpoint": endpoint_template(path), "reason": reason})
+
+
+class _Circuit:
+    __slots__ = ("state", "failures", "opened_at", "probe_started")
+
+    def __init__(self):
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_started = None
+
+
+class CircuitBreakers:
+    """
+    One circuit breaker per endpoint template. A circuit opens after API_CIRCUIT_FAILURE_THRESHOLD consecutive
+    failures (default 5), i.e. transport errors or 5xx responses, and requests to the endpoint then fail fast
+    with CircuitOpenError. After API_CIRCUIT_RESET_TIMEOUT seconds (default 30) one probe request is let through:
+    success closes the circuit, failure opens it again. Disabled with API_CIRCUIT_BREAKER_ENABLED=false.
+    """
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__circuits = {}
+        self.__opened = 0
+        self.__rejected = 0
+
+    @staticmethod
+    def enabled() -> bool:
+        return env_bool("API_CIRCUIT_BREAKER_ENABLED", True)
+
+    @staticmethod
+    def reset_timeout() -> float:
+        return env_float("API_CIRCUIT_RESET_TIMEOUT", 30.0)
+
+    def before_request(self, path: str):
+        """
+        Checks that a request may be sent
+        :param path: the url fragment, grouped by its endpoint template
+        :raises CircuitOpenError: when the endpoint's circuit is open
+        """
+        if not self.enabled():
+            return
+        endpoint = endpoint_template(path)
+        with self.__lock:
+            circuit = self.__circuits.get(endpoint)
+            if circuit is None or circuit.state == CLOSED:
+                return
+            now = time.monotonic()
+            reset_timeout = self.reset_timeout()
+            if circuit.state == OPEN and now - circuit.opened_at >= reset_timeout:
+                circuit.state = HALF_OPEN
+                circuit.probe_started = None
+            # A probe that never reported back, e.g. a cancelled call, must not keep the circuit half open forever
+            if circuit.state == HALF_OPEN and (
+                circuit.probe_started is None or now - circuit.probe_started >= reset_timeout
+            ):
+                circuit.probe_started = now
+                return
+            self.__rejected += 1
+            retry_after = max(reset_timeout - (now - circuit.opened_at), 0.0)
+        registry.inc("atlas_upstream_circuit_rejections_total", {"endpoint": endpoint})
+        raise CircuitOpenError(endpoint, retry_after)
+
+    def record(self, path: str, failed: bool):
+        """
+        Records the outcome of a request
+        :param path: the url fragment, grouped by its endpoint template
+        :param failed: whether the request failed with a transport error or a 5xx response
+        """
+        if not self.enabled():
+            return
+        endpoint = endpoint_template(path)
+        with self.__lock:
+            circuit = self.__circuits.get(endpoint)
+            if not failed:
+                if circuit is None or (circuit.state == CLOSED and not circuit.failures):
+                    return
+                was_open = circuit.state != CLOSED
+                circuit.state = CLOSED
+                circuit.failures = 0
+                circuit.probe_started = None
+            else:
+                if circuit is None:
+                    circuit = self.__circuits[endpoint] = _Circuit()
+                circuit.failures += 1
+                was_open = circuit.state != CLOSED
+                threshold = max(env_int("API_CIRCUIT_FAILURE_THRESHOLD", 5), 1)
+                if circuit.state == HALF_OPEN or (circuit.state == CLOSED and circuit.failures >= threshold):
+                    circuit.state = OPEN
+                    circuit.opened_at = time.monotonic()
+                    circuit.probe_started = None
+                    if not was_open:
+                        self.__opened += 1
+            is_open = circuit.state != CLOSED
+        if is_open != was_open:
+            registry.inc("atlas_upstream_circuit_open", {"endpoint": endpoint}, 1 if is_open else -1)
+
+    def stats(self) -> dict:
+        """
+        :return: dictionary with the number of times a circuit opened, the requests rejected by open circuits,
+            and the state of every endpoint that has failed
+        """
+        with self.__lock:
+            return {
+                "enabled": self.enabled(),
+                "opened": self.__opened,
+                "rejected": self.__rejected,
+                "circuits": {
+                    endpoint: {"state": circuit.state, "failures": circuit.failures}
+                    for endpoint, circuit in sorted(self.__circuits.items())
+                },
+            }
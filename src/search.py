@@ -0,0 +1,230 @@
+import asyncio
+import contextvars
+import re
+import time
+from collections import Counter
+from itertools import chain
+
+from api_calls import api_caller, call_api
+from config import env_bool, env_float, env_int
+from pagination import fetch_all_pages
+from throttling import BACKGROUND, request_priority
+
+# Matches below this score are not returned
+MIN_SCORE = 0.3
+
+_SEPARATORS = re.compile(r"[^0-9a-z]+")
+
+
+def normalize(name) -> str:
+    """
+    Lowercases a name and turns punctuation into single spaces, so 'Payments-API' and 'payments api' are equal
+    """
+    return " ".join(_SEPARATORS.sub(" ", str(name or "").lower()).split())
+
+
+def trigrams(text: str) -> set:
+    """
+    Splits normalized text into the trigrams of its words, each word padded with two spaces in front and one
+    behind, so short words and word starts still produce trigrams
+    """
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[index:index + 3] for index in range(len(padded) - 2))
+    return grams
+
+
+class NameIndex:
+    """
+    Trigram index of service and team names. A query is scored against every name sharing at least one trigram
+    with it, blending how much of the query is found in the name with the overall trigram similarity, so
+    misspelled and partial names still match. Exact and substring matches rank above fuzzy ones.
+    """
+
+    def __init__(self, services: list, teams: list):
+        """
+        :param services: list of service objects
+        :param teams: list of team objects
+        """
+        self.built_at = time.monotonic()
+        self.__entries = {}
+        self.__postings = {}
+        for kind, items in (("services", services), ("teams", teams)):
+            entries = []
+            postings = {}
+            for item in items:
+                name = normalize(item.get("name")) if isinstance(item, dict) else ""
+                if not name:
+                    continue
+                grams = trigrams(name)
+                for gram in grams:
+                    postings.setdefault(gram, []).append(len(entries))
+                entries.append((name, len(grams), item))
+            self.__entries[kind] = entries
+            self.__postings[kind] = postings
+
+    def age(self) -> float:
+        """
+        :return: seconds since the index was built
+        """
+        return time.monotonic() - self.built_at
+
+    def search_services(self, query: str, limit: int = 25) -> list:
+        """
+        :param query: the name, or part of it, to search for
+        :param limit: max results
+        :return: matching service objects, best match first
+        """
+        return self.__search("services", query, limit)
+
+    def search_teams(self, query: str, limit: int = 25) -> list:
+        """
+        :param query: the name, or part of it, to search for
+        :param limit: max results
+        :return: matching team objects, best match first
+        """
+        return self.__search("teams", query, limit)
+
+    def __search(self, kind: str, query: str, limit: int) -> list:
+        query = normalize(query)
+        if not query:
+            return []
+        grams = trigrams(query)
+        entries = self.__entries[kind]
+        postings = self.__postings[kind]
+        shared = Counter(chain.from_iterable(postings.get(gram, ()) for gram in grams))
+        matches = []
+        for position, count in shared.items():
+            name, name_grams, _ = entries[position]
+            score = _score(query, len(grams), name, name_grams, count)
+            if score >= MIN_SCORE:
+                matches.append((-score, name, position))
+        matches.sort()
+        return [entries[position][2] for _, _, position in matches[:max(limit, 0)]]
+
+    def stats(self) -> dict:
+        return {
+            "services": len(self.__entries["services"]),
+            "teams": len(self.__entries["teams"]),
+            "age_seconds": round(self.age(), 3),
+        }
+
+
+def _score(query: str, query_grams: int, name: str, name_grams: int, shared: int) -> float:
+    """
+    :return: match score between 0 and 1, 1 for an exact match
+    """
+    if name == query:
+        return 1.0
+    coverage = shared / query_grams
+    similarity = 2 * shared / (query_grams + name_grams)
+    score = (coverage + similarity) / 2
+    if query in name:
+        # Substring matches rank above fuzzy matches, the closer to the full name the better
+        score = max(score, 0.75 + 0.2 * len(query) / len(name))
+    return score
+
+
+async def build_index(fetch) -> NameIndex:
+    """
+    Builds the name index from every service and team in the api
+    :param fetch: async callable taking (url, params) and returning the parsed response
+    :return: the name index
+    """
+    services_page_size = env_int("API_SERVICES_PAGE_SIZE", 25)
+    teams_page_size = env_int("API_TEAMS_PAGE_SIZE", 20)
+    services, teams = await asyncio.gather(
+        fetch_all_pages(lambda page: fetch('/services', {"page": page, "pageSize": services_page_size})),
+        fetch_all_pages(lambda page: fetch('/teams', {"page": page, "pageSize": teams_page_size})),
+    )
+    return NameIndex(services["items"], teams["items"])
+
+
+class SearchSnapshot:
+    """
+    Holds the current name index and rebuilds it in the background once it is older than the refresh interval
+    (SEARCH_REFRESH_INTERVAL seconds, default 300). Disabled with SEARCH_INDEX_ENABLED=false.
+    """
+
+    def __init__(self, fetch):
+        """
+        :param fetch: async callable taking (url, params) used to build the index
+        """
+        self.__fetch = fetch
+        self.__index = None
+        self.__refresh_task = None
+        self.__refreshes = 0
+        self.__failures = 0
+        # Bumped by invalidate, so a rebuild that started before a write does not install outdated names
+        self.__generation = 0
+
+    @staticmethod
+    def enabled() -> bool:
+        return env_bool("SEARCH_INDEX_ENABLED", True)
+
+    @staticmethod
+    def refresh_interval() -> float:
+        return env_float("SEARCH_REFRESH_INTERVAL", 300.0)
+
+    def current(self) -> NameIndex | None:
+        """
+        Returns the index if it is fresh. When it is missing or stale a background rebuild is started and None
+        is returned, so the caller falls back to the api.
+        :return: a fresh name index or None
+        """
+        if not self.enabled():
+            return None
+        index = self.__index
+        if index is not None and index.age() <= self.refresh_interval():
+            return index
+        if self.__refresh_task is None or self.__refresh_task.done():
+            # Run in a fresh context so the rebuild's requests are not attributed to the triggering tool call
+            self.__refresh_task = asyncio.get_running_loop().create_task(
+                self.__background_refresh(), context=contextvars.Context()
+            )
+        return None
+
+    async def refresh(self) -> NameIndex:
+        """
+        Rebuilds the index from the api
+        :return: the new index
+        """
+        generation = self.__generation
+        index = await build_index(self.__fetch)
+        if generation == self.__generation:
+            self.__index = index
+        self.__refreshes += 1
+        return index
+
+    async def __background_refresh(self):
+        try:
+            with request_priority(BACKGROUND):
+                await self.refresh()
+        except Exception:
+            # A failed rebuild leaves the previous index in place; the next search retries
+            self.__failures += 1
+
+    def invalidate(self):
+        """
+        Drops the index after a service was created or renamed, searches go to the api until it is rebuilt
+        """
+        self.__generation += 1
+        self.__index = None
+
+    def stats(self) -> dict:
+        index = self.__index
+        return {
+            "enabled": self.enabled(),
+            "refresh_interval": self.refresh_interval(),
+            "refreshes": self.__refreshes,
+            "failures": self.__failures,
+            "index": index.stats() if index is not None else None,
+        }
+
+
+async def _fetch(url: str, params: dict = None):
+    return await call_api(api_caller.call_get, url, params=params)
+
+
+search_snapshot = SearchSnapshot(_fetch)
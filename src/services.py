@@ -1,6 +1,13 @@
 from fastmcp import FastMCP
+from fastmcp.server.dependencies import get_context
 
-from api_calls import api_caller
+from api_calls import api_caller, call_api, sync_compatible
+from batching import fan_out, unique_ids
+from config import env_int
+from pagination import fetch_all_pages
+from projection import COMPACT_FIELDS, parse_fields, project
+from search import search_snapshot
+from tabular import tabulate
 
 service_mcp = FastMCP("Service MCP")
 
@@ -14,6 +21,11 @@ def prompt_get_services() -> str:
     return """
         To get a list of all services, use the tool `get_services` or the resource `serviceatlas://services?page={page}`.
         The results are paginated with 25 items per page. You should get pages as needed by incrementing the page parameter.
+        If you need the whole catalog, use the tool `get_all_services` or the resource `serviceatlas://services/all{?fields}` instead,
+        which returns every service in one call.
+        Service lists only contain the id, name, tier and type of each service by default. Pass `fields` (e.g. ["id", "name", "description"])
+        to choose the fields, or ["*"] for full service objects. The resources take the same as a query parameter, e.g. `&fields=id,name,url`.
+        For long lists, set `tabular` to true on the tools to get a `columns` header and `rows` of values instead of one object per service.
         If you are looking for a specific service by name, it is often more efficient to use the `find_service_by_name` tool.
     """
 
@@ -41,6 +53,23 @@ def prompt_get_service_by_name(query: str) -> str:
     return f"""
         To search for a service by name, use the tool `find_service_by_name`, passing in a required 'query' parameter, or 
         the resource `serviceatlas://services/search/{query}` with a query parameter.
+        Searches are answered from a local name index that tolerates typos and partial names, best match first, so there is
+        no need to retry with other spellings. Set `live` to true on the tool to search the api instead, e.g. right after a service was renamed.
+    """
+
+
+@service_mcp.prompt('update_service')
+def prompt_update_service(service_id: str) -> str:
+    """
+    Prompt for telling the AI how to update a service without losing its other fields
+    :param service_id:
+    :return:
+    """
+    return f"""
+        To update a service, first get the full service object with `find_service_by_name` or `get_services`, passing
+        `fields` as ["*"]; without it only the id, name, tier and type are returned. Then call the tool `update_service`
+        for service '{service_id}' with every field of that object, changing only the ones the user asked for.
+        Fields left out of the update are reset, e.g. the description is cleared and the url removed.
     """
 
 
@@ -54,108 +83,231 @@ def prompt_get_service_risk(service_id: str) -> str:
     return f"""
         To get the risk report for a service, use the tool `get_service_risk` or the resource `serviceatlas://services/{service_id}/risk`. 
         The report includes change risk (heuristic signal for cascading impact) and health risk (debt and dependent counts).
+        To compare the risk of several services, use the tool `get_service_risks` with a list of service ids; it returns
+        the reports ranked by change risk score and can filter by `top_n` and `min_level`.
     """
 
 
 @service_mcp.tool(annotations={"readOnlyHint": True, "title": "Get All Services"})
-def get_services(page: int = 1):
+@sync_compatible
+async def get_services(page: int = 1, fields: list[str] = None, tabular: bool = False):
     """
     Gets a paginated list of all service objects.
     The AI should get pages as needed. If a user mentions a specific service by name, 
     it may be more efficient to use find_service_by_name.
     :param page: The page number to retrieve (default: 1). Page size is fixed at 25.
+    :param fields: optional list of service fields to return, defaults to id, name, tier and type. Use ["*"] for every field
+    :param tabular: set to true to return the services as a `columns` header and `rows` of values instead of objects
     :return: a list of service objects
     """
-    return api_caller.call_get('/services', params={"page": page, "pageSize": 25})
+    services = await call_api(api_caller.call_get, '/services', params={"page": page, "pageSize": 25})
+    return tabulate(project(services, parse_fields(fields, COMPACT_FIELDS)), tabular)
 
 
-@service_mcp.resource(uri='serviceatlas://services?page={page}', name='List Services', mime_type='application/json')
-def get_services_resource(page: int = 1):
+@service_mcp.resource(uri='serviceatlas://services{?page,fields}', name='List Services', mime_type='application/json')
+@sync_compatible
+async def get_services_resource(page: int = 1, fields: str = None):
     """
     Gets a paginated list of all service objects.
     :param page: The page number to retrieve (default: 1). Page size is fixed at 25.
+    :param fields: optional comma separated list of service fields to return, defaults to id,name,tier,type. Use * for every field
     :return: a list of service objects
     """
-    return api_caller.call_get('/services', params={"page": page, "pageSize": 25})
+    services = await call_api(api_caller.call_get, '/services', params={"page": page, "pageSize": 25})
+    return project(services, parse_fields(fields, COMPACT_FIELDS))
+
+
+@service_mcp.tool(annotations={"readOnlyHint": True, "title": "Get Every Service"})
+@sync_compatible
+async def get_all_services(fields: list[str] = None, tabular: bool = False):
+    """
+    Gets every service in one call by fetching all pages concurrently. Prefer this over paging through
+    get_services when the whole catalog is needed.
+    :param fields: optional list of service fields to return, defaults to id, name, tier and type. Use ["*"] for every field
+    :param tabular: set to true to return the services as a `columns` header and `rows` of values instead of objects
+    :return: object with a `services` array, a `count`, and a `truncated` flag if not every service could be fetched
+    """
+    return tabulate(await _fetch_all_services(fields), tabular, "services")
+
+
+@service_mcp.resource(uri='serviceatlas://services/all{?fields}', name='All Services', mime_type='application/json')
+@sync_compatible
+async def get_all_services_resource(fields: str = None):
+    """
+    Gets every service in one call by fetching all pages concurrently.
+    :param fields: optional comma separated list of service fields to return, defaults to id,name,tier,type. Use * for every field
+    :return: object with a `services` array, a `count`, and a `truncated` flag
+    """
+    return await _fetch_all_services(fields)
 
 
 @service_mcp.tool(annotations={"readOnlyHint": True, "title": "Find Service by Name"})
-def find_service_by_name(query: str):
+@sync_compatible
+async def find_service_by_name(query: str, fields: list[str] = None, tabular: bool = False, live: bool = False):
     """
-    Search for a service by name
+    Search for a service by name. Answered from the local name index when it is fresh, which tolerates typos and
+    partial names and ranks the best match first, otherwise from the api.
     :param query: the name to search against
+    :param fields: optional list of service fields to return, defaults to id, name, tier and type. Use ["*"] for every field
+    :param tabular: set to true to return the services as a `columns` header and `rows` of values instead of objects
+    :param live: set to true to skip the local index and search with the api
     :return: a list of services objects
     """
-    return api_caller.call_get('/services/search', params={"query": query})
+    services = await _search_services(query, live)
+    return tabulate(project(services, parse_fields(fields, COMPACT_FIELDS)), tabular)
 
 
-@service_mcp.resource(uri='serviceatlas://services/search/{query}', name='Search Services by Name', mime_type='application/json')
-def find_service_by_name_resource(query: str):
+@service_mcp.resource(uri='serviceatlas://services/search/{query}{?fields}', name='Search Services by Name', mime_type='application/json')
+@sync_compatible
+async def find_service_by_name_resource(query: str, fields: str = None):
     """
     Search for a service by name
     :param query: the name to search against
+    :param fields: optional comma separated list of service fields to return, defaults to id,name,tier,type. Use * for every field
     :return: a list of services objects
     """
-    return api_caller.call_get('/services/search', params={"query": query})
+    services = await _search_services(query)
+    return project(services, parse_fields(fields, COMPACT_FIELDS))
+
+
+async def _search_services(query: str, live: bool = False) -> list:
+    """
+    Searches services by name in the local name index, falling back to the api when the index is disabled or stale
+    :param query: the name to search against
+    :param live: skip the index
+    :return: a list of services objects
+    """
+    index = None if live else search_snapshot.current()
+    if index is not None:
+        return index.search_services(query)
+    return await call_api(api_caller.call_get, '/services/search', params={"query": query})
 
 
 @service_mcp.tool(annotations={"readOnlyHint": True, "title": "Get Teams for Service"})
-def get_teams_by_service(service_id: str):
+@sync_compatible
+async def get_teams_by_service(service_id: str):
     """
     Gets a list of teams that own a service based on id
     :param service_id: the guid for the service
     :return: a list of teams objects
     """
-    return api_caller.call_get(f'/services/{service_id}/teams')
+    return await call_api(api_caller.call_get, f'/services/{service_id}/teams')
 
 
 @service_mcp.resource(uri='serviceatlas://services/{service_id}/teams', name='Teams by Service', mime_type='application/json')
-def get_teams_by_service_resource(service_id: str):
+@sync_compatible
+async def get_teams_by_service_resource(service_id: str):
     """
     Gets a list of teams that own a service based on id
     :param service_id: the guid for the service
     :return: a list of teams objects
     """
-    return api_caller.call_get(f'/services/{service_id}/teams')
+    return await call_api(api_caller.call_get, f'/services/{service_id}/teams')
+
+
+@service_mcp.tool(annotations={"readOnlyHint": True, "title": "Get Teams for Services"})
+@sync_compatible
+async def get_teams_for_services(service_ids: list[str]):
+    """
+    Gets the owning teams for many services in one call. Prefer this over calling get_teams_by_service
+    once per service, e.g. when finding owners of every service affected by an incident.
+    :param service_ids: list of service guids (max 100)
+    :return: object with a `teams` map of service id to list of teams objects, and an `errors` map of
+        service id to error message for any service that could not be looked up
+    """
+    service_ids = unique_ids(service_ids, "service_ids")
+
+    async def fetch(service_id: str):
+        return await call_api(api_caller.call_get, f'/services/{service_id}/teams')
+
+    teams, errors = await fan_out(fetch, service_ids)
+    return {"teams": teams, "errors": errors}
 
 
 @service_mcp.tool(annotations={"readOnlyHint": True, "title": "Get Service Risk Report"})
-def get_service_risk(service_id: str):
+@sync_compatible
+async def get_service_risk(service_id: str):
     """
     Gets the risk report for a specific service
     :param service_id: the guid for the service
     :return: risk report object
     """
-    return api_caller.call_get(f'/reports/services/{service_id}/risk')
+    return await call_api(api_caller.call_get, f'/reports/services/{service_id}/risk')
 
 
 @service_mcp.resource(uri='serviceatlas://services/{service_id}/risk', name='Service Risk Report', mime_type='application/json')
-def get_service_risk_resource(service_id: str):
+@sync_compatible
+async def get_service_risk_resource(service_id: str):
     """
     Gets the risk report for a specific service
     :param service_id: the guid for the service
     :return: risk report object
     """
-    return api_caller.call_get(f'/reports/services/{service_id}/risk')
+    return await call_api(api_caller.call_get, f'/reports/services/{service_id}/risk')
+
+
+# Change risk levels in ascending order of severity
+RISK_LEVELS = ("low", "medium", "high")
+
+
+@service_mcp.tool(annotations={"readOnlyHint": True, "title": "Get Service Risk Reports"})
+@sync_compatible
+async def get_service_risks(service_ids: list[str], top_n: int = None, min_level: str = None):
+    """
+    Gets the risk reports for many services in one call, ranked by change risk score (highest first).
+    Prefer this over calling get_service_risk once per service, e.g. for every service touched by a release.
+    :param service_ids: list of service guids (max 100)
+    :param top_n: optional, only return the N riskiest services
+    :param min_level: optional, only return services with at least this change risk level (low, medium, high)
+    :return: object with a ranked `risks` list of {service_id, level, score, report}, and an `errors` map of
+        service id to error message for any report that could not be fetched
+    """
+    service_ids = unique_ids(service_ids, "service_ids")
+    if min_level is not None and min_level.lower() not in RISK_LEVELS:
+        raise ValueError(f"min_level must be one of {', '.join(RISK_LEVELS)}")
+    if top_n is not None and top_n < 1:
+        raise ValueError("top_n must be at least 1")
+
+    async def fetch(service_id: str):
+        return await call_api(api_caller.call_get, f'/reports/services/{service_id}/risk')
+
+    reports, errors = await fan_out(fetch, service_ids)
+    risks = []
+    for service_id, report in reports.items():
+        change_risk = (report or {}).get("changeRisk") or {}
+        level = change_risk.get("level")
+        level = level.lower() if isinstance(level, str) else None
+        if min_level is not None and (level not in RISK_LEVELS or RISK_LEVELS.index(level) < RISK_LEVELS.index(min_level.lower())):
+            continue
+        risks.append({"service_id": service_id, "level": level, "score": change_risk.get("score"), "report": report})
+    # Highest score first; reports without a score go last
+    risks.sort(key=lambda risk: (risk["score"] is None, -(risk["score"] or 0)))
+    if top_n is not None:
+        risks = risks[:top_n]
+    return {"risks": risks, "errors": errors}
+
 
 @service_mcp.resource(uri='serviceatlas://services/types', name='Get Service Types', mime_type='application/json')
-def get_service_types_resource():
+@sync_compatible
+async def get_service_types_resource():
     """
     Gets the list of service types
     :return: list of service types
     """
-    return api_caller.call_get('/services/types')
+    return await call_api(api_caller.call_get, '/services/types')
 
 @service_mcp.tool(annotations={"readOnlyHint": True, "title": "Get Service Types"})
-def get_service_types():
+@sync_compatible
+async def get_service_types():
     """
     Gets the list of service types
     :return: list of service types
     """
-    return api_caller.call_get('/services/types')
+    return await call_api(api_caller.call_get, '/services/types')
 
 @service_mcp.tool(annotations={"readOnlyHint": False, "title": "Create Service"})
-def create_service(name: str, description: str = "", service_type: str = "service", url: str = None, tier: int = 3):
+@sync_compatible
+async def create_service(name: str, description: str = "", service_type: str = "service", url: str = None, tier: int = 3):
     """
     Creates a new service
     :param name: name of the service
@@ -173,12 +325,17 @@ def create_service(name: str, description: str = "", service_type: str = "servic
     }
     if url:
         body["url"] = url
-    return api_caller.call_post("/services", body=body)
+    response = await call_api(api_caller.call_post, "/services", body=body)
+    search_snapshot.invalidate()
+    return response
 
 @service_mcp.tool(annotations={"readOnlyHint": False, "title": "Update Service"})
-def update_service(service_id: str, name: str, description: str = "", service_type: str = "service", url: str = None, tier: int = 3):
+@sync_compatible
+async def update_service(service_id: str, name: str, description: str = "", service_type: str = "service", url: str = None, tier: int = 3):
     """
-    Updates an existing service. It is recommended to get the service first and then update it, so all fields are updated.
+    Updates an existing service. Every field is replaced, so get the full service first, with `fields` set to ["*"]
+    on find_service_by_name or get_services, and pass all of its fields along with the changed ones. Service lists
+    only return the id, name, tier and type by default, and an update built from them clears the description and url.
     :param service_id: id of the service to update
     :param name:  the name of the service. WARNING: Changing the name is discouraged as it may break references in code, configs, and dependencies.
         Only update the name if explicitly and intentionally requested by the user — do not infer or suggest name changes.
@@ -198,4 +355,39 @@ def update_service(service_id: str, name: str, description: str = "", service_ty
     }
     if url:
         body["url"] = url
-    return api_caller.call_put(f"/services/{service_id}", body=body)
\ No newline at end of file
+    response = await call_api(api_caller.call_put, f"/services/{service_id}", body=body)
+    search_snapshot.invalidate()
+    # Imported here so the dependency sub-server is not loaded with this one
+    from dependency import graph_snapshot
+    graph_snapshot.invalidate()
+    return response
+
+
+async def _fetch_all_services(fields=None) -> dict:
+    """
+    Returns all services from the service atlas api, fetching pages concurrently and projecting each page as it
+    arrives. Progress is reported to the client when called within a request. The page size is read from
+    API_SERVICES_PAGE_SIZE (default 25).
+    :param fields: optional list or comma separated string of fields to keep on each service, defaults to COMPACT_FIELDS
+    :return: dictionary with the list of service objects, the count, and a truncated flag set when the page limit was hit
+    """
+    page_size = env_int("API_SERVICES_PAGE_SIZE", 25)
+    fields = parse_fields(fields, COMPACT_FIELDS)
+    try:
+        ctx = get_context()
+    except RuntimeError:
+        ctx = None
+    received = 0
+
+    async def fetch_page(page: int):
+        return await call_api(api_caller.call_get, '/services', params={"page": page, "pageSize": page_size})
+
+    async def on_page(page: int, items: list):
+        nonlocal received
+        received += len(items)
+        if ctx is not None:
+            await ctx.report_progress(progress=received, message=f"Fetched {received} services")
+        return project(items, fields)
+
+    result = await fetch_all_pages(fetch_page, on_page=on_page)
+    return {"services": result["items"], "count": len(result["items"]), "truncated": result["truncated"]}
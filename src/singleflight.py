@@ -0,0 +1,128 @@
+import asyncio
+import threading
+
+
+class FlightTimeout(TimeoutError):
+    """
+    Raised to a caller that stopped waiting for a shared call, the call itself carries on for the others
+    """
+
+
+class _Counters:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._leaders = 0
+        self._coalesced = 0
+
+    def _count(self, leader: bool):
+        with self._lock:
+            if leader:
+                self._leaders += 1
+            else:
+                self._coalesced += 1
+
+    def stats(self) -> dict:
+        """
+        Returns coalescing counters
+        :return: dictionary with upstream calls made (leaders) and upstream calls saved (coalesced)
+        """
+        with self._lock:
+            return {"leaders": self._leaders, "coalesced": self._coalesced}
+
+
+class _Call:
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(_Counters):
+    """
+    Coalesces concurrent identical calls made from multiple threads: the first caller for a key runs the
+    function and every caller that arrives while it is in flight receives the same result (or exception).
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.__calls = {}
+
+    def do(self, key, func, timeout: float = None):
+        """
+        Runs func once for all concurrent callers with the same key
+        :param key: hashable key identifying identical calls
+        :param func: callable taking no arguments
+        :param timeout: max seconds to wait for a call started by another caller, None to wait until it ends
+        :return: the shared result of func
+        :raises FlightTimeout: when the call started by another caller did not end in time
+        """
+        with self._lock:
+            call = self.__calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.__calls[key] = _Call()
+        self._count(leader)
+        if not leader:
+            if not call.event.wait(None if timeout is None else max(timeout, 0)):
+                raise FlightTimeout(f"Gave up waiting for the shared call {key!r}")
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = func()
+            return call.result
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self.__calls[key]
+            call.event.set()
+
+
+class AsyncSingleFlight(_Counters):
+    """
+    Coalesces concurrent identical calls on an event loop. The call runs as its own task, so a caller being
+    cancelled does not cancel the call for the other callers waiting on it.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.__calls = {}
+
+    async def do(self, key, func, timeout: float = None):
+        """
+        Runs func once for all concurrent callers with the same key. The call runs in the context of the caller
+        that started it, so a caller joining it bounds its own wait with timeout.
+        :param key: hashable key identifying identical calls
+        :param func: async callable taking no arguments
+        :param timeout: max seconds to wait for the call, None to wait until it ends
+        :return: the shared result of func
+        :raises FlightTimeout: when the call did not end in time
+        """
+        with self._lock:
+            task = self.__calls.get(key)
+            leader = task is None
+            if leader:
+                task = self.__calls[key] = asyncio.ensure_future(func())
+                task.add_done_callback(lambda done: self.__finish(key, done))
+        self._count(leader)
+        if timeout is None:
+            return await asyncio.shield(task)
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), max(timeout, 0))
+        except TimeoutError:
+            if task.done() and not task.cancelled():
+                # The call ended while the wait was timing out, or raised a timeout itself
+                return task.result()
+            raise FlightTimeout(f"Gave up waiting for the shared call {key!r}") from None
+
+    def __finish(self, key, task):
+        with self._lock:
+            if self.__calls.get(key) is task:
+                del self.__calls[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved in case every caller was cancelled before it completed
+            task.exception()
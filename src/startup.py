@@ -0,0 +1,94 @@
+import os
+import re
+import subprocess
+import sys
+from contextlib import asynccontextmanager
+from importlib import import_module
+
+from fastmcp.server.providers import FastMCPProvider
+
+_IMPORT_TIME = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( +)(\S+)$")
+
+
+class LazyServerProvider(FastMCPProvider):
+    """
+    Mounts a sub-server without importing its module. The module is imported on the first request that needs
+    one of its tools, resources or prompts, so defining the sub-server's components is kept off the startup path.
+    """
+
+    def __init__(self, module: str, attribute: str):
+        """
+        :param module: name of the module defining the sub-server
+        :param attribute: name of the FastMCP instance in the module
+        """
+        self.module = module
+        self.attribute = attribute
+        self.__server = None
+        # Runs the parent setup with no server yet, the server property imports it on first use
+        super().__init__(None)
+
+    @property
+    def loaded(self) -> bool:
+        return self.__server is not None
+
+    @property
+    def server(self):
+        if self.__server is None:
+            self.__server = getattr(import_module(self.module), self.attribute)
+        return self.__server
+
+    @server.setter
+    def server(self, server):
+        self.__server = server
+
+    async def get_tasks(self):
+        # Called while the server starts. None of the sub-servers define background tasks, so there is no
+        # reason to load them for it.
+        if not self.loaded:
+            return []
+        return await super().get_tasks()
+
+    @asynccontextmanager
+    async def lifespan(self):
+        if not self.loaded:
+            yield
+            return
+        async with super().lifespan():
+            yield
+
+
+def import_report(statement: str = "import mcp_server; mcp_server.setup()", top: int = 15) -> dict:
+    """
+    Measures the imports made by a statement in a fresh interpreter with python -X importtime
+    :param statement: python code to run, by default importing and setting up the server
+    :param top: number of modules to report
+    :return: dictionary with the total import time and the modules with the highest self time, in milliseconds
+    """
+    env = dict(os.environ)
+    src_path = os.path.dirname(os.path.abspath(__file__))
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [src_path, env.get("PYTHONPATH")]))
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True, text=True, env=env, check=True,
+    )
+    modules = []
+    total = 0
+    for line in completed.stderr.splitlines():
+        match = _IMPORT_TIME.match(line)
+        if match is None:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        if len(indent) == 1:
+            # Top level imports, their cumulative times add up to the total
+            total += int(cumulative_us)
+        modules.append({"module": name, "self_ms": int(self_us) / 1000, "cumulative_ms": int(cumulative_us) / 1000})
+    modules.sort(key=lambda module: module["self_ms"], reverse=True)
+    return {"statement": statement, "total_ms": total / 1000, "modules": modules[:top]}
+
+
+def format_import_report(report: dict) -> str:
+    lines = [f"Import time for `{report['statement']}`: {report['total_ms']:.1f} ms", ""]
+    lines.append(f"{'self ms':>10}{'cumulative ms':>16}  module")
+    for module in report["modules"]:
+        lines.append(f"{module['self_ms']:>10.1f}{module['cumulative_ms']:>16.1f}  {module['module']}")
+    return "\n".join(lines)
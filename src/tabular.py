@@ -0,0 +1,53 @@
+# Keys of a tabular encoded list
+COLUMNS = "columns"
+ROWS = "rows"
+
+
+def to_table(items: list):
+    """
+    Encodes a list of objects as a header row of column names plus one array of values per object, so the keys are
+    sent once instead of once per object. Columns are the union of the objects' keys in the order they are first
+    seen, values missing from an object are null.
+    :param items: list of objects from the api
+    :return: dictionary with `columns` and `rows`, or items unchanged when it is not a list of objects
+    """
+    if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+        return items
+    columns = {}
+    for item in items:
+        for key in item:
+            columns.setdefault(key, None)
+    columns = list(columns)
+    return {COLUMNS: columns, ROWS: [[item.get(column) for column in columns] for item in items]}
+
+
+def from_table(table) -> list:
+    """
+    Decodes the output of to_table back into a list of objects. Null values are dropped, as the encoding does not
+    tell them apart from missing keys.
+    :param table: dictionary with `columns` and `rows`
+    :return: list of objects
+    """
+    if not isinstance(table, dict) or COLUMNS not in table:
+        return table
+    columns = table[COLUMNS]
+    return [
+        {column: value for column, value in zip(columns, row) if value is not None} for row in table[ROWS]
+    ]
+
+
+def tabulate(result, tabular: bool, key: str = None):
+    """
+    Applies the tabular encoding to a tool result when it was asked for
+    :param result: a list of objects, or a dictionary holding the list under `key`
+    :param tabular: whether the caller asked for the tabular encoding
+    :param key: key of the list in result, e.g. 'services' for get_all_services
+    :return: the result, with the list encoded by to_table when tabular is set
+    """
+    if not tabular:
+        return result
+    if key is None:
+        return to_table(result)
+    if not isinstance(result, dict) or key not in result:
+        return result
+    return {**result, key: to_table(result[key])}
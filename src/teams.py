@@ -1,6 +1,11 @@
 from fastmcp import FastMCP
 
-from api_calls import api_caller
+from api_calls import api_caller, call_api, sync_compatible
+from config import env_int
+from pagination import fetch_all_pages
+from projection import COMPACT_FIELDS, parse_fields, project
+from search import NameIndex, search_snapshot
+from tabular import tabulate
 
 teams_mcp = FastMCP("Teams MCP")
 
@@ -16,67 +21,116 @@ def prompt_find_which_team_owns_a_service() -> str:
         The returned data will have an `id` field. You will then need to call the tool `get_teams_by_service` passing in the service id.
         There are also associated resources for each tool. The `serviceatlas://services/search/{query}` resource is synonymous with the `find_service_by_name` tool.
         The `serviceatlas://services/{service_id}/teams` resource is synonymous with the `get_teams_by_service` tool.
+        If you need the owners of several services, use the tool `get_teams_for_services` with a list of service ids instead.
         """
 
 
 @teams_mcp.prompt('get_all_teams')
 def prompt_get_all_teams() -> str:
     return """
-        To get a list of all teams, use the tool `get_all_teams` or the resource `serviceatlas://teams`. The returned data will be an array of teams, which contains 
-        an `id` field and a `name` field. The `id` field is the guid for the team, which will be used to make further calls.
+        To get a list of all teams, use the tool `get_all_teams` or the resource `serviceatlas://teams`. The returned data will be an object with a `teams` array, where each team contains 
+        an `id` field and a `name` field. If `truncated` is true, not every team was returned. The `id` field is the guid for the team, which will be used to make further calls.
+        If you only need one team, e.g. "which team is Payments", use the tool `find_team_by_name` or the resource `serviceatlas://teams/search/{query}` instead.
+        It tolerates typos and partial names and returns the best match first.
     """
 
 
 @teams_mcp.tool(annotations={"readOnlyHint": True, "title": "Get All Teams"})
-def get_all_teams():
+@sync_compatible
+async def get_all_teams(tabular: bool = False):
     """
     Returns all teams from the service atlas api
-    :return: array of teams objects
+    :param tabular: set to true to return the teams as a `columns` header and `rows` of values instead of objects
+    :return: object with a `teams` array of teams objects, a `count`, and a `truncated` flag if not every team could be fetched
     """
-    return _fetch_all_teams()
+    return tabulate(await _fetch_all_teams(), tabular, "teams")
 
 
 @teams_mcp.resource(uri='serviceatlas://teams', name='All Teams', mime_type='application/json')
-def get_all_teams_resource():
+@sync_compatible
+async def get_all_teams_resource():
     """
     Returns all teams from the service atlas api
-    :return: array of teams objects
+    :return: object with a `teams` array of teams objects, a `count`, and a `truncated` flag if not every team could be fetched
     """
-    return _fetch_all_teams()
+    return await _fetch_all_teams()
+
+
+@teams_mcp.tool(annotations={"readOnlyHint": True, "title": "Find Team by Name"})
+@sync_compatible
+async def find_team_by_name(query: str, live: bool = False):
+    """
+    Search for a team by name. Answered from the local name index when it is fresh, which tolerates typos and
+    partial names and ranks the best match first, otherwise by fetching every team from the api.
+    :param query: the name to search against
+    :param live: set to true to skip the local index and read the teams from the api
+    :return: a list of teams objects
+    """
+    return await _search_teams(query, live)
+
+
+@teams_mcp.resource(uri='serviceatlas://teams/search/{query}', name='Search Teams by Name', mime_type='application/json')
+@sync_compatible
+async def find_team_by_name_resource(query: str):
+    """
+    Search for a team by name
+    :param query: the name to search against
+    :return: a list of teams objects
+    """
+    return await _search_teams(query)
 
 
 @teams_mcp.tool(annotations={"readOnlyHint": True, "title": "Get Services for Team"})
-def get_services_by_team(team_id: str):
+@sync_compatible
+async def get_services_by_team(team_id: str, fields: list[str] = None, tabular: bool = False):
     """
     Tool that returns a list of services for a team based on id
     :param team_id: guid for the team
+    :param fields: optional list of service fields to return, defaults to id, name, tier and type. Use ["*"] for every field
+    :param tabular: set to true to return the services as a `columns` header and `rows` of values instead of objects
     :return: array of services objects from the api
     """
-    return api_caller.call_get(f'/teams/{team_id}/services')
+    services = await call_api(api_caller.call_get, f'/teams/{team_id}/services')
+    return tabulate(project(services, parse_fields(fields, COMPACT_FIELDS)), tabular)
 
 
-@teams_mcp.resource(uri='serviceatlas://teams/{team_id}/services', name='Services by Team', mime_type='application/json')
-def get_services_by_team_resource(team_id: str):
+@teams_mcp.resource(uri='serviceatlas://teams/{team_id}/services{?fields}', name='Services by Team', mime_type='application/json')
+@sync_compatible
+async def get_services_by_team_resource(team_id: str, fields: str = None):
     """
     Resource that returns a list of services for a team based on id
     :param team_id: guid for the team
+    :param fields: optional comma separated list of service fields to return, defaults to id,name,tier,type. Use * for every field
     :return: array of services objects from the api
     """
-    return api_caller.call_get(f'/teams/{team_id}/services')
+    services = await call_api(api_caller.call_get, f'/teams/{team_id}/services')
+    return project(services, parse_fields(fields, COMPACT_FIELDS))
+
+
+async def _fetch_all_teams() -> dict:
+    """
+    Returns all teams from the service atlas api, fetching pages concurrently.
+    The page size is read from API_TEAMS_PAGE_SIZE (default 20).
+    :return: dictionary with the list of teams objects, the count, and a truncated flag set when the page limit was hit
+    """
+    page_size = env_int("API_TEAMS_PAGE_SIZE", 20)
+
+    async def fetch_page(page: int):
+        return await call_api(api_caller.call_get, "/teams", params={"page": page, "pageSize": page_size})
+
+    result = await fetch_all_pages(fetch_page)
+    return {"teams": result["items"], "count": len(result["items"]), "truncated": result["truncated"]}
 
 
-def _fetch_all_teams() -> list:
+async def _search_teams(query: str, live: bool = False) -> list:
     """
-    Returns all teams from the service atlas api.
-    :return: list of teams objects (max of 200 due to pagination limit)
+    Searches teams by name in the local name index. The api has no team search, so when the index is disabled or
+    stale every team is fetched and searched with a one-off index.
+    :param query: the name to search against
+    :param live: skip the index
+    :return: a list of teams objects, best match first
     """
-    max_iterations = 10
-    iteration = 0
-    all_teams = []
-    while iteration < max_iterations:
-        iteration += 1
-        teams = api_caller.call_get("/teams", params={"page": iteration, "pageSize": 20})
-        if not teams:
-            break
-        all_teams.extend(teams)
-    return all_teams
+    index = None if live else search_snapshot.current()
+    if index is None:
+        index = NameIndex([], (await _fetch_all_teams())["teams"])
+    return index.search_teams(query)
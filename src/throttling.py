@@ -0,0 +1,403 @@
+import asyncio
+import contextvars
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from config import env_float, env_int
+from deadlines import DeadlineExceeded, remaining
+from endpoints import endpoint_template
+from metrics import registry
+
+# Key of the bucket shared by every endpoint
+ALL_ENDPOINTS = "*"
+
+# Priority classes of api requests, highest first: requests made directly by a tool call, requests a tool call
+# fans out to many ids at once, and requests refreshing snapshots in the background
+INTERACTIVE = "interactive"
+FAN_OUT = "fan_out"
+BACKGROUND = "background"
+PRIORITIES = (INTERACTIVE, FAN_OUT, BACKGROUND)
+
+_priority = contextvars.ContextVar("atlas_request_priority", default=INTERACTIVE)
+
+
+@contextmanager
+def request_priority(priority: str):
+    """
+    Sets the priority class of the api requests made in the block, including requests made by tasks and threads
+    started from it. A nested class can only lower the priority, so a fan-out inside a background refresh stays
+    background.
+    :param priority: one of PRIORITIES
+    """
+    if priority not in PRIORITIES:
+        raise ValueError(f"Unknown request priority '{priority}', expected one of {', '.join(PRIORITIES)}")
+    token = _priority.set(max(_priority.get(), priority, key=PRIORITIES.index))
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> str:
+    return _priority.get()
+
+
+class _TokenBucket:
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def available_in(self) -> float:
+        """
+        :return: seconds until a whole token is in the bucket, 0 if there is one now
+        """
+        return (1 - self.tokens) / self.rate if self.tokens < 1 else 0.0
+
+    def reserve(self) -> float:
+        """
+        Takes a token, letting the balance go negative when the bucket is empty
+        :return: seconds until the taken token is available
+        """
+        self.tokens -= 1
+        return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+    def cancel(self):
+        self.tokens += 1
+
+
+class _ThreadWaiter:
+    """
+    A thread of the sync api caller waiting for an in-flight slot
+    """
+
+    __slots__ = ("event", "granted")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.granted = False
+
+
+class _ClassStats:
+    __slots__ = ("in_flight", "admitted", "queued", "rejected", "queue_seconds", "max_queue_seconds")
+
+    def __init__(self):
+        self.in_flight = 0
+        self.admitted = 0
+        self.queued = 0
+        self.rejected = 0
+        self.queue_seconds = 0.0
+        self.max_queue_seconds = 0.0
+
+
+class Throttle:
+    """
+    Protects the Service Atlas API from the fan-out of concurrent tool calls. Requests are rate limited by token
+    buckets: one shared by every endpoint (API_RATE_LIMIT requests per second) and one per endpoint template listed
+    in API_RATE_LIMITS, a JSON object such as {"/services/{id}/dependents": 20}. Buckets hold API_RATE_BURST tokens,
+    by default one second worth of requests. Rate limits are off by default. At most API_MAX_IN_FLIGHT requests
+    (default 32, 0 for no limit) are sent at once, the others queue until a request finishes.
+    Waiting is bounded by the tool call's deadline.
+
+    Queued requests are served by priority class, then in arrival order. Background requests use at most
+    API_BACKGROUND_MAX_IN_FLIGHT slots (default half of API_MAX_IN_FLIGHT) and only take rate limit tokens that
+    are free, so a snapshot refresh never holds up the requests of a tool call.
+    """
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__buckets = {}
+        self.__limits_source = None
+        self.__limits = {}
+        self.__in_flight = 0
+        # Threads of the sync caller wait on events, tasks of the async caller on futures
+        self.__waiters = {priority: deque() for priority in PRIORITIES}
+        self.__classes = {priority: _ClassStats() for priority in PRIORITIES}
+
+    @staticmethod
+    def rate_limit() -> float:
+        return env_float("API_RATE_LIMIT", 0.0)
+
+    @staticmethod
+    def max_in_flight() -> int:
+        return max(env_int("API_MAX_IN_FLIGHT", 32), 0)
+
+    def background_max_in_flight(self) -> int:
+        limit = self.max_in_flight()
+        return max(env_int("API_BACKGROUND_MAX_IN_FLIGHT", math.ceil(limit / 2)), 0)
+
+    def rate_limits(self) -> dict:
+        """
+        :return: dictionary of endpoint template to requests per second, parsed from API_RATE_LIMITS
+        """
+        source = os.getenv("API_RATE_LIMITS") or ""
+        if source != self.__limits_source:
+            self.__limits = {template: float(rate) for template, rate in json.loads(source or "{}").items()}
+            self.__limits_source = source
+        return self.__limits
+
+    def __bucket(self, key: str, rate: float, now: float):
+        """
+        Returns the bucket of a key, replacing it when its rate was reconfigured. Must be called while holding
+        the lock.
+        """
+        if not rate or rate <= 0:
+            return None
+        burst = max(env_float("API_RATE_BURST", 0.0) or rate, 1.0)
+        bucket = self.__buckets.get(key)
+        if bucket is None or bucket.rate != rate or bucket.burst != burst:
+            bucket = self.__buckets[key] = _TokenBucket(rate, burst, now)
+        bucket.refill(now)
+        return bucket
+
+    def __reserve(self, endpoint: str, priority: str) -> tuple:
+        """
+        Takes a token from the shared bucket and the endpoint's bucket. Background requests only take tokens
+        that are in the buckets now, leaving tokens reserved ahead of time to higher priority requests.
+        :return: (seconds to wait, whether the tokens were taken). When they were not, the request tries again
+            after waiting
+        :raises DeadlineExceeded: when the wait would outlast the deadline, no token is taken then
+        """
+        limits = self.rate_limits()
+        now = time.monotonic()
+        with self.__lock:
+            buckets = [
+                bucket for bucket in (
+                    self.__bucket(ALL_ENDPOINTS, self.rate_limit(), now),
+                    self.__bucket(endpoint, limits.get(endpoint), now),
+                ) if bucket is not None
+            ]
+            if priority == BACKGROUND:
+                wait = max((bucket.available_in() for bucket in buckets), default=0.0)
+                if wait > 0:
+                    self.__check_deadline(endpoint, priority, wait)
+                    return wait, False
+            wait = max((bucket.reserve() for bucket in buckets), default=0.0)
+            try:
+                self.__check_deadline(endpoint, priority, wait)
+            except DeadlineExceeded:
+                for bucket in buckets:
+                    bucket.cancel()
+                raise
+        return wait, True
+
+    def __check_deadline(self, endpoint: str, priority: str, wait: float):
+        """
+        Must be called while holding the lock
+        """
+        left = remaining()
+        if left is not None and wait >= left:
+            self.__classes[priority].rejected += 1
+            raise DeadlineExceeded(endpoint)
+
+    def __eligible(self, priority: str) -> bool:
+        """
+        Whether a request of the class may take a free slot. Must be called while holding the lock.
+        """
+        if priority != BACKGROUND:
+            return True
+        limit = self.background_max_in_flight()
+        return not limit or self.__classes[BACKGROUND].in_flight < limit
+
+    def __admit(self, priority: str) -> bool:
+        """
+        Takes an in-flight slot if one is free. Must be called while holding the lock.
+        """
+        limit = self.max_in_flight()
+        if limit and self.__in_flight >= limit or not self.__eligible(priority):
+            return False
+        self.__in_flight += 1
+        self.__classes[priority].in_flight += 1
+        return True
+
+    def __enqueue(self, priority: str, waiter):
+        """
+        Must be called while holding the lock
+        """
+        self.__waiters[priority].append(waiter)
+        registry.inc("atlas_upstream_queue_depth", {"priority": priority})
+
+    def __dequeue(self, priority: str, waiter=None):
+        """
+        Removes a waiter that gave up, or the longest waiting one. Must be called while holding the lock.
+        """
+        queue = self.__waiters[priority]
+        if waiter is None:
+            waiter = queue.popleft()
+        else:
+            queue.remove(waiter)
+        registry.inc("atlas_upstream_queue_depth", {"priority": priority}, -1)
+        return waiter
+
+    def __record(self, endpoint: str, priority: str, started: float, queued: bool):
+        waited = time.monotonic() - started if queued else 0.0
+        with self.__lock:
+            stats = self.__classes[priority]
+            stats.admitted += 1
+            if queued:
+                stats.queued += 1
+                stats.queue_seconds += waited
+                stats.max_queue_seconds = max(stats.max_queue_seconds, waited)
+        registry.observe("atlas_upstream_queue_seconds", {"endpoint": endpoint, "priority": priority}, waited)
+
+    def __withdraw(self, priority: str, waiter):
+        """
+        Removes a waiter that gave up, unless it was handed a slot already. Must be called while holding the lock.
+        """
+        if waiter in self.__waiters[priority]:
+            self.__dequeue(priority, waiter)
+
+    def acquire(self, path: str) -> str:
+        """
+        Blocks until a request may be sent, for the sync api caller
+        :param path: the url fragment, grouped by its endpoint template
+        :return: the request's priority class, to pass to release
+        :raises DeadlineExceeded: when the request cannot be sent before the deadline
+        """
+        endpoint = endpoint_template(path)
+        priority = _priority.get()
+        started = time.monotonic()
+        queued = False
+        while True:
+            wait, taken = self.__reserve(endpoint, priority)
+            if wait > 0:
+                queued = True
+                time.sleep(wait)
+            if taken:
+                break
+        with self.__lock:
+            waiter = None
+            if not self.__admit(priority):
+                waiter = _ThreadWaiter()
+                self.__enqueue(priority, waiter)
+        if waiter is not None:
+            queued = True
+            waiter.event.wait(remaining())
+            with self.__lock:
+                if not waiter.granted:
+                    self.__withdraw(priority, waiter)
+                    self.__classes[priority].rejected += 1
+                    raise DeadlineExceeded(endpoint)
+        self.__record(endpoint, priority, started, queued)
+        return priority
+
+    async def acquire_async(self, path: str) -> str:
+        """
+        Waits until a request may be sent, for the async api caller
+        :param path: the url fragment, grouped by its endpoint template
+        :return: the request's priority class, to pass to release
+        :raises DeadlineExceeded: when the request cannot be sent before the deadline
+        """
+        endpoint = endpoint_template(path)
+        priority = _priority.get()
+        started = time.monotonic()
+        queued = False
+        while True:
+            wait, taken = self.__reserve(endpoint, priority)
+            if wait > 0:
+                queued = True
+                await asyncio.sleep(wait)
+            if taken:
+                break
+        with self.__lock:
+            waiter = None
+            if not self.__admit(priority):
+                waiter = asyncio.get_running_loop().create_future()
+                self.__enqueue(priority, waiter)
+        if waiter is not None:
+            queued = True
+            try:
+                # A released slot is handed over by completing the future
+                await asyncio.wait_for(waiter, remaining())
+            except (asyncio.TimeoutError, asyncio.CancelledError) as error:
+                with self.__lock:
+                    self.__withdraw(priority, waiter)
+                    if not isinstance(error, asyncio.CancelledError):
+                        self.__classes[priority].rejected += 1
+                if waiter.done() and not waiter.cancelled():
+                    self.release(priority)
+                if isinstance(error, asyncio.CancelledError):
+                    raise
+                raise DeadlineExceeded(endpoint) from None
+        self.__record(endpoint, priority, started, queued)
+        return priority
+
+    def release(self, priority: str = INTERACTIVE):
+        """
+        Frees the in-flight slot taken by acquire, handing it to the longest waiting request of the highest
+        priority class that may take it
+        :param priority: the priority class returned by acquire
+        """
+        with self.__lock:
+            self.__classes[priority].in_flight -= 1
+            for waiting in PRIORITIES:
+                while self.__waiters[waiting] and self.__eligible(waiting):
+                    waiter = self.__dequeue(waiting)
+                    if isinstance(waiter, _ThreadWaiter):
+                        waiter.granted = True
+                        waiter.event.set()
+                    else:
+                        loop = waiter.get_loop()
+                        if loop.is_closed():
+                            continue
+                        loop.call_soon_threadsafe(_hand_over, waiter, self, waiting)
+                    # The slot moves to the waiter, the total in flight is unchanged
+                    self.__classes[waiting].in_flight += 1
+                    return
+            self.__in_flight -= 1
+
+    def stats(self) -> dict:
+        """
+        :return: dictionary with the configured limits, the requests in flight and queued, and how long
+            requests waited to be sent, in total and per priority class
+        """
+        limits = self.rate_limits()
+        with self.__lock:
+            classes = {
+                priority: {
+                    "in_flight": stats.in_flight,
+                    "waiting": len(self.__waiters[priority]),
+                    "admitted": stats.admitted,
+                    "queued": stats.queued,
+                    "rejected": stats.rejected,
+                    "queue_seconds": round(stats.queue_seconds, 4),
+                    "max_queue_seconds": round(stats.max_queue_seconds, 4),
+                }
+                for priority, stats in self.__classes.items()
+            }
+            in_flight = self.__in_flight
+        totals = {
+            key: sum(stats[key] for stats in classes.values())
+            for key in ("waiting", "admitted", "queued", "rejected")
+        }
+        return {
+            "rate_limit": self.rate_limit() or None,
+            "rate_limits": dict(limits),
+            "max_in_flight": self.max_in_flight() or None,
+            "background_max_in_flight": self.background_max_in_flight() or None,
+            "in_flight": in_flight,
+            **totals,
+            "queue_seconds": round(sum(stats["queue_seconds"] for stats in classes.values()), 4),
+            "max_queue_seconds": max(stats["max_queue_seconds"] for stats in classes.values()),
+            "priorities": classes,
+        }
+
+
+def _hand_over(waiter, throttle: Throttle, priority: str):
+    # Runs on the waiter's loop. A waiter that gave up in the meantime passes the slot on.
+    if waiter.done():
+        throttle.release(priority)
+    else:
+        waiter.set_result(None)
@@ -0,0 +1,220 @@
+import contextvars
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+from fastmcp.server.middleware import Middleware
+
+from config import env_int
+from endpoints import endpoint_template
+
+_current = contextvars.ContextVar("atlas_trace_span", default=None)
+
+
+class _NoopSpan:
+    """
+    Returned instead of a span when tracing is disabled or there is no trace to attach to
+    """
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def set(self, **attributes):
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class _Trace:
+    __slots__ = ("trace_id", "started", "spans", "finished")
+
+    def __init__(self):
+        self.trace_id = os.urandom(8).hex()
+        self.started = time.perf_counter()
+        self.spans = []
+        self.finished = False
+
+
+class Span:
+    __slots__ = ("tracer", "trace", "name", "attributes", "span_id", "parent_id", "started", "token", "error")
+
+    def __init__(self, tracer, trace: _Trace, name: str, parent_id: str, attributes: dict):
+        self.tracer = tracer
+        self.trace = trace
+        self.name = name
+        self.attributes = attributes
+        self.span_id = os.urandom(4).hex()
+        self.parent_id = parent_id
+        self.started = 0.0
+        self.token = None
+        self.error = None
+
+    def set(self, **attributes):
+        """
+        Adds attributes to the span, e.g. the status of a response
+        """
+        self.attributes.update(attributes)
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        self.token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        finished = time.perf_counter()
+        _current.reset(self.token)
+        if exc is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        self.tracer._finish(self, finished)
+        return False
+
+    def to_dict(self, finished: float) -> dict:
+        record = {
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "offset_ms": round((self.started - self.trace.started) * 1000, 3),
+            "duration_ms": round((finished - self.started) * 1000, 3),
+            **self.attributes,
+        }
+        if self.error:
+            record["error"] = self.error
+        return record
+
+
+class Tracer:
+    """
+    Records a trace per tool call: a root span for the call and child spans for the work done on its behalf,
+    such as api requests and response decoding. Finished traces are kept in a ring buffer of the most recent
+    TRACE_BUFFER_SIZE traces (default 100) and, with TRACING=jsonl, appended to TRACE_PATH (default traces.jsonl)
+    as one json object per line. Tracing is off unless TRACING is set to memory or jsonl; spans are then no-ops.
+    """
+
+    def __init__(self, mode: str = None, path: str = None, buffer_size: int = None):
+        mode = (os.getenv("TRACING", "off") if mode is None else mode).strip().lower()
+        if mode not in ("off", "memory", "jsonl"):
+            raise ValueError(f"Unsupported TRACING '{mode}', expected 'off', 'memory' or 'jsonl'")
+        self.mode = mode
+        self.enabled = mode != "off"
+        self.path = path or os.getenv("TRACE_PATH", "traces.jsonl")
+        self.__traces = deque(maxlen=buffer_size or env_int("TRACE_BUFFER_SIZE", 100))
+        self.__lock = threading.Lock()
+
+    def trace(self, name: str, **attributes):
+        """
+        Starts a new trace with a root span, used as a context manager
+        :param name: the span name, e.g. the tool name
+        :param attributes: span attributes
+        :return: the root span, or a no-op span when tracing is disabled
+        """
+        if not self.enabled:
+            return _NOOP
+        return Span(self, _Trace(), name, None, attributes)
+
+    def span(self, name: str, **attributes):
+        """
+        Starts a child span of the current span, used as a context manager
+        :param name: the span name
+        :param attributes: span attributes
+        :return: the span, or a no-op span when tracing is disabled or no trace is active
+        """
+        if not self.enabled:
+            return _NOOP
+        parent = _current.get()
+        if parent is None:
+            return _NOOP
+        return Span(self, parent.trace, name, parent.span_id, attributes)
+
+    def _finish(self, span: Span, finished: float):
+        trace = span.trace
+        with self.__lock:
+            if trace.finished:
+                # Work that outlived its tool call, e.g. a request still running after a timeout
+                return
+            if span.parent_id is not None:
+                trace.spans.append(span.to_dict(finished))
+                return
+            trace.finished = True
+        root = span.to_dict(finished)
+        record = {
+            "trace_id": trace.trace_id,
+            "name": span.name,
+            "start": datetime.fromtimestamp(time.time() - root["duration_ms"] / 1000, timezone.utc).isoformat(),
+            "duration_ms": root["duration_ms"],
+            "status": "error" if span.error else "ok",
+            **span.attributes,
+            "spans": sorted(trace.spans, key=lambda child: child["offset_ms"]),
+        }
+        if span.error:
+            record["error"] = span.error
+        with self.__lock:
+            self.__traces.append(record)
+            if self.mode == "jsonl":
+                self.__write(record)
+
+    def __write(self, record: dict):
+        """
+        Appends a trace to the jsonl file. Must be called while holding the lock.
+        """
+        try:
+            with open(self.path, "a", encoding="utf-8") as file:
+                file.write(json.dumps(record, default=str) + "\n")
+        except OSError:
+            # Traces are diagnostics, a full disk or unwritable path must not fail tool calls
+            pass
+
+    def recent(self, limit: int = 20, name: str = None, min_duration_ms: float = None) -> list:
+        """
+        Returns the most recent finished traces, newest first
+        :param limit: max traces to return
+        :param name: only return traces with this root span name
+        :param min_duration_ms: only return traces that took at least this long
+        :return: list of traces
+        """
+        with self.__lock:
+            traces = list(self.__traces)
+        traces.reverse()
+        if name:
+            traces = [trace for trace in traces if trace["name"] == name]
+        if min_duration_ms is not None:
+            traces = [trace for trace in traces if trace["duration_ms"] >= min_duration_ms]
+        return traces[:max(limit, 0)]
+
+    def clear(self):
+        with self.__lock:
+            self.__traces.clear()
+
+
+tracer = Tracer()
+
+
+def upstream_span(method: str, path: str):
+    """
+    Starts a child span for an api request, labelled by endpoint template
+    :param method: the http method
+    :param path: the url fragment
+    :return: the span, or a no-op span when tracing is disabled or no trace is active
+    """
+    if not tracer.enabled or _current.get() is None:
+        return _NOOP
+    return tracer.span("upstream", method=method, endpoint=endpoint_template(path))
+
+
+class ToolTracingMiddleware(Middleware):
+    """
+    Starts a trace for every tool call, including tools of mounted servers
+    """
+
+    async def on_call_tool(self, context, call_next):
+        if not tracer.enabled:
+            return await call_next(context)
+        with tracer.trace(context.message.name, kind="tool"):
+            return await call_next(context)
@@ -1,3 +1,4 @@
+import inspect
 import os
 import sys
 from typing import Any, Dict, Optional, Tuple
@@ -22,12 +23,13 @@ def load_api_calls_module(reload: bool = False):
 
 
 class FakeResponse:
-    def __init__(self, json_data: Any, raise_error: Optional[Exception] = None, status_code: int = 200, content: Optional[bytes] = None):
+    def __init__(self, json_data: Any, raise_error: Optional[Exception] = None, status_code: int = 200, content: Optional[bytes] = None, headers: Optional[Dict[str, str]] = None):
         self._json_data = json_data
         self._raise_error = raise_error
         self.status_code = status_code
         self.raise_called = False
         self._content = content
+        self.headers = headers or {}
 
     @property
     def content(self) -> bytes:
@@ -57,9 +59,26 @@ class RequestsSpy:
         self.get_calls: list[Tuple[str, Optional[Dict[str, Any]], Optional[int]]] = []
         self.post_calls: list[Tuple[str, Optional[Dict[str, Any]], Optional[int]]] = []
         self.put_calls: list[Tuple[str, Optional[Dict[str, Any]], Optional[int]]] = []
+        self.get_headers: list[Optional[Dict[str, str]]] = []
+        self.headers: Dict[str, str] = {}
+        self.sessions_created = 0
+        self.mounted: list[str] = []
+        self.closed = 0
 
-    def get(self, url: str, params: Dict[str, Any] | None = None, timeout: Optional[int] = None):
+    def Session(self):
+        # The spy doubles as the pooled session so call assertions stay in one place
+        self.sessions_created += 1
+        return self
+
+    def mount(self, prefix: str, adapter: Any):
+        self.mounted.append(prefix)
+
+    def close(self):
+        self.closed += 1
+
+    def get(self, url: str, params: Dict[str, Any] | None = None, headers: Dict[str, str] | None = None, timeout: Optional[int] = None):
         self.get_calls.append((url, params, timeout))
+        self.get_headers.append(headers)
         return self.response
 
     def post(self, url: str, json: Dict[str, Any] | None = None, timeout: Optional[int] = None):
@@ -244,3 +263,902 @@ def test_call_put_returns_none_on_empty_content(monkeypatch: pytest.MonkeyPatch)
     result_empty = caller.call_put("/no-content")
     assert result_empty is None
     assert spy.put_calls == [("http://z/no-content", None, 10)]
+
+
+def test_session_is_reused_across_calls(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("API_URL", "http://pool")
+    api_calls = load_api_calls_module(reload=True)
+
+    spy = RequestsSpy(FakeResponse(json_data={"ok": True}))
+    monkeypatch.setattr(api_calls, "requests", spy)
+
+    caller = api_calls.ApiCaller()
+    caller.call_get("/a")
+    caller.call_post("/b", body={})
+    caller.call_put("/c", body={})
+
+    assert spy.sessions_created == 1
+    assert spy.mounted == ["http://", "https://"]
+    assert "Connection" not in spy.headers
+    stats = caller.pool_stats()
+    assert stats["requests"] == 3
+    assert stats["sessions_created"] == 1
+
+
+def test_pool_settings_read_from_env(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("API_POOL_SIZE", "4")
+    monkeypatch.setenv("API_KEEP_ALIVE", "false")
+    monkeypatch.setenv("API_CONNECTION_MAX_AGE", "30")
+    api_calls = load_api_calls_module(reload=True)
+
+    spy = RequestsSpy(FakeResponse(json_data={}))
+    monkeypatch.setattr(api_calls, "requests", spy)
+
+    caller = api_calls.ApiCaller()
+    caller.call_get("/a")
+
+    stats = caller.pool_stats()
+    assert stats["pool_size"] == 4
+    assert stats["keep_alive"] is False
+    assert stats["max_connection_age"] == 30.0
+    assert spy.headers["Connection"] == "close"
+
+
+def test_session_recycled_after_max_connection_age(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("API_CONNECTION_MAX_AGE", "60")
+    api_calls = load_api_calls_module(reload=True)
+
+    spy = RequestsSpy(FakeResponse(json_data={}))
+    monkeypatch.setattr(api_calls, "requests", spy)
+    clock = {"now": 1000.0}
+    monkeypatch.setattr(api_calls.time, "monotonic", lambda: clock["now"])
+
+    caller = api_calls.ApiCaller()
+    caller.call_get("/a")
+    clock["now"] += 30
+    caller.call_get("/a")
+    assert spy.sessions_created == 1
+
+    clock["now"] += 61
+    caller.call_get("/a")
+    assert spy.sessions_created == 2
+    assert spy.closed == 1
+
+
+def test_pool_stats_report_connection_reuse(monkeypatch: pytest.MonkeyPatch):
+    import json
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            body = json.dumps({"path": self.path}).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        monkeypatch.setenv("API_URL", f"http://127.0.0.1:{server.server_address[1]}")
+        api_calls = load_api_calls_module(reload=True)
+        caller = api_calls.ApiCaller()
+        for _ in range(5):
+            assert caller.call_get("/health") == {"path": "/health"}
+
+        stats = caller.pool_stats()
+        assert stats["connections_opened"] == 1
+        assert stats["connections_reused"] == 4
+        assert stats["reuse_rate"] == 0.8
+        caller.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+class AsyncClientSpy:
+    """Builds real httpx.AsyncClients routed through a MockTransport and records every request."""
+
+    def __init__(self, handler):
+        import httpx
+
+        self.requests: list = []
+        self.clients: list = []
+        self.kwargs: list[Dict[str, Any]] = []
+
+        def record(request):
+            self.requests.append(request)
+            return handler(request)
+
+        self._transport = httpx.MockTransport(record)
+        self._client_cls = httpx.AsyncClient
+
+    def __call__(self, **kwargs):
+        self.kwargs.append(kwargs)
+        client = self._client_cls(transport=self._transport, **kwargs)
+        self.clients.append(client)
+        return client
+
+
+async def test_async_caller_get_uses_base_url_params_and_pool(monkeypatch: pytest.MonkeyPatch):
+    import httpx
+
+    monkeypatch.setenv("API_URL", "http://async-host")
+    monkeypatch.setenv("API_POOL_SIZE", "3")
+    api_calls = load_api_calls_module(reload=True)
+    spy = AsyncClientSpy(lambda request: httpx.Response(200, json={"path": request.url.path}))
+    monkeypatch.setattr(api_calls.httpx, "AsyncClient", spy)
+
+    caller = api_calls.AsyncApiCaller()
+    first = await caller.call_get("services", params={"page": 2})
+    second = await caller.call_get("/teams")
+
+    assert first == {"path": "/services"}
+    assert second == {"path": "/teams"}
+    assert str(spy.requests[0].url) == "http://async-host/services?page=2"
+    assert len(spy.clients) == 1
+    assert spy.kwargs[0]["limits"].max_connections == 3
+    stats = caller.pool_stats()
+    assert stats["requests"] == 2
+    assert stats["clients_created"] == 1
+    assert stats["in_flight"] == 0
+    await caller.aclose()
+
+
+async def test_async_caller_post_put_return_json_or_none(monkeypatch: pytest.MonkeyPatch):
+    import json
+    import httpx
+
+    def handler(request):
+        if request.url.path == "/empty":
+            return httpx.Response(201)
+        return httpx.Response(200, json={"method": request.method, "body": json.loads(request.content)})
+
+    api_calls = load_api_calls_module(reload=True)
+    monkeypatch.setattr(api_calls.httpx, "AsyncClient", AsyncClientSpy(handler))
+
+    caller = api_calls.AsyncApiCaller()
+    assert await caller.call_post("/create", body={"name": "a"}) == {"method": "POST", "body": {"name": "a"}}
+    assert await caller.call_put("/update", body={"name": "b"}) == {"method": "PUT", "body": {"name": "b"}}
+    assert await caller.call_post("/empty", body={}) is None
+    await caller.aclose()
+
+
+async def test_async_caller_raises_for_http_error(monkeypatch: pytest.MonkeyPatch):
+    import httpx
+
+    api_calls = load_api_calls_module(reload=True)
+    monkeypatch.setattr(api_calls.httpx, "AsyncClient", AsyncClientSpy(lambda request: httpx.Response(502)))
+
+    caller = api_calls.AsyncApiCaller()
+    with pytest.raises(httpx.HTTPStatusError):
+        await caller.call_get("/err")
+    await caller.aclose()
+
+
+async def test_async_caller_recycles_client_after_max_connection_age(monkeypatch: pytest.MonkeyPatch):
+    import httpx
+
+    monkeypatch.setenv("API_CONNECTION_MAX_AGE", "60")
+    api_calls = load_api_calls_module(reload=True)
+    spy = AsyncClientSpy(lambda request: httpx.Response(200, json={}))
+    monkeypatch.setattr(api_calls.httpx, "AsyncClient", spy)
+    clock = {"now": 1000.0}
+    monkeypatch.setattr(api_calls.time, "monotonic", lambda: clock["now"])
+
+    caller = api_calls.AsyncApiCaller()
+    await caller.call_get("/a")
+    clock["now"] += 61
+    await caller.call_get("/a")
+
+    assert len(spy.clients) == 2
+    # The retired client had no requests in flight, so it is closed straight away
+    assert spy.clients[0].is_closed
+    assert not spy.clients[1].is_closed
+    await caller.aclose()
+
+
+def test_create_api_caller_switch(monkeypatch: pytest.MonkeyPatch):
+    api_calls = load_api_calls_module(reload=True)
+
+    monkeypatch.delenv("API_CLIENT", raising=False)
+    assert isinstance(api_calls.create_api_caller(), api_calls.AsyncApiCaller)
+    monkeypatch.setenv("API_CLIENT", "sync")
+    assert isinstance(api_calls.create_api_caller(), api_calls.ApiCaller)
+    monkeypatch.setenv("API_CLIENT", "threads")
+    with pytest.raises(ValueError):
+        api_calls.create_api_caller()
+
+
+async def test_call_api_awaits_async_and_offloads_sync_methods():
+    import threading
+
+    api_calls = load_api_calls_module(reload=True)
+    seen_threads = []
+
+    def sync_get(url, params=None):
+        seen_threads.append(threading.current_thread())
+        return {"url": url, "params": params}
+
+    async def async_get(url, params=None):
+        return {"url": url}
+
+    assert await api_calls.call_api(sync_get, "/a", params={"x": 1}) == {"url": "/a", "params": {"x": 1}}
+    assert seen_threads[0] is not threading.current_thread()
+    assert await api_calls.call_api(async_get, "/b") == {"url": "/b"}
+
+
+def test_call_get_serves_cacheable_endpoints_from_cache(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("API_URL", "http://cache")
+    api_calls = load_api_calls_module(reload=True)
+
+    spy = RequestsSpy(FakeResponse(json_data=["service", "database"]))
+    monkeypatch.setattr(api_calls, "requests", spy)
+
+    caller = api_calls.ApiCaller()
+    assert caller.call_get("/services/types") == ["service", "database"]
+    assert caller.call_get("services/types") == ["service", "database"]
+
+    assert spy.get_calls == [("http://cache/services/types", None, 10)]
+    stats = caller.cache_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+
+def test_call_post_invalidates_cached_reads(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("API_URL", "http://cache")
+    api_calls = load_api_calls_module(reload=True)
+
+    spy = RequestsSpy(FakeResponse(json_data=[{"id": "d1"}]))
+    monkeypatch.setattr(api_calls, "requests", spy)
+
+    caller = api_calls.ApiCaller()
+    caller.call_get("/services/abc/debt")
+    caller.call_post("/services/abc/debt", body={"title": "t"})
+    caller.call_get("/services/abc/debt")
+
+    assert len(spy.get_calls) == 2
+    assert caller.cache_stats()["invalidations"] == 1
+
+
+def test_cache_can_be_disabled_and_ttls_overridden(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("API_CACHE_ENABLED", "false")
+    api_calls = load_api_calls_module(reload=True)
+    spy = RequestsSpy(FakeResponse(json_data=[]))
+    monkeypatch.setattr(api_calls, "requests", spy)
+
+    caller = api_calls.ApiCaller()
+    caller.call_get("/services/types")
+    caller.call_get("/services/types")
+    assert len(spy.get_calls) == 2
+
+    monkeypatch.setenv("API_CACHE_ENABLED", "true")
+    monkeypatch.setenv("API_CACHE_TTLS", '{"/services/types": 0, "/health": 60}')
+    caller = api_calls.ApiCaller()
+    spy.get_calls = []
+    caller.call_get("/services/types")
+    caller.call_get("/services/types")
+    caller.call_get("/health")
+    caller.call_get("/health")
+    assert [call[0] for call in spy.get_calls] == [
+        "http://localhost:8080/services/types",
+        "http://localhost:8080/services/types",
+        "http://localhost:8080/health",
+    ]
+
+
+async def test_async_caller_caches_and_invalidates(monkeypatch: pytest.MonkeyPatch):
+    import httpx
+
+    api_calls = load_api_calls_module(reload=True)
+    spy = AsyncClientSpy(lambda request: httpx.Response(200, json=[{"id": "s1"}]))
+    monkeypatch.setattr(api_calls.httpx, "AsyncClient", spy)
+
+    caller = api_calls.AsyncApiCaller()
+    await caller.call_get("/teams", params={"page": 1, "pageSize": 20})
+    await caller.call_get("/teams", params={"page": 1, "pageSize": 20})
+    await caller.call_post("/services", body={"name": "new"})
+    await caller.call_get("/services", params={"page": 1, "pageSize": 25})
+    await caller.call_get("/services", params={"page": 1, "pageSize": 25})
+
+    assert [request.method for request in spy.requests] == ["GET", "POST", "GET"]
+    assert caller.cache_stats()["hits"] == 2
+    await caller.aclose()
+
+
+async def test_async_caller_coalesces_identical_concurrent_gets(monkeypatch: pytest.MonkeyPatch):
+    import asyncio
+    import httpx
+
+    api_calls = load_api_calls_module(reload=True)
+    release = asyncio.Event()
+
+    async def handler(request):
+        await release.wait()
+        return httpx.Response(200, json=[{"name": "svc", "count": 3}])
+
+    spy = AsyncClientSpy(handler)
+    monkeypatch.setattr(api_calls.httpx, "AsyncClient", spy)
+
+    caller = api_calls.AsyncApiCaller()
+    # /health is not cacheable, so only single flight can save the duplicate requests
+    tasks = [asyncio.create_task(caller.call_get("/health")) for _ in range(3)]
+    await asyncio.sleep(0.01)
+    release.set()
+    results = await asyncio.gather(*tasks)
+
+    assert len(spy.requests) == 1
+    assert results[0] is results[1] is results[2]
+    assert caller.coalescing_stats() == {"leaders": 1, "coalesced": 2, "enabled": True}
+    await caller.aclose()
+
+
+async def test_async_caller_does_not_coalesce_tool_calls_onto_background_requests(monkeypatch: pytest.MonkeyPatch):
+    import asyncio
+    import httpx
+
+    api_calls = load_api_calls_module(reload=True)
+    throttling = import_module("throttling")
+    release = asyncio.Event()
+
+    async def handler(request):
+        await release.wait()
+        return httpx.Response(200, json={"status": "ok"})
+
+    spy = AsyncClientSpy(handler)
+    monkeypatch.setattr(api_calls.httpx, "AsyncClient", spy)
+    caller = api_calls.AsyncApiCaller()
+
+    async def background_get():
+        with throttling.request_priority(throttling.BACKGROUND):
+            return await caller.call_get("/health")
+
+    tasks = [asyncio.create_task(background_get()) for _ in range(2)]
+    await asyncio.sleep(0.01)
+    tasks.append(asyncio.create_task(caller.call_get("/health")))
+    await asyncio.sleep(0.01)
+    release.set()
+    await asyncio.gather(*tasks)
+
+    # The background refreshes share one request, the tool call sends its own at interactive priority
+    assert len(spy.requests) == 2
+    assert caller.coalescing_stats() == {"leaders": 2, "coalesced": 1, "enabled": True}
+    await caller.aclose()
+
+
+async def test_single_flight_can_be_disabled(monkeypatch: pytest.MonkeyPatch):
+    import asyncio
+    import httpx
+
+    monkeypatch.setenv("API_SINGLE_FLIGHT", "false")
+    api_calls = load_api_calls_module(reload=True)
+    spy = AsyncClientSpy(lambda request: httpx.Response(200, json={}))
+    monkeypatch.setattr(api_calls.httpx, "AsyncClient", spy)
+
+    caller = api_calls.AsyncApiCaller()
+    await asyncio.gather(caller.call_get("/health"), caller.call_get("/health"))
+
+    assert len(spy.requests) == 2
+    assert caller.coalescing_stats()["enabled"] is False
+    await caller.aclose()
+
+
+def test_sync_caller_coalesces_identical_concurrent_gets(monkeypatch: pytest.MonkeyPatch):
+    import threading
+    import time
+
+    api_calls = load_api_calls_module(reload=True)
+
+    class SlowSpy(RequestsSpy):
+        def get(self, url, params=None, headers=None, timeout=None):
+            time.sleep(0.05)
+            return super().get(url, params=params, headers=headers, timeout=timeout)
+
+    spy = SlowSpy(FakeResponse(json_data={"ok": True}))
+    monkeypatch.setattr(api_calls, "requests", spy)
+    caller = api_calls.ApiCaller()
+
+    threads = [threading.Thread(target=caller.call_get, args=("/health",)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(spy.get_calls) < 4
+    stats = caller.coalescing_stats()
+    assert stats["leaders"] + stats["coalesced"] == 4
+    assert stats["leaders"] == len(spy.get_calls)
+
+
+def test_sync_caller_revalidates_with_etag_and_serves_304_from_cache(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("API_CACHE_TTLS", '{"/reports/services/debt": 0}')
+    api_calls = load_api_calls_module(reload=True)
+
+    payload = [{"name": "orders", "count": 3}]
+    spy = RequestsSpy(FakeResponse(json_data=payload, headers={"ETag": '"abc"'}))
+    monkeypatch.setattr(api_calls, "requests", spy)
+    caller = api_calls.ApiCaller()
+
+    first = caller.call_get("/reports/services/debt")
+    spy.response = FakeResponse(json_data=None, status_code=304)
+    second = caller.call_get("/reports/services/debt")
+
+    assert second is first
+    assert spy.get_headers == [None, {"If-None-Match": '"abc"'}]
+    stats = caller.cache_stats()
+    assert stats["revalidations"] == 1
+    assert stats["not_modified"] == 1
+    assert stats["bytes_saved"] == len(FakeResponse(json_data=payload).content)
+
+
+async def test_async_caller_revalidates_and_replaces_changed_body(monkeypatch: pytest.MonkeyPatch):
+    import httpx
+
+    monkeypatch.setenv("API_CACHE_TTLS", '{"/teams": 0}')
+    api_calls = load_api_calls_module(reload=True)
+    versions = {"current": "v1"}
+
+    def handler(request):
+        etag = f'"{versions["current"]}"'
+        if request.headers.get("If-None-Match") == etag:
+            return httpx.Response(304)
+        return httpx.Response(200, json=[{"id": versions["current"]}], headers={"ETag": etag})
+
+    spy = AsyncClientSpy(handler)
+    monkeypatch.setattr(api_calls.httpx, "AsyncClient", spy)
+    caller = api_calls.AsyncApiCaller()
+
+    assert await caller.call_get("/teams", params={"page": 1}) == [{"id": "v1"}]
+    assert await caller.call_get("/teams", params={"page": 1}) == [{"id": "v1"}]
+    versions["current"] = "v2"
+    assert await caller.call_get("/teams", params={"page": 1}) == [{"id": "v2"}]
+
+    assert [request.headers.get("If-None-Match") for request in spy.requests] == [None, '"v1"', '"v1"']
+    stats = caller.cache_stats()
+    assert stats["revalidations"] == 2
+    assert stats["not_modified"] == 1
+    await caller.aclose()
+
+
+def test_persistent_cache_serves_a_new_caller_without_a_request(monkeypatch: pytest.MonkeyPatch, tmp_path):
+    monkeypatch.setenv("API_URL", "http://cache")
+    monkeypatch.setenv("API_CACHE_PATH", str(tmp_path / "cache.sqlite"))
+    api_calls = load_api_calls_module(reload=True)
+
+    spy = RequestsSpy(FakeResponse(json_data=["service", "database"]))
+    monkeypatch.setattr(api_calls, "requests", spy)
+    assert api_calls.ApiCaller().call_get("/services/types") == ["service", "database"]
+
+    restarted = api_calls.ApiCaller()
+    assert restarted.call_get("/services/types") == ["service", "database"]
+    assert len(spy.get_calls) == 1
+    assert restarted.cache_stats()["disk_loads"] == 1
+
+
+async def test_async_caller_keeps_persistent_cache_io_off_the_event_loop(monkeypatch: pytest.MonkeyPatch, tmp_path):
+    import threading
+    import httpx
+
+    monkeypatch.setenv("API_CACHE_PATH", str(tmp_path / "cache.sqlite"))
+    api_calls = load_api_calls_module(reload=True)
+    disk_cache = import_module("disk_cache")
+    loop_thread = threading.get_ident()
+    threads = []
+    for name in ("get", "put", "delete_templates"):
+        original = getattr(disk_cache.DiskCache, name)
+
+        def record(self, *args, __original=original, **kwargs):
+            threads.append(threading.get_ident())
+            return __original(self, *args, **kwargs)
+
+        monkeypatch.setattr(disk_cache.DiskCache, name, record)
+    monkeypatch.setattr(api_calls.httpx, "AsyncClient", AsyncClientSpy(lambda request: httpx.Response(200, json=[])))
+    caller = api_calls.AsyncApiCaller()
+
+    await caller.call_get("/teams")
+    # A miss reads the store once, then writes the response through to it
+    assert caller.cache_stats()["disk"]["reads"] == 1
+    assert caller.cache_stats()["disk"]["writes"] == 1
+    await caller.call_get("/teams")
+    await caller.call_post("/services", {"name": "svc"})
+    await caller.aclose()
+
+    assert len(threads) == 3
+    assert loop_thread not in threads
+
+
+async def test_close_api_caller_closes_sync_and_async_callers(monkeypatch: pytest.MonkeyPatch):
+    api_calls = load_api_calls_module(reload=True)
+    closed = []
+
+    class SyncCaller:
+        def close(self):
+            closed.append("sync")
+
+    class AsyncCaller(api_calls.AsyncApiCaller):
+        async def aclose(self):
+            closed.append("async")
+
+    await api_calls.close_api_caller(SyncCaller())
+    await api_calls.close_api_caller(AsyncCaller())
+    assert closed == ["sync", "async"]
+
+
+def test_sync_caller_records_upstream_metrics_by_endpoint_template(monkeypatch: pytest.MonkeyPatch):
+    api_calls = load_api_calls_module(reload=True)
+    metrics = import_module("metrics")
+    metrics.registry.reset()
+
+    spy = RequestsSpy(FakeResponse(json_data=[{"id": "s1"}]))
+    monkeypatch.setattr(api_calls, "requests", spy)
+    caller = api_calls.ApiCaller()
+    caller.call_get("/services/4f9a2c1e-1111/dependents")
+    caller.call_post("/services/4f9a2c1e-1111/debt", body={"title": "t"})
+
+    totals = metrics.registry.snapshot()["atlas_upstream_requests_total"]
+    assert {"labels": {"endpoint": "/services/{id}/dependents", "method": "GET", "status": "200"}, "value": 1} in totals
+    assert {"labels": {"endpoint": "/services/{id}/debt", "method": "POST", "status": "200"}, "value": 1} in totals
+    metrics.registry.reset()
+
+
+async def test_async_caller_records_upstream_metrics(monkeypatch: pytest.MonkeyPatch):
+    import httpx
+
+    # One attempt only, retries are covered by their own tests
+    monkeypatch.setenv("API_RETRIES", "0")
+    api_calls = load_api_calls_module(reload=True)
+    metrics = import_module("metrics")
+    metrics.registry.reset()
+    spy = AsyncClientSpy(lambda request: httpx.Response(503))
+    monkeypatch.setattr(api_calls.httpx, "AsyncClient", spy)
+    caller = api_calls.AsyncApiCaller()
+
+    with pytest.raises(httpx.HTTPStatusError):
+        await caller.call_get("/teams")
+
+    snapshot = metrics.registry.snapshot()
+    labels = {"endpoint": "/teams", "method": "GET"}
+    assert snapshot["atlas_upstream_requests_total"] == [{"labels": {**labels, "status": "503"}, "value": 1}]
+    assert snapshot["atlas_upstream_in_flight"] == [{"labels": labels, "value": 0}]
+    await caller.aclose()
+    metrics.registry.reset()
+
+
+class SequenceSpy(RequestsSpy):
+    """Answers requests with the given responses in turn, raising the ones that are exceptions."""
+
+    def __init__(self, responses: list):
+        super().__init__(None)
+        self.responses = list(responses)
+
+    def __next(self):
+        response = self.responses.pop(0) if len(self.responses) > 1 else self.responses[0]
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        self.get_calls.append((url, params, timeout))
+        return self.__next()
+
+    def post(self, url, json=None, timeout=None):
+        self.post_calls.append((url, json, timeout))
+        return self.__next()
+
+
+@pytest.fixture
+def fast_retries(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("API_RETRY_BASE_DELAY", "0.001")
+    monkeypatch.setenv("API_RETRY_MAX_DELAY", "0.01")
+
+
+def test_sync_caller_retries_transient_get_failures(monkeypatch: pytest.MonkeyPatch, fast_retries):
+    import requests
+
+    api_calls = load_api_calls_module(reload=True)
+    metrics = import_module("metrics")
+    metrics.registry.reset()
+    spy = SequenceSpy([
+        requests.ConnectionError("refused"), FakeResponse(json_data=None, status_code=502), FakeResponse(json_data=[1]),
+    ])
+    monkeypatch.setattr(api_calls, "requests", spy)
+
+    result = api_calls.ApiCaller().call_get("/teams")
+
+    assert result == [1]
+    assert len(spy.get_calls) == 3
+    retries = metrics.registry.snapshot()["atlas_upstream_retries_total"]
+    assert {retry["labels"]["reason"] for retry in retries} == {"ConnectionError", "502"}
+    metrics.registry.reset()
+
+
+def test_sync_caller_gives_up_after_max_retries_and_never_retries_writes(monkeypatch: pytest.MonkeyPatch, fast_retries):
+    monkeypatch.setenv("API_RETRIES", "1")
+    api_calls = load_api_calls_module(reload=True)
+    error = RuntimeError("503")
+    spy = SequenceSpy([FakeResponse(json_data=None, status_code=503, raise_error=error)])
+    monkeypatch.setattr(api_calls, "requests", spy)
+    caller = api_calls.ApiCaller()
+
+    with pytest.raises(RuntimeError):
+        caller.call_get("/teams")
+    with pytest.raises(RuntimeError):
+        caller.call_post("/services", body={})
+
+    assert len(spy.get_calls) == 2
+    assert len(spy.post_calls) == 1
+
+
+def test_sync_caller_does_not_retry_client_errors(monkeypatch: pytest.MonkeyPatch, fast_retries):
+    api_calls = load_api_calls_module(reload=True)
+    spy = SequenceSpy([FakeResponse(json_data=None, status_code=404, raise_error=RuntimeError("404"))])
+    monkeypatch.setattr(api_calls, "requests", spy)
+
+    with pytest.raises(RuntimeError):
+        api_calls.ApiCaller().call_get("/services/1234")
+
+    assert len(spy.get_calls) == 1
+
+
+async def test_async_caller_opens_circuit_and_fails_fast(monkeypatch: pytest.MonkeyPatch):
+    import httpx
+
+    monkeypatch.setenv("API_RETRIES", "0")
+    monkeypatch.setenv("API_CIRCUIT_FAILURE_THRESHOLD", "2")
+    api_calls = load_api_calls_module(reload=True)
+    resilience = import_module("resilience")
+    spy = AsyncClientSpy(lambda request: httpx.Response(503 if request.url.path == "/teams" else 200, json=[]))
+    monkeypatch.setattr(api_calls.httpx, "AsyncClient", spy)
+    caller = api_calls.AsyncApiCaller()
+
+    for _ in range(2):
+        with pytest.raises(httpx.HTTPStatusError):
+            await caller.call_get("/teams")
+    with pytest.raises(resilience.CircuitOpenError):
+        await caller.call_get("/teams")
+    # Other endpoints have their own circuit
+    assert await caller.call_get("/services/types") == []
+
+    assert len(spy.requests) == 3
+    stats = caller.resilience_stats()
+    assert stats["circuits"]["/teams"]["state"] == "open"
+    assert stats["rejected"] == 1
+    await caller.aclose()
+
+
+def test_sync_caller_shortens_timeouts_to_the_deadline_and_stops_when_it_passes(monkeypatch: pytest.MonkeyPatch):
+    api_calls = load_api_calls_module(reload=True)
+    deadlines = import_module("deadlines")
+    spy = RequestsSpy(FakeResponse(json_data=[]))
+    monkeypatch.setattr(api_calls, "requests", spy)
+    caller = api_calls.ApiCaller()
+
+    with deadlines.deadline(2):
+        caller.call_get("/teams")
+    with deadlines.deadline(0.001):
+        import time
+        time.sleep(0.01)
+        with pytest.raises(deadlines.DeadlineExceeded):
+            caller.call_get("/services/types")
+
+    assert len(spy.get_calls) == 1
+    assert 1.9 < spy.get_calls[0][2] <= 2
+
+
+def test_sync_caller_does_not_retry_past_the_deadline(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("API_RETRY_BASE_DELAY", "5")
+    monkeypatch.setenv("API_RETRY_MAX_DELAY", "5")
+    monkeypatch.setattr(import_module("resilience").random, "uniform", lambda low, high: high)
+    api_calls = load_api_calls_module(reload=True)
+    deadlines = import_module("deadlines")
+    spy = SequenceSpy([FakeResponse(json_data=None, status_code=503, raise_error=RuntimeError("503"))])
+    monkeypatch.setattr(api_calls, "requests", spy)
+
+    with deadlines.deadline(1), pytest.raises(RuntimeError):
+        api_calls.ApiCaller().call_get("/teams")
+
+    assert len(spy.get_calls) == 1
+
+
+async def test_async_caller_adapts_timeouts_and_reports_deadline_timeouts(monkeypatch: pytest.MonkeyPatch):
+    import asyncio
+    import httpx
+
+    monkeypatch.setenv("API_TIMEOUT_MIN_SAMPLES", "1")
+    monkeypatch.setenv("API_TIMEOUT_MIN", "2")
+    api_calls = load_api_calls_module(reload=True)
+    deadlines = import_module("deadlines")
+
+    def handler(request):
+        if request.url.path == "/slow":
+            raise httpx.ReadTimeout("timed out", request=request)
+        return httpx.Response(200, json=[])
+
+    spy = AsyncClientSpy(handler)
+    monkeypatch.setattr(api_calls.httpx, "AsyncClient", spy)
+    caller = api_calls.AsyncApiCaller()
+
+    await caller.call_get("/services/types")
+    assert caller.timeout_stats()["/services/types"]["timeout"] == 2
+    await caller.call_get("/services/types?fresh=1")
+    assert spy.requests[-1].extensions["timeout"]["read"] == 2
+
+    with deadlines.deadline(0.05):
+        await asyncio.sleep(0.06)
+        with pytest.raises(deadlines.DeadlineExceeded):
+            await caller.call_get("/slow")
+    await caller.aclose()
+
+
+async def test_async_caller_limits_requests_in_flight(monkeypatch: pytest.MonkeyPatch):
+    import asyncio
+    import httpx
+
+    monkeypatch.setenv("API_MAX_IN_FLIGHT", "2")
+    api_calls = load_api_calls_module(reload=True)
+    active = 0
+    peak = 0
+
+    async def handler(request):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return httpx.Response(200, json=[])
+
+    monkeypatch.setattr(api_calls.httpx, "AsyncClient", AsyncClientSpy(handler))
+    caller = api_calls.AsyncApiCaller()
+
+    await asyncio.gather(*(caller.call_get(f"/services/{number}/dependents") for number in range(6)))
+    await caller.aclose()
+
+    assert peak == 2
+    stats = caller.throttle_stats()
+    assert stats["max_in_flight"] == 2
+    assert stats["in_flight"] == 0
+    assert stats["queued"] == 4
+
+
+def test_call_get_ttl_overrides_the_endpoint_ttl(monkeypatch: pytest.MonkeyPatch):
+    api_calls = load_api_calls_module(reload=True)
+    spy = RequestsSpy(FakeResponse(json_data=[{"version": "1.0.0"}]))
+    monkeypatch.setattr(api_calls, "requests", spy)
+    caller = api_calls.ApiCaller()
+
+    caller.call_get("/releases/2024-01-01/2024-01-08", ttl=3600)
+    caller.call_get("/releases/2024-01-01/2024-01-08", ttl=3600)
+    # Not cached at all with a ttl of 0
+    caller.call_get("/services/types", ttl=0)
+    caller.call_get("/services/types", ttl=0)
+
+    assert [call[0] for call in spy.get_calls] == [
+        "http://localhost:8080/releases/2024-01-01/2024-01-08",
+        "http://localhost:8080/services/types",
+        "http://localhost:8080/services/types",
+    ]
+
+
+async def test_history_ttl_survives_a_304_revalidation(monkeypatch: pytest.MonkeyPatch):
+    import httpx
+
+    monkeypatch.setenv("API_CACHE_TTLS", '{"/releases/{start}/{end}": 0}')
+    api_calls = load_api_calls_module(reload=True)
+
+    def handler(request):
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, json=[{"version": "1.0.0"}], headers={"ETag": '"v1"'})
+
+    spy = AsyncClientSpy(handler)
+    monkeypatch.setattr(api_calls.httpx, "AsyncClient", spy)
+    caller = api_calls.AsyncApiCaller()
+
+    # Fetched with the endpoint ttl first, then revalidated as a closed history bucket
+    await caller.call_get("/releases/2024-01-01/2024-01-08")
+    for _ in range(3):
+        assert await caller.call_get("/releases/2024-01-01/2024-01-08", ttl=3600) == [{"version": "1.0.0"}]
+
+    assert [request.headers.get("If-None-Match") for request in spy.requests] == [None, '"v1"']
+    assert caller.cache_stats()["not_modified"] == 1
+    await caller.aclose()
+
+
+async def test_async_caller_follower_gives_up_at_its_own_deadline(monkeypatch: pytest.MonkeyPatch):
+    import asyncio
+    import time
+    import httpx
+
+    monkeypatch.setenv("API_RETRIES", "0")
+    api_calls = load_api_calls_module(reload=True)
+    deadlines = import_module("deadlines")
+
+    async def handler(request):
+        await asyncio.sleep(0.5)
+        return httpx.Response(200, json=[])
+
+    monkeypatch.setattr(api_calls.httpx, "AsyncClient", AsyncClientSpy(handler))
+    caller = api_calls.AsyncApiCaller()
+
+    async def follower():
+        await asyncio.sleep(0.01)
+        started = time.monotonic()
+        with deadlines.deadline(0.1):
+            with pytest.raises(deadlines.DeadlineExceeded) as raised:
+                await caller.call_get("/services/1234/dependents")
+        return time.monotonic() - started, raised.value
+
+    leader = asyncio.create_task(caller.call_get("/services/1234/dependents"))
+    waited, error = await follower()
+
+    assert waited < 0.3
+    assert error.endpoint == "/services/{id}/dependents"
+    # The leader is not affected by the follower giving up
+    assert await leader == []
+    assert caller.coalescing_stats()["coalesced"] == 1
+    await caller.aclose()
+
+
+def test_sync_caller_follower_gives_up_at_its_own_deadline(monkeypatch: pytest.MonkeyPatch):
+    import threading
+    import time
+
+    api_calls = load_api_calls_module(reload=True)
+    deadlines = import_module("deadlines")
+
+    class SlowSpy(RequestsSpy):
+        def get(self, url, params=None, headers=None, timeout=None):
+            time.sleep(0.5)
+            return super().get(url, params=params, headers=headers, timeout=timeout)
+
+    monkeypatch.setattr(api_calls, "requests", SlowSpy(FakeResponse(json_data={"ok": True})))
+    caller = api_calls.ApiCaller()
+    leader = threading.Thread(target=caller.call_get, args=("/health",))
+    leader.start()
+    time.sleep(0.05)
+
+    started = time.monotonic()
+    with deadlines.deadline(0.1), pytest.raises(deadlines.DeadlineExceeded):
+        caller.call_get("/health")
+    waited = time.monotonic() - started
+    leader.join()
+
+    assert waited < 0.3
+    assert caller.coalescing_stats() == {"leaders": 1, "coalesced": 1, "enabled": True}
+
+
+def test_sync_compatible_runs_tools_without_an_event_loop_when_client_is_sync(monkeypatch: pytest.MonkeyPatch):
+    api_calls = load_api_calls_module()
+    deadlines = import_module("deadlines")
+
+    async def tool(value: int) -> dict:
+        return {"value": value, "remaining": deadlines.remaining()}
+
+    assert api_calls.sync_compatible(tool) is tool
+    monkeypatch.setenv("API_CLIENT", "sync")
+    wrapped = api_calls.sync_compatible(tool)
+
+    with deadlines.deadline(30):
+        result = wrapped(3)
+    assert result["value"] == 3
+    # The caller's deadline is carried over to the loop running the coroutine
+    assert 0 < result["remaining"] <= 30
+    assert inspect.iscoroutinefunction(wrapped)
+
+
+async def test_sync_compatible_returns_the_coroutine_inside_an_event_loop(monkeypatch: pytest.MonkeyPatch):
+    api_calls = load_api_calls_module()
+    monkeypatch.setenv("API_CLIENT", "sync")
+
+    async def tool(value: int) -> int:
+        return value * 2
+
+    assert await api_calls.sync_compatible(tool)(4) == 8
@@ -0,0 +1,77 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+
+# Ensure the 'src' directory is on sys.path so that modules like 'batching' can be imported.
+PROJECT_ROOT = os.path.dirname(os.path.dirname(__file__))
+SRC_PATH = os.path.join(PROJECT_ROOT, "src")
+if SRC_PATH not in sys.path:
+    sys.path.insert(0, SRC_PATH)
+
+from importlib import import_module  # noqa: E402
+
+
+def load_batching_module():
+    return import_module("batching")
+
+
+def test_unique_ids_dedupes_and_keeps_order():
+    batching = load_batching_module()
+    assert batching.unique_ids(["b", "a", "b", "", None, "c"]) == ["b", "a", "c"]
+
+
+def test_unique_ids_rejects_empty_and_oversized_batches():
+    batching = load_batching_module()
+    with pytest.raises(ValueError, match="service_ids must contain at least one id"):
+        batching.unique_ids([], "service_ids")
+    with pytest.raises(ValueError, match="at most 100"):
+        batching.unique_ids([str(i) for i in range(101)])
+
+
+async def test_fan_out_collects_results_and_errors_per_key():
+    batching = load_batching_module()
+
+    async def func(key: str):
+        if key == "bad":
+            raise RuntimeError("not found")
+        return key.upper()
+
+    results, errors = await batching.fan_out(func, ["a", "bad", "b"], limit=2)
+
+    assert results == {"a": "A", "b": "B"}
+    assert errors == {"bad": "not found"}
+
+
+async def test_fan_out_bounds_concurrency(monkeypatch: pytest.MonkeyPatch):
+    batching = load_batching_module()
+    monkeypatch.setenv("API_BATCH_CONCURRENCY", "3")
+    state = {"in_flight": 0, "max": 0}
+
+    async def func(key: int):
+        state["in_flight"] += 1
+        state["max"] = max(state["max"], state["in_flight"])
+        await asyncio.sleep(0.005)
+        state["in_flight"] -= 1
+        return key
+
+    results, errors = await batching.fan_out(func, list(range(10)))
+
+    assert len(results) == 10
+    assert errors == {}
+    assert state["max"] == 3
+
+
+async def test_fan_out_requests_are_marked_as_fan_out():
+    batching = load_batching_module()
+    throttling = import_module("throttling")
+
+    async def func(key: str):
+        return throttling.current_priority()
+
+    results, _ = await batching.fan_out(func, ["a", "b"])
+
+    assert results == {"a": throttling.FAN_OUT, "b": throttling.FAN_OUT}
+    assert throttling.current_priority() == throttling.INTERACTIVE
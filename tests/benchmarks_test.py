@@ -0,0 +1,116 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+import requests
+
+
+# Ensure the 'benchmarks' directory is on sys.path so that the stub api and runner can be imported.
+PROJECT_ROOT = os.path.dirname(os.path.dirname(__file__))
+BENCHMARKS_PATH = os.path.join(PROJECT_ROOT, "benchmarks")
+if BENCHMARKS_PATH not in sys.path:
+    sys.path.insert(0, BENCHMARKS_PATH)
+
+from importlib import import_module  # noqa: E402
+
+
+def load_modules():
+    return import_module("stub_api"), import_module("run")
+
+
+@pytest.mark.parametrize("shape", ["random", "hub", "chain"])
+def test_catalog_graph_shapes_are_consistent(shape: str):
+    stub_api, _ = load_modules()
+    catalog = stub_api.Catalog(services=30, teams=4, shape=shape, fan_out=3)
+
+    edges = [(service_id, dep["id"]) for service_id, deps in catalog.dependencies.items() for dep in deps]
+    reverse = [(dependent["id"], service_id) for service_id, deps in catalog.dependents.items() for dependent in deps]
+    assert sorted(edges) == sorted(reverse)
+    if shape == "chain":
+        assert len(edges) == 29
+
+
+def test_catalog_is_deterministic_per_seed():
+    stub_api, _ = load_modules()
+    first = stub_api.Catalog(services=20, seed=7)
+    second = stub_api.Catalog(services=20, seed=7)
+    assert first.dependencies == second.dependencies
+    assert first.owners == second.owners
+
+
+def test_stub_serves_catalog_and_injects_errors():
+    stub_api, _ = load_modules()
+    catalog = stub_api.Catalog(services=30, teams=3)
+    service_id = catalog.services[0]["id"]
+    with stub_api.StubApi(catalog, error_rates={"/services/{id}/debt": 1.0}) as stub:
+        page = requests.get(f"{stub.url}/services", params={"page": 2, "pageSize": 25}).json()
+        teams = requests.get(f"{stub.url}/services/{service_id}/teams").json()
+        risk = requests.get(f"{stub.url}/reports/services/{service_id}/risk").json()
+        debt = requests.get(f"{stub.url}/services/{service_id}/debt")
+
+        assert [service["name"] for service in page] == [f"service-{index}" for index in range(25, 30)]
+        assert teams == catalog.owners[service_id]
+        assert risk["changeRisk"]["level"] in ("low", "medium", "high")
+        assert debt.status_code == 503
+        assert stub.request_counts() == {
+            "GET /services": 1, "GET /services/{id}/teams": 1,
+            "GET /reports/services/{id}/risk": 1, "GET /services/{id}/debt": 1,
+        }
+
+
+def test_percentile_and_compare():
+    _, run = load_modules()
+    assert run.percentile([], 50) == 0.0
+    assert run.percentile([1, 2, 3, 4], 50) == 2
+    assert run.percentile([1, 2, 3, 4], 99) == 4
+
+    baseline = {"tools": {"get_services": {"p50_ms": 10, "p95_ms": 20, "upstream_requests_per_call": 1}}}
+    report = {"tools": {"get_services": {"p50_ms": 15, "p95_ms": 21, "upstream_requests_per_call": 1}}}
+    rows = run.compare(report, baseline, threshold=20)
+    assert [(row["metric"], row["regression"]) for row in rows] == [
+        ("p50_ms", True), ("p95_ms", False), ("upstream_requests_per_call", False),
+    ]
+
+
+def test_tabular_scenarios_and_size_reductions():
+    stub_api, run = load_modules()
+    all_scenarios = run.scenarios(stub_api.Catalog(services=10, teams=2))
+
+    assert all_scenarios["get_debt:tabular"](0) == {"tabular": True}
+    assert run.tool_name("get_debt:tabular") == "get_debt"
+    results = {
+        "get_debt": {"response_bytes": 200},
+        "get_debt:tabular": {"response_bytes": 150},
+        "get_releases:tabular": {"response_bytes": 100},
+    }
+    assert run.size_reductions(results) == {
+        "get_debt": {"objects_bytes": 200, "tabular_bytes": 150, "reduction_percent": 25.0},
+    }
+
+
+def test_benchmark_run_writes_json_results(tmp_path):
+    output = tmp_path / "results.json"
+    # The server modules read their configuration on import, so the benchmark runs in its own interpreter
+    completed = subprocess.run(
+        [
+            sys.executable, os.path.join(BENCHMARKS_PATH, "run.py"), "--services", "20", "--latency", "0",
+            "--iterations", "3", "--tools", "get_service_risk", "get_blast_radius", "get_debt", "get_debt:tabular",
+            "--output", str(output),
+        ],
+        capture_output=True, text=True, timeout=120,
+        env={key: value for key, value in os.environ.items() if not key.startswith(("API_", "MCP_", "TRACING"))},
+    )
+    assert completed.returncode == 0, completed.stderr
+
+    report = json.loads(output.read_text())
+    assert set(report["tools"]) == {"get_service_risk", "get_blast_radius", "get_debt", "get_debt:tabular"}
+    risk = report["tools"]["get_service_risk"]
+    assert risk["calls"] == 3
+    assert risk["errors"] == 0
+    assert risk["upstream_requests"] == 3
+    assert risk["p50_ms"] <= risk["p95_ms"] <= risk["p99_ms"]
+    assert report["upstream_requests_by_endpoint"]["GET /reports/services/{id}/risk"] == 3
+    sizes = report["size_reductions"]["get_debt"]
+    assert 0 < sizes["tabular_bytes"] < sizes["objects_bytes"]
@@ -0,0 +1,180 @@
+import os
+import sys
+
+import pytest
+
+
+# Ensure the 'src' directory is on sys.path so that modules like 'cache' can be imported.
+PROJECT_ROOT = os.path.dirname(os.path.dirname(__file__))
+SRC_PATH = os.path.join(PROJECT_ROOT, "src")
+if SRC_PATH not in sys.path:
+    sys.path.insert(0, SRC_PATH)
+
+from importlib import import_module  # noqa: E402
+
+
+def load_cache_module():
+    return import_module("cache")
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> FakeClock:
+    cache = load_cache_module()
+    fake = FakeClock()
+    monkeypatch.setattr(cache.time, "monotonic", fake)
+    return fake
+
+
+def test_key_normalizes_path_and_param_order():
+    cache = load_cache_module()
+    key_a = cache.ResponseCache.key("services", {"page": 1, "pageSize": 25})
+    key_b = cache.ResponseCache.key("/services", {"pageSize": 25, "page": "1"})
+    assert key_a == key_b
+
+
+def test_hit_and_miss_counters(clock: FakeClock):
+    cache = load_cache_module()
+    response_cache = cache.ResponseCache(max_bytes=1000)
+    key = response_cache.key("/services/types")
+
+    assert response_cache.get(key) == (False, None)
+    response_cache.put(key, ["service", "database"], size=30)
+    assert response_cache.get(key) == (True, ["service", "database"])
+
+    stats = response_cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["entries"] == 1
+    assert stats["bytes"] == 30
+    assert stats["hit_rate"] == 0.5
+
+
+def test_entries_expire_after_template_ttl(clock: FakeClock):
+    cache = load_cache_module()
+    response_cache = cache.ResponseCache(max_bytes=1000, ttls={"/services/{id}/teams": 60})
+    key = response_cache.key("/services/abc/teams")
+    response_cache.put(key, [{"id": "t1"}], size=10)
+
+    clock.now += 59
+    assert response_cache.get(key)[0] is True
+    clock.now += 2
+    assert response_cache.get(key) == (False, None)
+    assert response_cache.stats()["expirations"] == 1
+    assert response_cache.stats()["bytes"] == 0
+
+
+def test_endpoints_without_ttl_are_not_cached(clock: FakeClock):
+    cache = load_cache_module()
+    response_cache = cache.ResponseCache(max_bytes=1000, ttls={"/teams": 60})
+    assert response_cache.ttl_for("/services/types") == 0
+    key = response_cache.key("/services/types")
+    response_cache.put(key, [], size=2)
+    assert response_cache.stats()["entries"] == 0
+
+
+def test_disabled_cache_has_no_ttls():
+    cache = load_cache_module()
+    response_cache = cache.ResponseCache(max_bytes=0)
+    assert response_cache.ttl_for("/services/types") == 0
+
+
+def test_lru_eviction_by_bytes(clock: FakeClock):
+    cache = load_cache_module()
+    response_cache = cache.ResponseCache(max_bytes=100)
+    first = response_cache.key("/services/a/teams")
+    second = response_cache.key("/services/b/teams")
+    third = response_cache.key("/services/c/teams")
+
+    response_cache.put(first, "a", size=40)
+    response_cache.put(second, "b", size=40)
+    # Touch the first entry so the second becomes least recently used
+    response_cache.get(first)
+    response_cache.put(third, "c", size=40)
+
+    assert response_cache.get(first)[0] is True
+    assert response_cache.get(second)[0] is False
+    assert response_cache.get(third)[0] is True
+    stats = response_cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["bytes"] == 80
+
+
+def test_oversized_response_is_not_cached(clock: FakeClock):
+    cache = load_cache_module()
+    response_cache = cache.ResponseCache(max_bytes=100)
+    key = response_cache.key("/reports/services/debt")
+    response_cache.put(key, "big", size=101)
+    assert response_cache.stats()["entries"] == 0
+
+
+def test_write_invalidates_related_templates_only(clock: FakeClock):
+    cache = load_cache_module()
+    response_cache = cache.ResponseCache(max_bytes=1000)
+    debt_report = response_cache.key("/reports/services/debt")
+    service_debt = response_cache.key("/services/abc/debt")
+    types = response_cache.key("/services/types")
+    for key in (debt_report, service_debt, types):
+        response_cache.put(key, [], size=2)
+
+    response_cache.invalidate_for_write("/services/abc/debt")
+
+    assert response_cache.get(debt_report)[0] is False
+    assert response_cache.get(service_debt)[0] is False
+    assert response_cache.get(types)[0] is True
+    assert response_cache.stats()["invalidations"] == 2
+
+
+def test_unknown_write_clears_everything(clock: FakeClock):
+    cache = load_cache_module()
+    response_cache = cache.ResponseCache(max_bytes=1000)
+    key = response_cache.key("/services/types")
+    response_cache.put(key, [], size=2)
+
+    response_cache.invalidate_for_write("/something/else")
+
+    assert response_cache.get(key)[0] is False
+
+
+def test_expired_entries_with_validators_are_kept_for_revalidation(clock: FakeClock):
+    cache = load_cache_module()
+    response_cache = cache.ResponseCache(max_bytes=1000, ttls={"/teams": 60})
+    key = response_cache.key("/teams", {"page": 1})
+    response_cache.put(key, [{"id": "t1"}], size=100, etag='"v1"')
+
+    clock.now += 61
+    assert response_cache.get(key) == (False, None)
+
+    entry = response_cache.revalidation_entry(key)
+    assert entry.conditional_headers() == {"If-None-Match": '"v1"'}
+    assert response_cache.not_modified(key, entry) == [{"id": "t1"}]
+    # The entry is fresh again after a 304
+    assert response_cache.get(key) == (True, [{"id": "t1"}])
+
+    stats = response_cache.stats()
+    assert stats["revalidations"] == 1
+    assert stats["not_modified"] == 1
+    assert stats["bytes_saved"] == 100
+
+
+def test_uncached_endpoints_are_stored_only_with_validators(clock: FakeClock):
+    cache = load_cache_module()
+    response_cache = cache.ResponseCache(max_bytes=1000, ttls={})
+    plain = response_cache.key("/services/types")
+    validated = response_cache.key("/reports/services/debt")
+
+    response_cache.put(plain, [], size=2)
+    response_cache.put(validated, [], size=2, last_modified="Wed, 21 Oct 2026 07:28:00 GMT")
+
+    assert response_cache.revalidation_entry(plain) is None
+    entry = response_cache.revalidation_entry(validated)
+    assert entry.conditional_headers() == {"If-Modified-Since": "Wed, 21 Oct 2026 07:28:00 GMT"}
+    # Zero ttl: always revalidated, never served straight from cache
+    assert response_cache.get(validated) == (False, None)
@@ -0,0 +1,93 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+
+# Ensure the 'src' directory is on sys.path so that modules like 'deadlines' can be imported.
+PROJECT_ROOT = os.path.dirname(os.path.dirname(__file__))
+SRC_PATH = os.path.join(PROJECT_ROOT, "src")
+if SRC_PATH not in sys.path:
+    sys.path.insert(0, SRC_PATH)
+
+from importlib import import_module  # noqa: E402
+
+
+def load_deadlines_module():
+    return import_module("deadlines")
+
+
+def test_deadline_shrinks_request_timeouts_and_nested_deadlines_only_shorten_it():
+    deadlines = load_deadlines_module()
+    assert deadlines.remaining() is None
+    assert deadlines.request_timeout("/teams", 10) == 10
+
+    with deadlines.deadline(5):
+        assert 4.9 < deadlines.remaining() <= 5
+        assert deadlines.request_timeout("/teams", 2) == 2
+        assert deadlines.request_timeout("/teams", 10) <= 5
+        with deadlines.deadline(60):
+            assert deadlines.remaining() <= 5
+        with deadlines.deadline(1):
+            assert deadlines.remaining() <= 1
+        with deadlines.deadline(None):
+            assert deadlines.remaining() <= 5
+    assert deadlines.remaining() is None
+
+
+async def test_deadline_is_shared_by_tasks_and_raises_once_passed():
+    deadlines = load_deadlines_module()
+
+    async def request():
+        await asyncio.sleep(0.03)
+        return deadlines.request_timeout("/services/1234/teams", 10)
+
+    with deadlines.deadline(0.02):
+        results = await asyncio.gather(request(), return_exceptions=True)
+
+    assert isinstance(results[0], deadlines.DeadlineExceeded)
+    assert results[0].endpoint == "/services/{id}/teams"
+    assert isinstance(results[0], TimeoutError)
+
+
+def test_adaptive_timeouts_follow_observed_p99(monkeypatch: pytest.MonkeyPatch):
+    deadlines = load_deadlines_module()
+    monkeypatch.setenv("API_TIMEOUT", "10")
+    monkeypatch.setenv("API_TIMEOUT_MIN", "0.5")
+    monkeypatch.setenv("API_TIMEOUT_MIN_SAMPLES", "20")
+    timeouts = deadlines.AdaptiveTimeouts()
+
+    for _ in range(19):
+        timeouts.observe("/services/types", 0.4)
+    assert timeouts.timeout_for("/services/types") == 10
+    timeouts.observe("/services/types", 0.4)
+    # 3 x the p99 of the samples
+    assert timeouts.timeout_for("/services/types") == pytest.approx(1.2)
+
+    for _ in range(20):
+        timeouts.observe("/reports/services/debt", 0.01)
+        timeouts.observe("/releases/2024-01-01/2024-02-01", 8.0)
+    assert timeouts.timeout_for("/reports/services/debt") == 0.5
+    assert timeouts.timeout_for("/releases/2024-03-01/2024-04-01") == 10
+    assert timeouts.stats()["/services/types"] == {"samples": 20, "p99": 0.4, "timeout": 1.2}
+
+    monkeypatch.setenv("API_ADAPTIVE_TIMEOUTS", "false")
+    assert timeouts.timeout_for("/services/types") == 10
+
+
+async def test_tool_deadline_middleware_bounds_tool_calls(monkeypatch: pytest.MonkeyPatch):
+    from fastmcp import Client, FastMCP
+
+    deadlines = load_deadlines_module()
+    monkeypatch.setenv("TOOL_DEADLINE", "7")
+    server = FastMCP("test", middleware=[deadlines.ToolDeadlineMiddleware()])
+
+    @server.tool()
+    def budget() -> float:
+        return deadlines.remaining()
+
+    async with Client(server) as client:
+        result = await client.call_tool("budget", {})
+
+    assert 6 < result.data <= 7
@@ -48,7 +48,7 @@ def test_prompt_get_debt_mentions_tools_and_resources():
     assert "serviceatlas://debts/{service_id}" in prompt
 
 
-def test_get_debt_tool_calls_api_and_returns_data(monkeypatch: pytest.MonkeyPatch):
+async def test_get_debt_tool_calls_api_and_returns_data(monkeypatch: pytest.MonkeyPatch):
     debt = load_debt_module()
     fake_response = [
         {"name": "orders", "count": 5, "id": "svc-1"},
@@ -57,13 +57,13 @@ def test_get_debt_tool_calls_api_and_returns_data(monkeypatch: pytest.MonkeyPatc
     dummy = DummyApiCaller(fake_response)
     monkeypatch.setattr(debt, "api_caller", dummy, raising=True)
 
-    result = call_fn(debt.get_debt)
+    result = await call_fn(debt.get_debt)
 
     assert result == fake_response
     assert dummy.calls == [("/reports/services/debt", None)]
 
 
-def test_get_debts_resource_calls_api_and_returns_data(monkeypatch: pytest.MonkeyPatch):
+async def test_get_debts_resource_calls_api_and_returns_data(monkeypatch: pytest.MonkeyPatch):
     debt = load_debt_module()
     fake_response = [
         {"name": "orders", "count": 5, "id": "svc-1"},
@@ -71,13 +71,13 @@ def test_get_debts_resource_calls_api_and_returns_data(monkeypatch: pytest.Monke
     dummy = DummyApiCaller(fake_response)
     monkeypatch.setattr(debt, "api_caller", dummy, raising=True)
 
-    result = call_fn(debt.get_debts_resource)
+    result = await call_fn(debt.get_debts_resource)
 
     assert result == fake_response
     assert dummy.calls == [("/reports/services/debt", None)]
 
 
-def test_get_debts_for_service_tool_calls_api_and_returns_data(monkeypatch: pytest.MonkeyPatch):
+async def test_get_debts_for_service_tool_calls_api_and_returns_data(monkeypatch: pytest.MonkeyPatch):
     debt = load_debt_module()
     fake_response = [
         {"id": "deb-1", "type": "security", "title": "Update library"},
@@ -85,13 +85,13 @@ def test_get_debts_for_service_tool_calls_api_and_returns_data(monkeypatch: pyte
     dummy = DummyApiCaller(fake_response)
     monkeypatch.setattr(debt, "api_caller", dummy, raising=True)
 
-    result = call_fn(debt.get_debts_for_service, "svc-123")
+    result = await call_fn(debt.get_debts_for_service, "svc-123")
 
     assert result == fake_response
     assert dummy.calls == [("/services/svc-123/debt", None)]
 
 
-def test_get_debts_for_service_resource_calls_api_and_returns_data(monkeypatch: pytest.MonkeyPatch):
+async def test_get_debts_for_service_resource_calls_api_and_returns_data(monkeypatch: pytest.MonkeyPatch):
     debt = load_debt_module()
     fake_response = [
         {"id": "deb-9", "type": "ops", "title": "Rotate keys"},
@@ -99,19 +99,31 @@ def test_get_debts_for_service_resource_calls_api_and_returns_data(monkeypatch:
     dummy = DummyApiCaller(fake_response)
     monkeypatch.setattr(debt, "api_caller", dummy, raising=True)
 
-    result = call_fn(debt.get_debts_for_service_resource, "svc-xyz")
+    result = await call_fn(debt.get_debts_for_service_resource, "svc-xyz")
 
     assert result == fake_response
     assert dummy.calls == [("/services/svc-xyz/debt", None)]
 
 
-def test_create_debt_tool_calls_api_and_returns_data(monkeypatch: pytest.MonkeyPatch):
+async def test_create_debt_tool_calls_api_and_returns_data(monkeypatch: pytest.MonkeyPatch):
     debt = load_debt_module()
     fake_response = {"id": "deb-new", "title": "New Debt", "description": "desc", "type": "code", "status": "pending"}
     dummy = DummyApiCaller(fake_response)
     monkeypatch.setattr(debt, "api_caller", dummy, raising=True)
 
-    result = call_fn(debt.create_debt, "svc-1", "New Debt", "desc", "code")
+    result = await call_fn(debt.create_debt, "svc-1", "New Debt", "desc", "code")
 
     assert result == fake_response
     assert dummy.calls == [("/services/svc-1/debt", {"title": "New Debt", "description": "desc", "type": "code", "status": "pending"})]
+
+
+async def test_get_debt_tool_returns_table_when_asked(monkeypatch: pytest.MonkeyPatch):
+    debt = load_debt_module()
+    fake_response = [{"id": "svc-1", "name": "orders", "count": 3}, {"id": "svc-2", "name": "billing", "count": 1}]
+    monkeypatch.setattr(debt, "api_caller", DummyApiCaller(fake_response), raising=True)
+
+    report = await call_fn(debt.get_debt, tabular=True)
+    debts = await call_fn(debt.get_debts_for_service, "svc-1", tabular=True)
+
+    assert report == {"columns": ["id", "name", "count"], "rows": [["svc-1", "orders", 3], ["svc-2", "billing", 1]]}
+    assert debts["columns"] == ["id", "name", "count"]
@@ -19,6 +19,12 @@ def load_dependency_module():
     return import_module("dependency")
 
 
+@pytest.fixture(autouse=True)
+def disable_graph_snapshot(monkeypatch: pytest.MonkeyPatch):
+    # Keep the background graph rebuild out of tests that exercise live reads; snapshot tests re-enable it
+    monkeypatch.setenv("GRAPH_SNAPSHOT_ENABLED", "false")
+
+
 class DummyApiCaller:
     def __init__(self, response: Any):
         self.response = response
@@ -52,7 +58,7 @@ def test_prompt_get_service_dependencies_and_dependents_mentions_tools_and_resou
     assert "config" in prompt
 
 
-def test_get_service_dependencies_resource_calls_api_and_returns_data(monkeypatch: pytest.MonkeyPatch):
+async def test_get_service_dependencies_resource_calls_api_and_returns_data(monkeypatch: pytest.MonkeyPatch):
     dependency = load_dependency_module()
     fake_response = [
         {"id": "dep-2", "name": "Dependency Two"},
@@ -60,13 +66,13 @@ def test_get_service_dependencies_resource_calls_api_and_returns_data(monkeypatc
     dummy = DummyApiCaller(fake_response)
     monkeypatch.setattr(dependency, "api_caller", dummy, raising=True)
 
-    result = call_fn(dependency.get_service_dependencies_resource, "svc-456")
+    result = await call_fn(dependency.get_service_dependencies_resource, "svc-456")
 
-    assert result == fake_response
+    assert result == {"dependencies": fake_response, "source": "live", "snapshot_age_seconds": None}
     assert dummy.calls == [("GET", "/services/svc-456/dependencies", None)]
 
 
-def test_get_service_dependents_resource_calls_api_and_returns_data(monkeypatch: pytest.MonkeyPatch):
+async def test_get_service_dependents_resource_calls_api_and_returns_data(monkeypatch: pytest.MonkeyPatch):
     dependency = load_dependency_module()
     fake_response = [
         {"id": "dpt-2", "name": "Dependent Two"},
@@ -74,73 +80,301 @@ def test_get_service_dependents_resource_calls_api_and_returns_data(monkeypatch:
     dummy = DummyApiCaller(fake_response)
     monkeypatch.setattr(dependency, "api_caller", dummy, raising=True)
 
-    result = call_fn(dependency.get_service_dependents_resource, "svc-456")
+    result = await call_fn(dependency.get_service_dependents_resource, "svc-456")
 
-    assert result == fake_response
+    assert result == {"dependents": fake_response, "source": "live", "snapshot_age_seconds": None}
     assert dummy.calls == [("GET", "/services/svc-456/dependents", None)]
 
 
-def test_create_dependency_tool_calls_api_with_post(monkeypatch: pytest.MonkeyPatch):
+async def test_dependency_queries_project_fields_keeping_edge_attributes(monkeypatch: pytest.MonkeyPatch):
+    dependency = load_dependency_module()
+    fake_response = [
+        {"id": "dep-1", "name": "db", "tier": 1, "type": "database", "description": "long text", "version": "2.0"},
+    ]
+    dummy = DummyApiCaller(fake_response)
+    monkeypatch.setattr(dependency, "api_caller", dummy, raising=True)
+
+    compact = await call_fn(dependency.get_service_dependencies, "svc-1", live=True)
+    selected = await call_fn(dependency.get_service_dependents_resource, "svc-1", fields="id,description")
+    full = await call_fn(dependency.get_service_dependencies, "svc-1", live=True, fields=["*"])
+
+    assert compact["dependencies"] == [{"id": "dep-1", "name": "db", "tier": 1, "type": "database", "version": "2.0"}]
+    assert selected["dependents"] == [{"id": "dep-1", "description": "long text"}]
+    assert full["dependencies"] == fake_response
+
+
+async def test_create_dependency_tool_calls_api_with_post(monkeypatch: pytest.MonkeyPatch):
     dependency = load_dependency_module()
     fake_response = None
     dummy = DummyApiCaller(fake_response)
     monkeypatch.setattr(dependency, "api_caller", dummy, raising=True)
 
-    result = call_fn(dependency.create_dependency, service_id="svc-1", dependency_id="svc-2", version="1.0.0")
+    result = await call_fn(dependency.create_dependency, service_id="svc-1", dependency_id="svc-2", version="1.0.0")
 
     assert result == '{"status": "success"}'
     assert dummy.calls == [("POST", "/services/svc-1/dependency", {"id": "svc-2", "version": "1.0.0"})]
 
 
-def test_create_dependency_tool_calls_api_with_interaction_type(monkeypatch: pytest.MonkeyPatch):
+async def test_create_dependency_tool_calls_api_with_interaction_type(monkeypatch: pytest.MonkeyPatch):
     dependency = load_dependency_module()
     fake_response = None
     dummy = DummyApiCaller(fake_response)
     monkeypatch.setattr(dependency, "api_caller", dummy, raising=True)
 
-    result = call_fn(dependency.create_dependency, service_id="svc-1", dependency_id="svc-2", interaction_type="security")
+    result = await call_fn(dependency.create_dependency, service_id="svc-1", dependency_id="svc-2", interaction_type="security")
 
     assert result == '{"status": "success"}'
     assert dummy.calls == [("POST", "/services/svc-1/dependency", {"id": "svc-2", "interaction_type": "security"})]
 
 
-def test_create_dependency_tool_calls_api_with_version_and_interaction_type(monkeypatch: pytest.MonkeyPatch):
+async def test_create_dependency_tool_calls_api_with_version_and_interaction_type(monkeypatch: pytest.MonkeyPatch):
     dependency = load_dependency_module()
     fake_response = None
     dummy = DummyApiCaller(fake_response)
     monkeypatch.setattr(dependency, "api_caller", dummy, raising=True)
 
-    result = call_fn(dependency.create_dependency, service_id="svc-1", dependency_id="svc-2", version="1.5.0", interaction_type="data")
+    result = await call_fn(dependency.create_dependency, service_id="svc-1", dependency_id="svc-2", version="1.5.0", interaction_type="data")
 
     assert result == '{"status": "success"}'
     assert dummy.calls == [("POST", "/services/svc-1/dependency", {"id": "svc-2", "version": "1.5.0", "interaction_type": "data"})]
 
 
-def test_create_dependency_tool_no_content_returns_success_string(monkeypatch: pytest.MonkeyPatch):
+async def test_create_dependency_tool_no_content_returns_success_string(monkeypatch: pytest.MonkeyPatch):
     dependency = load_dependency_module()
     fake_response = None
     dummy = DummyApiCaller(fake_response)
     monkeypatch.setattr(dependency, "api_caller", dummy, raising=True)
 
-    result = call_fn(dependency.create_dependency, service_id="svc-1", dependency_id="svc-2")
+    result = await call_fn(dependency.create_dependency, service_id="svc-1", dependency_id="svc-2")
 
     assert result == '{"status": "success"}'
     assert dummy.calls == [("POST", "/services/svc-1/dependency", {"id": "svc-2"})]
 
 
-def test_create_dependency_raises_error_when_service_id_missing():
+async def test_create_dependency_raises_error_when_service_id_missing():
     dependency = load_dependency_module()
     with pytest.raises(ValueError, match="service_id and dependency_id are required"):
-        call_fn(dependency.create_dependency, service_id=None, dependency_id="svc-2")
+        await call_fn(dependency.create_dependency, service_id=None, dependency_id="svc-2")
 
 
-def test_create_dependency_raises_error_when_dependency_id_missing():
+async def test_create_dependency_raises_error_when_dependency_id_missing():
     dependency = load_dependency_module()
     with pytest.raises(ValueError, match="service_id and dependency_id are required"):
-        call_fn(dependency.create_dependency, service_id="svc-1", dependency_id=None)
+        await call_fn(dependency.create_dependency, service_id="svc-1", dependency_id=None)
 
 
-def test_create_dependency_raises_error_when_ids_are_same():
+async def test_create_dependency_raises_error_when_ids_are_same():
     dependency = load_dependency_module()
     with pytest.raises(ValueError, match="A service cannot depend on itself"):
-        call_fn(dependency.create_dependency, service_id="svc-1", dependency_id="svc-1")
+        await call_fn(dependency.create_dependency, service_id="svc-1", dependency_id="svc-1")
+
+
+class GraphDummyApiCaller:
+    """Serves dependents and teams from an in-memory graph of service id -> dependent ids."""
+
+    def __init__(self, dependents: dict, teams: dict, failing: set | None = None):
+        self.dependents = dependents
+        self.teams = teams
+        self.failing = failing or set()
+        self.calls: List[str] = []
+
+    async def call_get(self, url: str, params: dict | None = None):
+        self.calls.append(url)
+        if url in self.failing:
+            raise RuntimeError("boom")
+        _, _, service_id, kind = url.split("/")
+        if kind == "dependents":
+            return [{"id": dep, "name": dep.upper()} for dep in self.dependents.get(service_id, [])]
+        return [{"id": team, "name": f"Team {team}"} for team in self.teams.get(service_id, [])]
+
+
+async def test_get_blast_radius_walks_dependents_with_depth_and_teams(monkeypatch: pytest.MonkeyPatch):
+    dependency = load_dependency_module()
+    dummy = GraphDummyApiCaller(
+        dependents={"db": ["api", "worker"], "api": ["web"], "worker": ["web"]},
+        teams={"db": ["data"], "api": ["core"], "worker": ["data"], "web": ["core"]},
+    )
+    monkeypatch.setattr(dependency, "api_caller", dummy, raising=True)
+
+    result = await call_fn(dependency.get_blast_radius, "db")
+
+    depths = {node["id"]: node["depth"] for node in result["nodes"]}
+    assert depths == {"db": 0, "api": 1, "worker": 1, "web": 2}
+    web = next(node for node in result["nodes"] if node["id"] == "web")
+    assert web["name"] == "WEB"
+    assert web["teams"] == [{"id": "core", "name": "Team core"}]
+    edges = {(edge["dependent"], edge["dependency"]): edge["cross_team"] for edge in result["edges"]}
+    assert edges == {
+        ("api", "db"): True,
+        ("worker", "db"): False,
+        ("web", "api"): False,
+        ("web", "worker"): True,
+    }
+    assert result["cross_team_edges"] == 2
+    assert result["depth_limited"] is False
+    assert result["truncated"] is False
+    assert result["errors"] == []
+    # Each visited service is expanded exactly once, even though web is reachable twice
+    assert sorted(dummy.calls) == sorted(
+        [f"/services/{node}/{kind}" for node in ("db", "api", "worker", "web") for kind in ("teams", "dependents")]
+    )
+
+
+async def test_get_blast_radius_respects_max_depth_and_cycles(monkeypatch: pytest.MonkeyPatch):
+    dependency = load_dependency_module()
+    dummy = GraphDummyApiCaller(dependents={"a": ["b"], "b": ["c", "a"], "c": ["d"]}, teams={})
+    monkeypatch.setattr(dependency, "api_caller", dummy, raising=True)
+
+    result = await call_fn(dependency.get_blast_radius, "a", max_depth=2)
+
+    assert {node["id"]: node["depth"] for node in result["nodes"]} == {"a": 0, "b": 1, "c": 2}
+    # The last level's dependents are fetched to report what the depth limit left out, but not walked
+    assert "/services/c/dependents" in dummy.calls
+    assert "/services/d/teams" not in dummy.calls
+    assert {"dependent": "a", "dependency": "b", "cross_team": False} in result["edges"]
+    c = next(node for node in result["nodes"] if node["id"] == "c")
+    assert c["unexplored_dependents"] == 1
+    assert result["depth_limited"] is True
+    assert result["truncated"] is True
+
+
+async def test_get_blast_radius_is_not_depth_limited_when_the_last_level_has_no_new_dependents(
+    monkeypatch: pytest.MonkeyPatch,
+):
+    dependency = load_dependency_module()
+    dummy = GraphDummyApiCaller(dependents={"a": ["b"], "b": ["a"]}, teams={})
+    monkeypatch.setattr(dependency, "api_caller", dummy, raising=True)
+
+    result = await call_fn(dependency.get_blast_radius, "a", max_depth=1)
+
+    assert {node["id"] for node in result["nodes"]} == {"a", "b"}
+    assert all("unexplored_dependents" not in node for node in result["nodes"])
+    assert result["depth_limited"] is False
+    assert result["truncated"] is False
+    assert {"dependent": "a", "dependency": "b", "cross_team": False} in result["edges"]
+
+
+async def test_get_blast_radius_truncates_at_max_nodes(monkeypatch: pytest.MonkeyPatch):
+    dependency = load_dependency_module()
+    dummy = GraphDummyApiCaller(dependents={"hub": ["s1", "s2", "s3", "s4"]}, teams={})
+    monkeypatch.setattr(dependency, "api_caller", dummy, raising=True)
+
+    result = await call_fn(dependency.get_blast_radius, "hub", max_nodes=3)
+
+    assert [node["id"] for node in result["nodes"]] == ["hub", "s1", "s2"]
+    assert result["truncated"] is True
+    assert result["depth_limited"] is False
+    assert len(result["edges"]) == 2
+
+
+async def test_get_blast_radius_reports_errors_per_service(monkeypatch: pytest.MonkeyPatch):
+    dependency = load_dependency_module()
+    dummy = GraphDummyApiCaller(
+        dependents={"a": ["b", "c"], "b": ["d"]},
+        teams={},
+        failing={"/services/c/dependents", "/services/b/teams"},
+    )
+    monkeypatch.setattr(dependency, "api_caller", dummy, raising=True)
+
+    result = await call_fn(dependency.get_blast_radius, "a")
+
+    assert {node["id"] for node in result["nodes"]} == {"a", "b", "c", "d"}
+    assert sorted((error["service_id"], error["path"]) for error in result["errors"]) == [
+        ("b", "teams"),
+        ("c", "dependents"),
+    ]
+
+
+async def test_get_blast_radius_validates_arguments():
+    dependency = load_dependency_module()
+    with pytest.raises(ValueError, match="service_id is required"):
+        await call_fn(dependency.get_blast_radius, "")
+    with pytest.raises(ValueError, match="max_depth"):
+        await call_fn(dependency.get_blast_radius, "a", max_depth=-1)
+
+
+class CatalogDummyApiCaller:
+    """Serves a small catalog: /services pages plus per-service dependencies."""
+
+    def __init__(self, dependencies: dict):
+        self.dependencies = dependencies
+        self.calls: List[str] = []
+
+    async def call_get(self, url: str, params: dict | None = None):
+        self.calls.append(url)
+        if url == "/services":
+            if params["page"] > 1:
+                return []
+            return [{"id": service_id, "name": service_id.upper()} for service_id in self.dependencies]
+        service_id = url.split("/")[2]
+        return [{"id": dep, "name": dep.upper(), "version": "1.0"} for dep in self.dependencies.get(service_id, [])]
+
+    async def call_post(self, url: str, body: dict | None = None):
+        self.calls.append(url)
+        return None
+
+
+async def test_dependency_queries_use_graph_snapshot_once_built(monkeypatch: pytest.MonkeyPatch):
+    dependency = load_dependency_module()
+    monkeypatch.setenv("GRAPH_SNAPSHOT_ENABLED", "true")
+    dummy = CatalogDummyApiCaller({"api": ["db", "cache"], "web": ["api"], "db": [], "cache": []})
+    monkeypatch.setattr(dependency, "api_caller", dummy, raising=True)
+    monkeypatch.setattr(dependency, "graph_snapshot", dependency.GraphSnapshot(dependency._fetch), raising=True)
+
+    # No snapshot yet: answered live while the graph is built in the background
+    first = await call_fn(dependency.get_service_dependents, "api")
+    assert first["source"] == "live"
+    await dependency.graph_snapshot.refresh()
+    dummy.calls.clear()
+
+    dependents = await call_fn(dependency.get_service_dependents, "api")
+    dependencies = await call_fn(dependency.get_service_dependencies, "api")
+
+    assert dummy.calls == []
+    assert dependents["source"] == "snapshot"
+    assert dependents["dependents"] == [{"id": "web", "name": "WEB", "version": "1.0"}]
+    assert [dep["id"] for dep in dependencies["dependencies"]] == ["db", "cache"]
+    assert dependencies["snapshot_age_seconds"] >= 0
+
+
+async def test_dependency_queries_can_force_live_read(monkeypatch: pytest.MonkeyPatch):
+    dependency = load_dependency_module()
+    monkeypatch.setenv("GRAPH_SNAPSHOT_ENABLED", "true")
+    dummy = CatalogDummyApiCaller({"api": ["db"], "db": []})
+    monkeypatch.setattr(dependency, "api_caller", dummy, raising=True)
+    monkeypatch.setattr(dependency, "graph_snapshot", dependency.GraphSnapshot(dependency._fetch), raising=True)
+    await dependency.graph_snapshot.refresh()
+    dummy.calls.clear()
+
+    result = await call_fn(dependency.get_service_dependencies, "api", live=True)
+
+    assert result["source"] == "live"
+    assert dummy.calls == ["/services/api/dependencies"]
+
+
+async def test_dependency_queries_fall_back_to_live_for_unknown_services(monkeypatch: pytest.MonkeyPatch):
+    dependency = load_dependency_module()
+    monkeypatch.setenv("GRAPH_SNAPSHOT_ENABLED", "true")
+    dummy = CatalogDummyApiCaller({"api": []})
+    monkeypatch.setattr(dependency, "api_caller", dummy, raising=True)
+    monkeypatch.setattr(dependency, "graph_snapshot", dependency.GraphSnapshot(dependency._fetch), raising=True)
+    await dependency.graph_snapshot.refresh()
+
+    result = await call_fn(dependency.get_service_dependents, "brand-new")
+
+    assert result["source"] == "live"
+
+
+async def test_create_dependency_updates_graph_snapshot(monkeypatch: pytest.MonkeyPatch):
+    dependency = load_dependency_module()
+    monkeypatch.setenv("GRAPH_SNAPSHOT_ENABLED", "true")
+    dummy = CatalogDummyApiCaller({"api": [], "db": []})
+    monkeypatch.setattr(dependency, "api_caller", dummy, raising=True)
+    monkeypatch.setattr(dependency, "graph_snapshot", dependency.GraphSnapshot(dependency._fetch), raising=True)
+    await dependency.graph_snapshot.refresh()
+
+    await call_fn(dependency.create_dependency, service_id="api", dependency_id="db", interaction_type="data")
+    result = await call_fn(dependency.get_service_dependents, "db")
+
+    assert result["source"] == "snapshot"
+    assert result["dependents"] == [{"id": "api", "name": "API", "interaction_type": "data"}]
@@ -0,0 +1,139 @@
+import os
+import sqlite3
+import sys
+
+import pytest
+
+
+# Ensure the 'src' directory is on sys.path so that modules like 'disk_cache' can be imported.
+PROJECT_ROOT = os.path.dirname(os.path.dirname(__file__))
+SRC_PATH = os.path.join(PROJECT_ROOT, "src")
+if SRC_PATH not in sys.path:
+    sys.path.insert(0, SRC_PATH)
+
+from importlib import import_module  # noqa: E402
+
+
+def load_modules():
+    return import_module("disk_cache"), import_module("cache")
+
+
+@pytest.fixture
+def db_path(tmp_path) -> str:
+    return str(tmp_path / "nested" / "cache.sqlite")
+
+
+def test_database_is_opened_lazily_in_wal_mode(db_path: str):
+    disk_cache, cache = load_modules()
+    store = disk_cache.DiskCache(db_path, max_bytes=1000)
+    assert not os.path.exists(db_path)
+    assert store.stats()["open"] is False
+
+    key = cache.ResponseCache.key("/teams", {"page": 1})
+    assert store.get(key) is None
+    assert os.path.exists(db_path)
+    with sqlite3.connect(db_path) as connection:
+        assert connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    store.close()
+
+
+def test_entries_survive_reopening(db_path: str):
+    disk_cache, cache = load_modules()
+    key = cache.ResponseCache.key("/teams", {"page": 1})
+    store = disk_cache.DiskCache(db_path, max_bytes=1000)
+    store.put(key, "/teams", [{"id": "t1"}], 20, expires=4102444800.0, etag='"v1"')
+    store.close()
+
+    reopened = disk_cache.DiskCache(db_path, max_bytes=1000)
+    assert reopened.get(key) == ("/teams", [{"id": "t1"}], 20, 4102444800.0, '"v1"', None)
+    reopened.close()
+
+
+def test_opening_prunes_expired_and_oversized_entries(db_path: str):
+    disk_cache, cache = load_modules()
+    store = disk_cache.DiskCache(db_path, max_bytes=1000)
+    expired = cache.ResponseCache.key("/services/types")
+    validated = cache.ResponseCache.key("/reports/services/debt")
+    soon = cache.ResponseCache.key("/teams", {"page": 1})
+    later = cache.ResponseCache.key("/teams", {"page": 2})
+    store.put(expired, "/services/types", [], 10, expires=1.0)
+    store.put(validated, "/reports/services/debt", [], 10, expires=1.0, etag='"v1"')
+    store.put(soon, "/teams", [], 600, expires=4102444800.0)
+    store.put(later, "/teams", [], 300, expires=4102444900.0)
+    store.close()
+
+    reopened = disk_cache.DiskCache(db_path, max_bytes=1000)
+    assert reopened.get(expired) is None
+    assert reopened.get(validated) is not None
+    assert reopened.stats()["pruned"] == 1
+    reopened.close()
+
+    # Over the byte budget the soonest expiring entries go first
+    shrunk = disk_cache.DiskCache(db_path, max_bytes=700)
+    assert shrunk.get(validated) is None
+    assert shrunk.get(soon) is None
+    assert shrunk.get(later) is not None
+    assert shrunk.stats()["pruned"] == 2
+    shrunk.close()
+
+
+def test_delete_templates(db_path: str):
+    disk_cache, cache = load_modules()
+    store = disk_cache.DiskCache(db_path, max_bytes=1000)
+    teams = cache.ResponseCache.key("/teams")
+    types = cache.ResponseCache.key("/services/types")
+    store.put(teams, "/teams", [], 2, expires=4102444800.0)
+    store.put(types, "/services/types", [], 2, expires=4102444800.0)
+
+    store.delete_templates(["/teams"])
+    assert store.get(teams) is None
+    assert store.get(types) is not None
+    store.delete_templates()
+    assert store.get(types) is None
+    store.close()
+
+
+def test_storage_errors_are_counted_not_raised(db_path: str):
+    disk_cache, cache = load_modules()
+    store = disk_cache.DiskCache(db_path, max_bytes=1000)
+    store.put(cache.ResponseCache.key("/teams"), "/teams", {1, 2}, 2, expires=4102444800.0)
+    assert store.stats()["errors"] == 1
+    store.close()
+
+
+def test_response_cache_starts_warm_from_the_store(db_path: str):
+    disk_cache, cache = load_modules()
+    key = cache.ResponseCache.key("/services/types")
+    first = cache.ResponseCache(max_bytes=1000, store=disk_cache.DiskCache(db_path, max_bytes=1000))
+    first.put(key, ["service", "database"], size=30)
+
+    second = cache.ResponseCache(max_bytes=1000, store=disk_cache.DiskCache(db_path, max_bytes=1000))
+    assert second.get(key) == (True, ["service", "database"])
+    stats = second.stats()
+    assert stats["disk_loads"] == 1
+    assert stats["disk"]["hits"] == 1
+
+
+def test_response_cache_invalidation_reaches_the_store(db_path: str):
+    disk_cache, cache = load_modules()
+    key = cache.ResponseCache.key("/services/abc/debt")
+    first = cache.ResponseCache(max_bytes=1000, store=disk_cache.DiskCache(db_path, max_bytes=1000))
+    first.put(key, [{"id": "d1"}], size=30)
+    first.invalidate_for_write("/services/abc/debt")
+
+    second = cache.ResponseCache(max_bytes=1000, store=disk_cache.DiskCache(db_path, max_bytes=1000))
+    assert second.get(key) == (False, None)
+
+
+def test_expired_stored_entries_are_loaded_for_revalidation(db_path: str, monkeypatch: pytest.MonkeyPatch):
+    disk_cache, cache = load_modules()
+    key = cache.ResponseCache.key("/teams")
+    store = disk_cache.DiskCache(db_path, max_bytes=1000)
+    store.put(key, "/teams", [{"id": "t1"}], 30, expires=1.0, etag='"v1"')
+
+    response_cache = cache.ResponseCache(max_bytes=1000, store=store)
+    assert response_cache.get(key) == (False, None)
+    entry = response_cache.revalidation_entry(key)
+    assert entry.conditional_headers() == {"If-None-Match": '"v1"'}
+    assert response_cache.not_modified(key, entry) == [{"id": "t1"}]
+    assert store.get(key)[3] > 1.0
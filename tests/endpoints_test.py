@@ -0,0 +1,44 @@
+import os
+import sys
+
+import pytest
+
+
+# Ensure the 'src' directory is on sys.path so that modules like 'endpoints' can be imported.
+PROJECT_ROOT = os.path.dirname(os.path.dirname(__file__))
+SRC_PATH = os.path.join(PROJECT_ROOT, "src")
+if SRC_PATH not in sys.path:
+    sys.path.insert(0, SRC_PATH)
+
+from importlib import import_module  # noqa: E402
+
+
+def load_endpoints_module():
+    return import_module("endpoints")
+
+
+@pytest.mark.parametrize(
+    "path, expected",
+    [
+        ("/services", "/services"),
+        ("services", "/services"),
+        ("/services/search", "/services/search"),
+        ("/services/types", "/services/types"),
+        ("/services/abc-123", "/services/{id}"),
+        ("/services/abc-123/teams", "/services/{id}/teams"),
+        ("/services/abc-123/dependents", "/services/{id}/dependents"),
+        ("/teams/t-1/services", "/teams/{id}/services"),
+        ("/reports/services/debt", "/reports/services/debt"),
+        ("/reports/services/abc/risk", "/reports/services/{id}/risk"),
+        ("/releases/2024-01-01/2024-02-01", "/releases/{start}/{end}"),
+    ],
+)
+def test_endpoint_template_matches_known_routes(path: str, expected: str):
+    endpoints = load_endpoints_module()
+    assert endpoints.endpoint_template(path) == expected
+
+
+def test_endpoint_template_collapses_ids_on_unknown_routes():
+    endpoints = load_endpoints_module()
+    assert endpoints.endpoint_template("/widgets/12345/parts") == "/widgets/{id}/parts"
+    assert endpoints.endpoint_template("/health") == "/health"
@@ -0,0 +1,187 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+
+# Ensure the 'src' directory is on sys.path so that modules like 'graph' can be imported.
+PROJECT_ROOT = os.path.dirname(os.path.dirname(__file__))
+SRC_PATH = os.path.join(PROJECT_ROOT, "src")
+if SRC_PATH not in sys.path:
+    sys.path.insert(0, SRC_PATH)
+
+from importlib import import_module  # noqa: E402
+
+
+def load_graph_module():
+    return import_module("graph")
+
+
+SERVICES = [{"id": "web", "name": "Web"}, {"id": "api", "name": "Api"}, {"id": "db", "name": "Db"}]
+DEPENDENCIES = {
+    "web": [{"id": "api", "name": "Api", "version": "2.1", "interaction_type": "data"}],
+    "api": [{"id": "db", "name": "Db", "interaction_type": "config"}],
+    "db": [],
+}
+
+
+class FakeApi:
+    def __init__(self, services: list, dependencies: dict, fail: bool = False):
+        self.services = services
+        self.dependencies = dependencies
+        self.fail = fail
+        self.calls = 0
+
+    async def __call__(self, url: str, params: dict | None):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError("api down")
+        if url == "/services":
+            return self.services if params["page"] == 1 else []
+        return self.dependencies.get(url.split("/")[2], [])
+
+
+def test_graph_indexes_forward_and_reverse_edges_with_attributes():
+    graph = load_graph_module()
+    dependency_graph = graph.DependencyGraph(SERVICES, DEPENDENCIES)
+
+    assert dependency_graph.dependencies("web") == DEPENDENCIES["web"]
+    assert dependency_graph.dependents("api") == [{"id": "web", "name": "Web", "version": "2.1", "interaction_type": "data"}]
+    assert dependency_graph.dependents("db") == [{"id": "api", "name": "Api", "interaction_type": "config"}]
+    assert dependency_graph.dependents("web") == []
+    assert dependency_graph.dependencies("unknown") is None
+    assert dependency_graph.stats()["edges"] == 2
+
+
+def test_add_dependency_does_not_mutate_lists_already_returned():
+    graph = load_graph_module()
+    dependency_graph = graph.DependencyGraph(SERVICES, DEPENDENCIES)
+    before = dependency_graph.dependents("db")
+
+    assert dependency_graph.add_dependency("web", "db", version="1.0") is True
+    assert dependency_graph.add_dependency("web", "unknown") is False
+
+    assert len(before) == 1
+    assert [dep["id"] for dep in dependency_graph.dependents("db")] == ["api", "web"]
+    assert dependency_graph.dependencies("web")[-1] == {"id": "db", "name": "Db", "version": "1.0"}
+
+
+async def test_build_graph_fetches_services_then_dependencies():
+    graph = load_graph_module()
+    api = FakeApi(SERVICES, DEPENDENCIES)
+
+    dependency_graph = await graph.build_graph(api, concurrency=2)
+
+    assert dependency_graph.stats()["services"] == 3
+    assert [dep["id"] for dep in dependency_graph.dependents("api")] == ["web"]
+
+
+async def test_build_graph_refuses_a_truncated_service_listing(monkeypatch: pytest.MonkeyPatch):
+    graph = load_graph_module()
+    monkeypatch.setenv("API_MAX_PAGES", "1")
+    monkeypatch.setenv("API_SERVICES_PAGE_SIZE", "1")
+    api = FakeApi(SERVICES, DEPENDENCIES)
+
+    async def one_per_page(url: str, params: dict | None):
+        if url == "/services":
+            return SERVICES[params["page"] - 1:params["page"]]
+        return await api(url, params)
+
+    with pytest.raises(RuntimeError, match="API_MAX_PAGES"):
+        await graph.build_graph(one_per_page)
+
+
+async def test_snapshot_invalidate_drops_graph_and_discards_inflight_rebuild():
+    graph = load_graph_module()
+    api = FakeApi(SERVICES, DEPENDENCIES)
+
+    async def slow_fetch(url, params):
+        await asyncio.sleep(0.01)
+        return await api(url, params)
+
+    snapshot = graph.GraphSnapshot(slow_fetch)
+    await snapshot.refresh()
+    refresh = asyncio.create_task(snapshot.refresh())
+    await asyncio.sleep(0)
+    snapshot.invalidate()
+    await refresh
+
+    assert snapshot.stats()["graph"] is None
+    await snapshot.refresh()
+    assert snapshot.stats()["graph"] is not None
+
+
+async def test_snapshot_builds_in_background_and_expires(monkeypatch: pytest.MonkeyPatch):
+    graph = load_graph_module()
+    monkeypatch.setenv("GRAPH_REFRESH_INTERVAL", "60")
+    snapshot = graph.GraphSnapshot(FakeApi(SERVICES, DEPENDENCIES))
+
+    assert snapshot.current() is None
+    # Let the background rebuild run
+    for _ in range(10):
+        await asyncio.sleep(0)
+    fresh = snapshot.current()
+    assert fresh is not None
+    assert snapshot.stats()["refreshes"] == 1
+
+    monkeypatch.setattr(graph.time, "monotonic", lambda: fresh.built_at + 61)
+    assert snapshot.current() is None
+
+
+async def test_snapshot_refreshes_at_background_priority():
+    graph = load_graph_module()
+    throttling = import_module("throttling")
+    priorities = set()
+    api = FakeApi(SERVICES, DEPENDENCIES)
+
+    async def fetch(url: str, params: dict | None):
+        priorities.add(throttling.current_priority())
+        return await api(url, params)
+
+    snapshot = graph.GraphSnapshot(fetch)
+    snapshot.current()
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+    assert snapshot.stats()["refreshes"] == 1
+    assert priorities == {throttling.BACKGROUND}
+
+
+async def test_snapshot_disabled_by_env(monkeypatch: pytest.MonkeyPatch):
+    graph = load_graph_module()
+    monkeypatch.setenv("GRAPH_SNAPSHOT_ENABLED", "false")
+    api = FakeApi(SERVICES, DEPENDENCIES)
+    snapshot = graph.GraphSnapshot(api)
+
+    assert snapshot.current() is None
+    await asyncio.sleep(0)
+    assert api.calls == 0
+
+
+async def test_snapshot_background_failure_is_counted():
+    graph = load_graph_module()
+    snapshot = graph.GraphSnapshot(FakeApi(SERVICES, DEPENDENCIES, fail=True))
+
+    assert snapshot.current() is None
+    for _ in range(10):
+        await asyncio.sleep(0)
+    assert snapshot.stats()["failures"] == 1
+    assert snapshot.stats()["graph"] is None
+
+
+async def test_dependencies_recorded_during_rebuild_are_replayed():
+    graph = load_graph_module()
+    api = FakeApi(SERVICES, DEPENDENCIES)
+
+    async def slow_fetch(url, params):
+        await asyncio.sleep(0.01)
+        return await api(url, params)
+
+    snapshot = graph.GraphSnapshot(slow_fetch)
+    refresh = asyncio.create_task(snapshot.refresh())
+    await asyncio.sleep(0)
+    snapshot.record_dependency("db", "web")
+    rebuilt = await refresh
+
+    assert [dep["id"] for dep in rebuilt.dependencies("db")] == ["web"]
@@ -47,6 +47,12 @@ def test_setup_imports_servers_in_order(monkeypatch: pytest.MonkeyPatch):
     ]
 
 
+@pytest.fixture(autouse=True)
+def server_argv(monkeypatch: pytest.MonkeyPatch):
+    # main() reads the command line when called without arguments, keep pytest's own arguments away from it
+    monkeypatch.setattr(sys, "argv", ["mcp_server.py"])
+
+
 def test_main_runs_setup_then_mcp_run(monkeypatch: pytest.MonkeyPatch):
     mcp_server = load_mcp_server_module()
     dummy = DummyMCP()
@@ -99,6 +105,210 @@ def test_main_logs_error_and_exits_with_code_1(monkeypatch: pytest.MonkeyPatch,
     assert "Failed to start MCP Server: boom" in err
 
 
+class DummyHttpMCP(DummyMCP):
+    def __init__(self):
+        super().__init__()
+        self.http_app_calls = []
+
+    def http_app(self, **kwargs):
+        self.http_app_calls.append(kwargs)
+        return "app"
+
+
+class UvicornSpy:
+    def __init__(self):
+        self.calls = []
+
+    def run(self, app, **kwargs):
+        self.calls.append((app, kwargs))
+
+
+@pytest.fixture
+def http_env(monkeypatch: pytest.MonkeyPatch):
+    # run_http exports its options to the environment, register them so they are restored afterwards
+    for name in ("MCP_TRANSPORT", "MCP_HOST", "MCP_PORT", "MCP_HTTP_PATH", "MCP_WORKERS", "MCP_STATELESS_HTTP",
+                 "MCP_METRICS_PATH", "MCP_LAZY_STARTUP"):
+        monkeypatch.delenv(name, raising=False)
+    import uvicorn
+    spy = UvicornSpy()
+    monkeypatch.setattr(uvicorn, "run", spy.run)
+    return spy
+
+
+def test_parse_args_defaults_to_stdio_and_reads_env(monkeypatch: pytest.MonkeyPatch, http_env):
+    mcp_server = load_mcp_server_module()
+    args = mcp_server.parse_args([])
+    assert (args.transport, args.host, args.port, args.workers) == ("stdio", "127.0.0.1", 8000, 1)
+
+    monkeypatch.setenv("MCP_TRANSPORT", "HTTP")
+    monkeypatch.setenv("MCP_PORT", "9000")
+    monkeypatch.setenv("MCP_WORKERS", "4")
+    args = mcp_server.parse_args(["--port", "9100"])
+    assert (args.transport, args.port, args.workers) == ("http", 9100, 4)
+
+
+def test_parse_args_rejects_invalid_worker_count(http_env):
+    mcp_server = load_mcp_server_module()
+    with pytest.raises(SystemExit):
+        mcp_server.parse_args(["--workers", "0"])
+
+
+def test_main_serves_http_with_one_worker(monkeypatch: pytest.MonkeyPatch, http_env):
+    mcp_server = load_mcp_server_module()
+    dummy = DummyHttpMCP()
+    monkeypatch.setattr(mcp_server, "mcp", dummy, raising=True)
+
+    mcp_server.main(["--transport", "http", "--port", "9001", "--shutdown-timeout", "5"])
+
+    assert dummy.run_called == 0
+    assert len(dummy.mount_calls) == 5
+    assert dummy.http_app_calls == [{"path": "/mcp", "transport": "http", "stateless_http": False}]
+    app, options = http_env.calls[0]
+    assert app == "app"
+    assert options == {
+        "host": "127.0.0.1", "port": 9001, "workers": 1, "lifespan": "on", "timeout_graceful_shutdown": 5.0,
+    }
+
+
+def test_main_serves_http_workers_from_an_app_factory(monkeypatch: pytest.MonkeyPatch, http_env):
+    mcp_server = load_mcp_server_module()
+    dummy = DummyHttpMCP()
+    monkeypatch.setattr(mcp_server, "mcp", dummy, raising=True)
+
+    mcp_server.main(["--transport", "http", "--workers", "3", "--path", "/atlas"])
+
+    app, options = http_env.calls[0]
+    assert app == "mcp_server:create_http_app"
+    assert options["factory"] is True
+    assert options["workers"] == 3
+    # Each worker builds its app from the exported options, with stateless sessions
+    assert dummy.http_app_calls == []
+    assert mcp_server.create_http_app() == "app"
+    assert dummy.http_app_calls == [{"path": "/atlas", "transport": "http", "stateless_http": True}]
+
+
+def test_get_server_stats_reports_metrics_and_caller_stats(monkeypatch: pytest.MonkeyPatch):
+    mcp_server = load_mcp_server_module()
+    mcp_server.metrics.registry.reset()
+    mcp_server.metrics.registry.inc("atlas_tool_calls_total", {"tool": "get_services", "outcome": "ok"})
+
+    stats = call_fn(mcp_server.get_server_stats)
+
+    assert stats["metrics"]["atlas_tool_calls_total"] == [
+        {"labels": {"outcome": "ok", "tool": "get_services"}, "value": 1}
+    ]
+    assert set(stats) == {"metrics", "cache", "pool", "coalescing", "resilience", "timeouts", "throttle", "graph", "search"}
+    assert "hit_rate" in stats["cache"]
+    mcp_server.metrics.registry.reset()
+
+
+def test_get_traces_returns_recent_traces(monkeypatch: pytest.MonkeyPatch):
+    mcp_server = load_mcp_server_module()
+    tracer = mcp_server.tracing.tracer
+    monkeypatch.setattr(tracer, "enabled", False)
+    assert call_fn(mcp_server.get_traces) == {"enabled": False, "traces": []}
+
+    monkeypatch.setattr(tracer, "enabled", True)
+    monkeypatch.setattr(tracer, "mode", "memory")
+    tracer.clear()
+    for name in ("get_services", "get_blast_radius"):
+        with tracer.trace(name):
+            pass
+
+    result = call_fn(mcp_server.get_traces, tool="get_services")
+    assert result["enabled"] is True
+    assert [trace["name"] for trace in result["traces"]] == ["get_services"]
+    tracer.clear()
+
+
+async def test_metrics_endpoint_serves_prometheus_text():
+    mcp_server = load_mcp_server_module()
+    response = await mcp_server.metrics_endpoint(None)
+    assert response.media_type == "text/plain; version=0.0.4"
+    assert b"# TYPE atlas_upstream_request_duration_seconds histogram" in response.body
+
+
+def test_create_http_app_registers_metrics_route_when_configured(monkeypatch: pytest.MonkeyPatch, http_env):
+    mcp_server = load_mcp_server_module()
+    routes = []
+
+    class RoutedMCP(DummyHttpMCP):
+        def custom_route(self, path, methods):
+            def register(fn):
+                routes.append((path, methods, fn))
+                return fn
+            return register
+
+    monkeypatch.setattr(mcp_server, "mcp", RoutedMCP(), raising=True)
+    mcp_server.create_http_app()
+    assert routes == []
+
+    monkeypatch.setenv("MCP_METRICS_PATH", "/metrics")
+    mcp_server.create_http_app()
+    assert routes == [("/metrics", ["GET"], mcp_server.metrics_endpoint)]
+
+
+def test_metrics_path_requires_a_single_worker(monkeypatch: pytest.MonkeyPatch, http_env):
+    mcp_server = load_mcp_server_module()
+    monkeypatch.setattr(mcp_server, "mcp", DummyHttpMCP(), raising=True)
+    monkeypatch.setenv("MCP_METRICS_PATH", "/metrics")
+
+    with pytest.raises(SystemExit):
+        mcp_server.parse_args(["--transport", "http", "--workers", "2"])
+    monkeypatch.setenv("MCP_WORKERS", "2")
+    with pytest.raises(RuntimeError, match="single worker"):
+        mcp_server.create_http_app()
+    assert http_env.calls == []
+
+
+def test_main_prints_import_report_without_serving(monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str], http_env):
+    mcp_server = load_mcp_server_module()
+    dummy = DummyMCP()
+    report = {"statement": "import mcp_server", "total_ms": 12.5, "modules": [
+        {"module": "fastmcp", "self_ms": 5.0, "cumulative_ms": 10.0},
+    ]}
+    monkeypatch.setattr(mcp_server, "mcp", dummy, raising=True)
+    monkeypatch.setattr(mcp_server, "import_report", lambda: report)
+
+    mcp_server.main(["--import-report"])
+
+    out = capsys.readouterr().out
+    assert "Import time for `import mcp_server`: 12.5 ms" in out
+    assert "fastmcp" in out
+    assert dummy.run_called == 0
+
+
+def test_setup_mounts_lazy_providers_when_lazy(monkeypatch: pytest.MonkeyPatch):
+    mcp_server = load_mcp_server_module()
+    providers = []
+
+    class ProviderMCP(DummyMCP):
+        def add_provider(self, provider):
+            providers.append(provider)
+
+    dummy = ProviderMCP()
+    monkeypatch.setattr(mcp_server, "mcp", dummy, raising=True)
+    monkeypatch.setenv("MCP_LAZY_STARTUP", "true")
+
+    mcp_server.setup()
+
+    assert dummy.mount_calls == []
+    assert [(provider.module, provider.attribute) for provider in providers] == mcp_server.SUB_SERVERS
+
+
+async def test_lifespan_closes_api_connections(monkeypatch: pytest.MonkeyPatch):
+    mcp_server = load_mcp_server_module()
+    closed = []
+
+    async def fake_close(caller=None):
+        closed.append(caller)
+
+    monkeypatch.setattr(import_module("api_calls"), "close_api_caller", fake_close)
+    async with mcp_server.lifespan(None):
+        assert closed == []
+    assert closed == [None]
+
+
 def call_fn(func_or_tool, *args, **kwargs):
     if hasattr(func_or_tool, "fn"):
         return func_or_tool.fn(*args, **kwargs)
@@ -112,6 +322,7 @@ def test_analyze_service_risk_and_impact_prompt_exists():
     assert "## Your tools" in prompt_text
     assert "find_service_by_name" in prompt_text
     assert "get_service_dependents" in prompt_text
+    assert "get_blast_radius" in prompt_text
     assert "get_service_dependencies" in prompt_text
     assert "get_teams_by_service" in prompt_text
     assert "get_debts_for_service" in prompt_text
@@ -144,3 +355,14 @@ def test_get_website_returns_error_when_env_missing(monkeypatch: pytest.MonkeyPa
     
     result = call_fn(mcp_server.get_website)
     assert result == {"status": "error", "message": "URL is not available"}
+
+
+def test_main_reads_the_command_line_when_called_without_arguments(monkeypatch: pytest.MonkeyPatch, http_env):
+    mcp_server = load_mcp_server_module()
+    monkeypatch.setattr(mcp_server, "mcp", DummyHttpMCP(), raising=True)
+    monkeypatch.setattr(sys, "argv", ["mcp_server.py", "--transport", "http", "--port", "9002"])
+
+    mcp_server.main()
+
+    assert len(http_env.calls) == 1
+    assert http_env.calls[0][1]["port"] == 9002
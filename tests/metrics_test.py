@@ -0,0 +1,110 @@
+import os
+import sys
+
+import pytest
+
+
+# Ensure the 'src' directory is on sys.path so that modules like 'metrics' can be imported.
+PROJECT_ROOT = os.path.dirname(os.path.dirname(__file__))
+SRC_PATH = os.path.join(PROJECT_ROOT, "src")
+if SRC_PATH not in sys.path:
+    sys.path.insert(0, SRC_PATH)
+
+from importlib import import_module  # noqa: E402
+
+
+def load_metrics_module():
+    return import_module("metrics")
+
+
+@pytest.fixture
+def metrics():
+    module = load_metrics_module()
+    module.registry.reset()
+    yield module
+    module.registry.reset()
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, content: bytes):
+        self.status_code = status_code
+        self.content = content
+
+
+def test_histogram_summary_estimates_quantiles_from_buckets(metrics):
+    registry = metrics.MetricsRegistry(enabled=True)
+    for value in (0.004, 0.02, 0.02, 0.3, 3.0):
+        registry.observe("atlas_tool_duration_seconds", {"tool": "t"}, value)
+
+    series = registry.snapshot()["atlas_tool_duration_seconds"]
+    assert series[0]["labels"] == {"tool": "t"}
+    assert series[0]["count"] == 5
+    assert series[0]["p50"] == 0.025
+    assert series[0]["p99"] == 3.0
+    assert series[0]["max"] == 3.0
+
+
+def test_render_uses_prometheus_text_format(metrics):
+    registry = metrics.MetricsRegistry(enabled=True)
+    registry.inc("atlas_upstream_requests_total", {"endpoint": "/services/{id}", "method": "GET", "status": "200"})
+    registry.observe("atlas_upstream_response_bytes", {"endpoint": "/teams", "method": "GET"}, 300)
+
+    text = registry.render()
+    assert "# TYPE atlas_upstream_requests_total counter" in text
+    assert 'atlas_upstream_requests_total{endpoint="/services/{id}",method="GET",status="200"} 1' in text
+    assert 'atlas_upstream_response_bytes_bucket{endpoint="/teams",method="GET",le="256"} 0' in text
+    assert 'atlas_upstream_response_bytes_bucket{endpoint="/teams",method="GET",le="1024"} 1' in text
+    assert 'atlas_upstream_response_bytes_bucket{endpoint="/teams",method="GET",le="+Inf"} 1' in text
+    assert 'atlas_upstream_response_bytes_count{endpoint="/teams",method="GET"} 1' in text
+
+
+def test_disabled_registry_records_nothing(metrics):
+    registry = metrics.MetricsRegistry(enabled=False)
+    registry.inc("atlas_tool_calls_total", {"tool": "t", "outcome": "ok"})
+    registry.observe("atlas_tool_duration_seconds", {"tool": "t"}, 0.1)
+    assert registry.snapshot() == {}
+
+
+def test_observe_upstream_labels_by_endpoint_template(metrics):
+    with metrics.observe_upstream("GET", "/services/4f9a2c1e-aaaa/dependents") as observation:
+        snapshot = metrics.registry.snapshot()
+        assert snapshot["atlas_upstream_in_flight"][0]["value"] == 1
+        observation.record(FakeResponse(200, b"[]"))
+
+    with pytest.raises(ConnectionError):
+        with metrics.observe_upstream("GET", "/services/4f9a2c1e-aaaa/dependents"):
+            raise ConnectionError("down")
+
+    snapshot = metrics.registry.snapshot()
+    labels = {"method": "GET", "endpoint": "/services/{id}/dependents"}
+    assert snapshot["atlas_upstream_in_flight"] == [{"labels": labels, "value": 0}]
+    assert snapshot["atlas_upstream_requests_total"] == [
+        {"labels": {**labels, "status": "200"}, "value": 1},
+        {"labels": {**labels, "status": "error"}, "value": 1},
+    ]
+    assert snapshot["atlas_upstream_request_duration_seconds"][0]["count"] == 2
+    assert snapshot["atlas_upstream_response_bytes"][0]["count"] == 1
+
+
+async def test_tool_middleware_records_calls_of_mounted_servers(metrics):
+    from fastmcp import Client, FastMCP
+
+    root = FastMCP("root", middleware=[metrics.ToolMetricsMiddleware()])
+    child = FastMCP("child")
+
+    @child.tool
+    def ok_tool() -> str:
+        return "ok"
+
+    @child.tool
+    def failing_tool() -> str:
+        raise ValueError("boom")
+
+    root.mount(child)
+    async with Client(root) as client:
+        await client.call_tool("ok_tool", {})
+        await client.call_tool("failing_tool", {}, raise_on_error=False)
+
+    calls = metrics.registry.snapshot()["atlas_tool_calls_total"]
+    assert {"labels": {"outcome": "ok", "tool": "ok_tool"}, "value": 1} in calls
+    assert {"labels": {"outcome": "error", "tool": "failing_tool"}, "value": 1} in calls
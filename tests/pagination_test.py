@@ -0,0 +1,133 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+
+# Ensure the 'src' directory is on sys.path so that modules like 'pagination' can be imported.
+PROJECT_ROOT = os.path.dirname(os.path.dirname(__file__))
+SRC_PATH = os.path.join(PROJECT_ROOT, "src")
+if SRC_PATH not in sys.path:
+    sys.path.insert(0, SRC_PATH)
+
+from importlib import import_module  # noqa: E402
+
+
+def load_pagination_module():
+    return import_module("pagination")
+
+
+class PageSource:
+    def __init__(self, total_pages: int, delay: float = 0.0):
+        self.total_pages = total_pages
+        self.delay = delay
+        self.requested: list[int] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def __call__(self, page: int):
+        self.requested.append(page)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(self.delay)
+        self.in_flight -= 1
+        if page > self.total_pages:
+            return []
+        return [f"p{page}"]
+
+
+async def test_fetch_all_pages_returns_items_in_page_order():
+    pagination = load_pagination_module()
+    source = PageSource(total_pages=5)
+
+    result = await pagination.fetch_all_pages(source, window=3, limit=100)
+
+    assert result == {"items": ["p1", "p2", "p3", "p4", "p5"], "pages": 5, "truncated": False}
+    # Two windows of three pages; the second window contains the first empty page
+    assert sorted(source.requested) == [1, 2, 3, 4, 5, 6]
+
+
+async def test_fetch_all_pages_requests_window_concurrently():
+    pagination = load_pagination_module()
+    source = PageSource(total_pages=8, delay=0.01)
+
+    await pagination.fetch_all_pages(source, window=4, limit=100)
+
+    assert source.max_in_flight == 4
+
+
+async def test_fetch_all_pages_stops_at_limit_and_flags_truncation():
+    pagination = load_pagination_module()
+    source = PageSource(total_pages=10)
+
+    result = await pagination.fetch_all_pages(source, window=4, limit=6)
+
+    assert result["items"] == [f"p{page}" for page in range(1, 7)]
+    assert result["truncated"] is True
+    assert max(source.requested) == 6
+
+
+async def test_fetch_all_pages_empty_first_page():
+    pagination = load_pagination_module()
+    source = PageSource(total_pages=0)
+
+    result = await pagination.fetch_all_pages(source, window=1, limit=10)
+
+    assert result == {"items": [], "pages": 0, "truncated": False}
+    assert source.requested == [1]
+
+
+async def test_fetch_all_pages_defaults_from_env(monkeypatch: pytest.MonkeyPatch):
+    pagination = load_pagination_module()
+    monkeypatch.setenv("API_PAGE_WINDOW", "2")
+    monkeypatch.setenv("API_MAX_PAGES", "3")
+    source = PageSource(total_pages=10)
+
+    result = await pagination.fetch_all_pages(source)
+
+    assert result["pages"] == 3
+    assert result["truncated"] is True
+    assert sorted(source.requested) == [1, 2, 3]
+
+
+async def test_fetch_all_pages_propagates_errors():
+    pagination = load_pagination_module()
+
+    async def failing(page: int):
+        if page == 2:
+            raise RuntimeError("boom")
+        return [page]
+
+    with pytest.raises(RuntimeError, match="boom"):
+        await pagination.fetch_all_pages(failing, window=2, limit=10)
+
+
+async def test_fetch_all_pages_on_page_transforms_each_page_as_it_arrives():
+    pagination = load_pagination_module()
+    source = PageSource(total_pages=3)
+    seen = []
+
+    async def on_page(page: int, items: list):
+        seen.append(page)
+        return [item.upper() for item in items]
+
+    result = await pagination.fetch_all_pages(source, window=2, limit=10, on_page=on_page)
+
+    assert result["items"] == ["P1", "P2", "P3"]
+    # Empty pages are not passed to the callback
+    assert sorted(seen) == [1, 2, 3]
+
+
+async def test_fetch_all_pages_returns_pages_fetched_before_the_deadline():
+    pagination = load_pagination_module()
+    deadlines = import_module("deadlines")
+
+    async def fetch_page(page: int):
+        if page == 3:
+            raise deadlines.DeadlineExceeded("/services")
+        return [f"p{page}"]
+
+    result = await pagination.fetch_all_pages(fetch_page, window=4)
+
+    assert result == {"items": ["p1", "p2"], "pages": 2, "truncated": True}
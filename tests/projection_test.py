@@ -0,0 +1,49 @@
+import os
+import sys
+
+
+# Ensure the 'src' directory is on sys.path so that modules like 'projection' can be imported.
+PROJECT_ROOT = os.path.dirname(os.path.dirname(__file__))
+SRC_PATH = os.path.join(PROJECT_ROOT, "src")
+if SRC_PATH not in sys.path:
+    sys.path.insert(0, SRC_PATH)
+
+from importlib import import_module  # noqa: E402
+
+
+def load_projection_module():
+    return import_module("projection")
+
+
+def test_parse_fields_accepts_lists_and_comma_separated_strings():
+    projection = load_projection_module()
+    assert projection.parse_fields(None) is None
+    assert projection.parse_fields("") is None
+    assert projection.parse_fields(" id, name ,") == ["id", "name"]
+    assert projection.parse_fields(["id", " tier "]) == ["id", "tier"]
+
+
+def test_project_keeps_requested_keys_only():
+    projection = load_projection_module()
+    items = [{"id": "a", "name": "A", "description": "long"}, {"id": "b"}]
+    assert projection.project(items, ["id", "name"]) == [{"id": "a", "name": "A"}, {"id": "b"}]
+
+
+def test_project_without_fields_returns_items_unchanged():
+    projection = load_projection_module()
+    items = [{"id": "a", "name": "A"}]
+    assert projection.project(items, None) is items
+
+
+def test_parse_fields_falls_back_to_default_and_star_selects_everything():
+    projection = load_projection_module()
+    assert projection.parse_fields(None, projection.COMPACT_FIELDS) == ["id", "name", "tier", "type"]
+    assert projection.parse_fields(" ", projection.COMPACT_FIELDS) == ["id", "name", "tier", "type"]
+    assert projection.parse_fields("*", projection.COMPACT_FIELDS) is None
+    assert projection.parse_fields(["*"], projection.COMPACT_FIELDS) is None
+
+
+def test_project_passes_through_non_list_results():
+    projection = load_projection_module()
+    assert projection.project({"id": "a"}, ["name"]) == {"id": "a"}
+    assert projection.project(["a", {"id": "b", "name": "B"}], ["id"]) == ["a", {"id": "b"}]
@@ -1,5 +1,6 @@
 import os
 import sys
+from datetime import date, timedelta
 from typing import Any, List, Tuple
 
 import pytest
@@ -20,13 +21,20 @@ def load_releases_module():
 
 
 class DummyApiCaller:
+    """
+    Serves the releases of the requested window from a list, like the api
+    """
+
     def __init__(self, response: Any):
         self.response = response
         self.calls: List[Tuple[str, Any]] = []
+        self.ttls = {}
 
-    def call_get(self, url: str, params: dict | None = None):
+    def call_get(self, url: str, params: dict | None = None, ttl: float | None = None):
         self.calls.append((url, params))
-        return self.response
+        self.ttls[url] = ttl
+        _, _, start, end = url.split("/")
+        return [release for release in self.response if start <= release["release_date"] < end]
 
 
 def call_fn(func_or_tool, *args, **kwargs):
@@ -44,7 +52,7 @@ def test_prompt_get_releases():
     assert "array of release objects" in prompt
 
 
-def test_get_releases_tool_calls_api_and_returns_data(monkeypatch: pytest.MonkeyPatch):
+async def test_get_releases_tool_calls_api_and_returns_data(monkeypatch: pytest.MonkeyPatch):
     releases = load_releases_module()
     fake_response = [
         {"service": "orders", "service_id": "svc-1", "version": "1.2.3", "release_date": "2024-01-02"}
@@ -53,14 +61,21 @@ def test_get_releases_tool_calls_api_and_returns_data(monkeypatch: pytest.Monkey
     # Patch the module-level api_caller used inside releases.get_releases
     monkeypatch.setattr(releases, "api_caller", dummy, raising=True)
 
-    result = call_fn(releases.get_releases, "2024-01-01", "2024-01-31")
+    result = await call_fn(releases.get_releases, "2024-01-01", "2024-01-31")
 
     assert result == fake_response
-    # Verify proper URL formation with leading slash
-    assert dummy.calls == [("/releases/2024-01-01/2024-01-31", None)]
+    # Whole weeks from Monday to Monday, then single days
+    assert dummy.calls == [
+        ("/releases/2024-01-01/2024-01-08", None),
+        ("/releases/2024-01-08/2024-01-15", None),
+        ("/releases/2024-01-15/2024-01-22", None),
+        ("/releases/2024-01-22/2024-01-29", None),
+        ("/releases/2024-01-29/2024-01-30", None),
+        ("/releases/2024-01-30/2024-01-31", None),
+    ]
 
 
-def test_get_releases_resource_calls_api_and_returns_data(monkeypatch: pytest.MonkeyPatch):
+async def test_get_releases_resource_calls_api_and_returns_data(monkeypatch: pytest.MonkeyPatch):
     releases = load_releases_module()
     fake_response = [
         {"service": "billing", "service_id": "svc-2", "version": "2.0.0", "release_date": "2024-02-10"}
@@ -69,7 +84,128 @@ def test_get_releases_resource_calls_api_and_returns_data(monkeypatch: pytest.Mo
     # Patch the module-level api_caller used inside releases.get_releases_resource
     monkeypatch.setattr(releases, "api_caller", dummy, raising=True)
 
-    result = call_fn(releases.get_releases_resource, "2024-02-01", "2024-02-29")
+    result = await call_fn(releases.get_releases_resource, "2024-02-01", "2024-02-29")
 
     assert result == fake_response
-    assert dummy.calls == [("/releases/2024-02-01/2024-02-29", None)]
+    assert dummy.calls[0] == ("/releases/2024-02-01/2024-02-02", None)
+    assert ("/releases/2024-02-05/2024-02-12", None) in dummy.calls
+    assert len(dummy.calls) == 10
+
+
+async def test_get_releases_tool_returns_table_when_asked(monkeypatch: pytest.MonkeyPatch):
+    from fastmcp import Client
+
+    releases = load_releases_module()
+    fake_response = [
+        {"service": "orders", "version": "1.0.0", "release_date": "2024-01-10"},
+        {"service": "billing", "version": "2.0.0", "release_date": "2024-01-12"},
+    ]
+    monkeypatch.setattr(releases, "api_caller", DummyApiCaller(fake_response), raising=True)
+
+    async with Client(releases.release_mcp) as client:
+        result = await client.call_tool("get_releases", {"start": "2024-01-01", "end": "2024-02-01", "tabular": True})
+
+    assert result.data == {
+        "columns": ["service", "version", "release_date"],
+        "rows": [["orders", "1.0.0", "2024-01-10"], ["billing", "2.0.0", "2024-01-12"]],
+    }
+
+
+def test_release_buckets_align_to_calendar_weeks():
+    releases = load_releases_module()
+
+    buckets = releases.release_buckets(date(2024, 3, 6), date(2024, 3, 21))
+
+    assert buckets == [
+        (date(2024, 3, 6), date(2024, 3, 7)),
+        (date(2024, 3, 7), date(2024, 3, 8)),
+        (date(2024, 3, 8), date(2024, 3, 9)),
+        (date(2024, 3, 9), date(2024, 3, 10)),
+        (date(2024, 3, 10), date(2024, 3, 11)),
+        (date(2024, 3, 11), date(2024, 3, 18)),
+        (date(2024, 3, 18), date(2024, 3, 19)),
+        (date(2024, 3, 19), date(2024, 3, 20)),
+        (date(2024, 3, 20), date(2024, 3, 21)),
+    ]
+    assert releases.release_buckets(date(2024, 3, 6), date(2024, 3, 6)) == []
+
+
+def test_release_buckets_group_history_into_years_and_months():
+    releases = load_releases_module()
+
+    buckets = releases.release_buckets(date(2022, 11, 29), date(2024, 3, 21), history_before=date(2024, 3, 12))
+
+    assert buckets == [
+        (date(2022, 11, 29), date(2022, 11, 30)),
+        (date(2022, 11, 30), date(2022, 12, 1)),
+        (date(2022, 12, 1), date(2023, 1, 1)),
+        (date(2023, 1, 1), date(2024, 1, 1)),
+        (date(2024, 1, 1), date(2024, 2, 1)),
+        (date(2024, 2, 1), date(2024, 3, 1)),
+        (date(2024, 3, 1), date(2024, 3, 2)),
+        (date(2024, 3, 2), date(2024, 3, 3)),
+        (date(2024, 3, 3), date(2024, 3, 4)),
+        (date(2024, 3, 4), date(2024, 3, 11)),
+        (date(2024, 3, 11), date(2024, 3, 18)),
+        (date(2024, 3, 18), date(2024, 3, 19)),
+        (date(2024, 3, 19), date(2024, 3, 20)),
+        (date(2024, 3, 20), date(2024, 3, 21)),
+    ]
+    # Five years of history stay far below the bucket limit
+    assert len(releases.release_buckets(date(2019, 6, 5), date(2024, 6, 5), history_before=date(2024, 6, 4))) < 40
+
+
+async def test_get_releases_merges_buckets_in_date_order_and_caches_closed_ones(monkeypatch: pytest.MonkeyPatch):
+    releases = load_releases_module()
+    monkeypatch.setenv("RELEASE_HISTORY_TTL", "86400")
+    today = date.today()
+    fake_response = [
+        {"service": "orders", "version": "1.0.0", "release_date": (today - timedelta(days=20)).isoformat()},
+        {"service": "billing", "version": "2.0.0", "release_date": (today - timedelta(days=9)).isoformat()},
+        {"service": "orders", "version": "1.1.0", "release_date": today.isoformat()},
+    ]
+    dummy = DummyApiCaller(fake_response)
+    monkeypatch.setattr(releases, "api_caller", dummy, raising=True)
+    start = (today - timedelta(days=30)).isoformat()
+    end = (today + timedelta(days=1)).isoformat()
+
+    result = await call_fn(releases.get_releases, start, end)
+
+    assert result == fake_response
+    # Buckets that ended at least a day ago are final and kept for the history ttl, the rest use the usual ttl
+    for url, ttl in dummy.ttls.items():
+        bucket_end = date.fromisoformat(url.split("/")[3])
+        assert ttl == (86400 if bucket_end <= today - timedelta(days=1) else None), url
+    assert set(dummy.ttls.values()) == {86400, None}
+    assert [url for url, _ in dummy.calls] == sorted(url for url, _ in dummy.calls)
+
+
+async def test_get_releases_sends_windows_that_are_not_date_ranges_as_is(monkeypatch: pytest.MonkeyPatch):
+    releases = load_releases_module()
+    dummy = DummyApiCaller([])
+    monkeypatch.setattr(releases, "api_caller", dummy, raising=True)
+
+    await call_fn(releases.get_releases, "2024-01-31", "2024-01-01")
+    await call_fn(releases.get_releases, "last-week", "today")
+    monkeypatch.setenv("RELEASE_CHUNKING", "false")
+    await call_fn(releases.get_releases, "2024-01-01", "2024-03-31")
+
+    assert dummy.calls == [
+        ("/releases/2024-01-31/2024-01-01", None),
+        ("/releases/last-week/today", None),
+        ("/releases/2024-01-01/2024-03-31", None),
+    ]
+
+
+async def test_get_releases_fetches_in_one_request_past_bucket_limit_or_without_cache(monkeypatch: pytest.MonkeyPatch):
+    releases = load_releases_module()
+    dummy = DummyApiCaller([])
+    monkeypatch.setattr(releases, "api_caller", dummy, raising=True)
+
+    monkeypatch.setenv("RELEASE_MAX_BUCKETS", "3")
+    await call_fn(releases.get_releases, "2024-03-06", "2024-03-21")
+    monkeypatch.delenv("RELEASE_MAX_BUCKETS")
+    monkeypatch.setenv("API_CACHE_ENABLED", "false")
+    await call_fn(releases.get_releases, "2024-03-06", "2024-03-21")
+
+    assert dummy.calls == [("/releases/2024-03-06/2024-03-21", None), ("/releases/2024-03-06/2024-03-21", None)]
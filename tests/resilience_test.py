@@ -0,0 +1,99 @@
+import os
+import sys
+
+import pytest
+
+
+# Ensure the 'src' directory is on sys.path so that modules like 'resilience' can be imported.
+PROJECT_ROOT = os.path.dirname(os.path.dirname(__file__))
+SRC_PATH = os.path.join(PROJECT_ROOT, "src")
+if SRC_PATH not in sys.path:
+    sys.path.insert(0, SRC_PATH)
+
+from importlib import import_module  # noqa: E402
+
+
+def load_resilience_module():
+    return import_module("resilience")
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, headers: dict = None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+def test_retry_delay_backs_off_exponentially_with_jitter(monkeypatch: pytest.MonkeyPatch):
+    resilience = load_resilience_module()
+    monkeypatch.setenv("API_RETRIES", "3")
+    monkeypatch.setenv("API_RETRY_BASE_DELAY", "0.1")
+    monkeypatch.setenv("API_RETRY_MAX_DELAY", "0.3")
+
+    delays = [resilience.retry_delay(attempt, FakeResponse(503)) for attempt in range(4)]
+
+    assert 0 <= delays[0] <= 0.1
+    assert 0 <= delays[1] <= 0.2
+    assert 0 <= delays[2] <= 0.3
+    assert delays[3] is None
+
+
+def test_retry_delay_only_retries_transient_failures(monkeypatch: pytest.MonkeyPatch):
+    resilience = load_resilience_module()
+    monkeypatch.setenv("API_RETRY_MAX_DELAY", "2")
+
+    assert resilience.retry_delay(0, FakeResponse(200)) is None
+    assert resilience.retry_delay(0, FakeResponse(404)) is None
+    assert resilience.retry_delay(0, FakeResponse(500)) is None
+    assert resilience.retry_delay(0, error=TimeoutError()) is not None
+    assert resilience.retry_delay(0, FakeResponse(429, {"Retry-After": "1.5"})) == 1.5
+    # Waiting longer than the cap is not worth it, the error is returned instead
+    assert resilience.retry_delay(0, FakeResponse(503, {"Retry-After": "60"})) is None
+
+
+def test_circuit_opens_after_consecutive_failures_and_probes_after_reset(monkeypatch: pytest.MonkeyPatch):
+    resilience = load_resilience_module()
+    monkeypatch.setenv("API_CIRCUIT_FAILURE_THRESHOLD", "3")
+    monkeypatch.setenv("API_CIRCUIT_RESET_TIMEOUT", "30")
+    clock = [1000.0]
+    monkeypatch.setattr(resilience.time, "monotonic", lambda: clock[0])
+    breakers = resilience.CircuitBreakers()
+
+    for failed in (True, True, False, True, True):
+        breakers.before_request("/services/1234/teams")
+        breakers.record("/services/1234/teams", failed)
+    assert breakers.stats()["circuits"]["/services/{id}/teams"] == {"state": "closed", "failures": 2}
+
+    breakers.record("/services/5678/teams", True)
+    with pytest.raises(resilience.CircuitOpenError) as error:
+        breakers.before_request("/services/1234/teams")
+    assert error.value.endpoint == "/services/{id}/teams"
+    breakers.before_request("/teams")
+
+    # After the reset timeout a single probe is let through, a failed probe opens the circuit again
+    clock[0] += 30
+    breakers.before_request("/services/1234/teams")
+    with pytest.raises(resilience.CircuitOpenError):
+        breakers.before_request("/services/1234/teams")
+    breakers.record("/services/1234/teams", True)
+    with pytest.raises(resilience.CircuitOpenError):
+        breakers.before_request("/services/1234/teams")
+
+    # A successful probe closes it
+    clock[0] += 30
+    breakers.before_request("/services/1234/teams")
+    breakers.record("/services/1234/teams", False)
+    breakers.before_request("/services/1234/teams")
+    stats = breakers.stats()
+    assert stats["opened"] == 1
+    assert stats["rejected"] == 3
+    assert stats["circuits"]["/services/{id}/teams"]["state"] == "closed"
+
+
+def test_circuit_breaker_can_be_disabled(monkeypatch: pytest.MonkeyPatch):
+    resilience = load_resilience_module()
+    monkeypatch.setenv("API_CIRCUIT_FAILURE_THRESHOLD", "1")
+    breakers = resilience.CircuitBreakers()
+    breakers.record("/teams", True)
+
+    monkeypatch.setenv("API_CIRCUIT_BREAKER_ENABLED", "false")
+    breakers.before_request("/teams")
@@ -0,0 +1,106 @@
+import os
+import sys
+
+import pytest
+
+
+# Ensure the 'src' directory is on sys.path so that modules like 'search' can be imported.
+PROJECT_ROOT = os.path.dirname(os.path.dirname(__file__))
+SRC_PATH = os.path.join(PROJECT_ROOT, "src")
+if SRC_PATH not in sys.path:
+    sys.path.insert(0, SRC_PATH)
+
+from importlib import import_module  # noqa: E402
+
+
+def load_search_module():
+    return import_module("search")
+
+
+SERVICES = [
+    {"id": "1", "name": "Payments-API"},
+    {"id": "2", "name": "payment-worker"},
+    {"id": "3", "name": "PagerDuty Bridge"},
+    {"id": "4", "name": "orders"},
+    {"id": "5"},
+]
+TEAMS = [{"id": "t1", "name": "Payments"}, {"id": "t2", "name": "Platform Engineering"}]
+
+
+def test_normalize_and_trigrams():
+    search = load_search_module()
+    assert search.normalize("  Payments-API_v2 ") == "payments api v2"
+    assert search.normalize(None) == ""
+    assert search.trigrams("db") == {"  d", " db", "db "}
+
+
+def test_index_ranks_exact_then_substring_then_fuzzy_matches():
+    search = load_search_module()
+    index = search.NameIndex(SERVICES, TEAMS)
+
+    assert [service["id"] for service in index.search_services("payments api")] == ["1", "2"]
+    # Both contain the query, the one closer to it in length first; PagerDuty only shares a couple of trigrams
+    assert [service["id"] for service in index.search_services("payment")] == ["1", "2"]
+    assert [service["id"] for service in index.search_services("worker")] == ["2"]
+    assert index.search_services("orders") == [{"id": "4", "name": "orders"}]
+    assert index.search_services("") == []
+    assert index.search_services("zzz") == []
+    assert index.stats()["services"] == 4
+
+
+@pytest.mark.parametrize("query", ["paymnets api", "Paymetns", "PAYMENTS_API"])
+def test_index_tolerates_typos_and_formatting(query: str):
+    search = load_search_module()
+    index = search.NameIndex(SERVICES, TEAMS)
+    assert index.search_services(query)[0]["id"] in ("1", "2")
+
+
+def test_index_searches_team_names_separately():
+    search = load_search_module()
+    index = search.NameIndex(SERVICES, TEAMS)
+
+    assert index.search_teams("payments") == [{"id": "t1", "name": "Payments"}]
+    assert index.search_teams("platfrom")[0]["id"] == "t2"
+    assert index.search_teams("orders") == []
+
+
+class CatalogFetch:
+    def __init__(self):
+        self.calls = []
+
+    async def __call__(self, url: str, params: dict = None):
+        self.calls.append(url)
+        if params["page"] > 1:
+            return []
+        return SERVICES if url == "/services" else TEAMS
+
+
+async def test_snapshot_builds_in_background_and_drops_index_on_invalidate(monkeypatch: pytest.MonkeyPatch):
+    search = load_search_module()
+    monkeypatch.setenv("SEARCH_INDEX_ENABLED", "true")
+    fetch = CatalogFetch()
+    snapshot = search.SearchSnapshot(fetch)
+
+    assert snapshot.current() is None
+    await snapshot.refresh()
+    index = snapshot.current()
+    assert index.search_teams("payments")[0]["id"] == "t1"
+    assert set(fetch.calls) == {"/services", "/teams"}
+    assert snapshot.stats()["index"]["teams"] == 2
+
+    snapshot.invalidate()
+    assert snapshot.stats()["index"] is None
+
+
+async def test_snapshot_is_stale_after_refresh_interval_and_can_be_disabled(monkeypatch: pytest.MonkeyPatch):
+    search = load_search_module()
+    monkeypatch.setenv("SEARCH_INDEX_ENABLED", "true")
+    snapshot = search.SearchSnapshot(CatalogFetch())
+    await snapshot.refresh()
+
+    monkeypatch.setenv("SEARCH_REFRESH_INTERVAL", "-1")
+    assert snapshot.current() is None
+    monkeypatch.setenv("SEARCH_REFRESH_INTERVAL", "300")
+    assert snapshot.current() is not None
+    monkeypatch.setenv("SEARCH_INDEX_ENABLED", "false")
+    assert snapshot.current() is None
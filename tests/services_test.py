@@ -19,6 +19,12 @@ def load_services_module():
     return import_module("services")
 
 
+@pytest.fixture(autouse=True)
+def disable_search_index(monkeypatch: pytest.MonkeyPatch):
+    # Keep the background index rebuild out of tests that exercise api searches; index tests re-enable it
+    monkeypatch.setenv("SEARCH_INDEX_ENABLED", "false")
+
+
 class DummyApiCaller:
     def __init__(self, response: Any):
         self.response = response
@@ -50,30 +56,63 @@ def test_prompt_get_services_mentions_tool_and_resource():
     assert "serviceatlas://services?page={page}" in prompt
 
 
-def test_get_services_tool_calls_api_with_pagination(monkeypatch: pytest.MonkeyPatch):
+def test_prompt_update_service_asks_for_full_service_first():
+    services = load_services_module()
+    prompt = call_fn(services.prompt_update_service, "svc-1")
+    assert "update_service" in prompt
+    assert '["*"]' in prompt
+
+
+async def test_get_services_tool_calls_api_with_pagination(monkeypatch: pytest.MonkeyPatch):
     services = load_services_module()
     fake_response = [{"id": "svc-1", "name": "service 1"}]
     dummy = DummyApiCaller(fake_response)
     monkeypatch.setattr(services, "api_caller", dummy, raising=True)
 
-    result = call_fn(services.get_services, page=2)
+    result = await call_fn(services.get_services, page=2)
 
     assert result == fake_response
     assert dummy.calls == [("GET", "/services", {"page": 2, "pageSize": 25})]
 
 
-def test_get_services_resource_calls_api_with_pagination(monkeypatch: pytest.MonkeyPatch):
+async def test_get_services_resource_calls_api_with_pagination(monkeypatch: pytest.MonkeyPatch):
     services = load_services_module()
     fake_response = [{"id": "svc-1", "name": "service 1"}]
     dummy = DummyApiCaller(fake_response)
     monkeypatch.setattr(services, "api_caller", dummy, raising=True)
 
-    result = call_fn(services.get_services_resource, page=3)
+    result = await call_fn(services.get_services_resource, page=3)
 
     assert result == fake_response
     assert dummy.calls == [("GET", "/services", {"page": 3, "pageSize": 25})]
 
 
+async def test_get_services_returns_compact_profile_by_default(monkeypatch: pytest.MonkeyPatch):
+    services = load_services_module()
+    fake_response = [{"id": "svc-1", "name": "service 1", "tier": 1, "type": "service", "description": "long text"}]
+    dummy = DummyApiCaller(fake_response)
+    monkeypatch.setattr(services, "api_caller", dummy, raising=True)
+
+    compact = await call_fn(services.get_services)
+    selected = await call_fn(services.get_services, fields=["name", "description"])
+    full = await call_fn(services.get_services_resource, fields="*")
+
+    assert compact == [{"id": "svc-1", "name": "service 1", "tier": 1, "type": "service"}]
+    assert selected == [{"name": "service 1", "description": "long text"}]
+    assert full == fake_response
+
+
+async def test_services_resource_templates_match_query_parameters():
+    services = load_services_module()
+    templates = {template.uri_template: template for template in await services.service_mcp.list_resource_templates()}
+
+    listed = templates["serviceatlas://services{?page,fields}"].matches("serviceatlas://services?page=2&fields=id,tier")
+    found = templates["serviceatlas://services/search/{query}{?fields}"].matches("serviceatlas://services/search/db?fields=*")
+
+    assert listed == {"page": "2", "fields": "id,tier"}
+    assert found == {"query": "db", "fields": "*"}
+
+
 def test_prompt_get_services_by_team_mentions_tool_and_resource():
     services = load_services_module()
     prompt = call_fn(services.prompt_get_services_by_team, "team-123")
@@ -88,7 +127,7 @@ def test_prompt_find_service_by_name_mentions_tool_and_resource():
     assert "serviceatlas://services/search/orders" in prompt
 
 
-def test_find_service_by_name_tool_calls_api_with_params_and_returns_data(
+async def test_find_service_by_name_tool_calls_api_with_params_and_returns_data(
     monkeypatch: pytest.MonkeyPatch,
 ):
     services = load_services_module()
@@ -98,13 +137,13 @@ def test_find_service_by_name_tool_calls_api_with_params_and_returns_data(
     dummy = DummyApiCaller(fake_response)
     monkeypatch.setattr(services, "api_caller", dummy, raising=True)
 
-    result = call_fn(services.find_service_by_name, "orders")
+    result = await call_fn(services.find_service_by_name, "orders")
 
     assert result == fake_response
     assert dummy.calls == [("GET", "/services/search", {"query": "orders"})]
 
 
-def test_find_service_by_name_resource_calls_api_with_params_and_returns_data(
+async def test_find_service_by_name_resource_calls_api_with_params_and_returns_data(
     monkeypatch: pytest.MonkeyPatch,
 ):
     services = load_services_module()
@@ -114,13 +153,13 @@ def test_find_service_by_name_resource_calls_api_with_params_and_returns_data(
     dummy = DummyApiCaller(fake_response)
     monkeypatch.setattr(services, "api_caller", dummy, raising=True)
 
-    result = call_fn(services.find_service_by_name_resource, "billing")
+    result = await call_fn(services.find_service_by_name_resource, "billing")
 
     assert result == fake_response
     assert dummy.calls == [("GET", "/services/search", {"query": "billing"})]
 
 
-def test_get_teams_by_service_tool_calls_api_and_returns_data(monkeypatch: pytest.MonkeyPatch):
+async def test_get_teams_by_service_tool_calls_api_and_returns_data(monkeypatch: pytest.MonkeyPatch):
     services = load_services_module()
     fake_response = [
         {"id": "team-1", "name": "Team One"},
@@ -129,13 +168,13 @@ def test_get_teams_by_service_tool_calls_api_and_returns_data(monkeypatch: pytes
     dummy = DummyApiCaller(fake_response)
     monkeypatch.setattr(services, "api_caller", dummy, raising=True)
 
-    result = call_fn(services.get_teams_by_service, "svc-123")
+    result = await call_fn(services.get_teams_by_service, "svc-123")
 
     assert result == fake_response
     assert dummy.calls == [("GET", "/services/svc-123/teams", None)]
 
 
-def test_get_teams_by_service_resource_calls_api_and_returns_data(
+async def test_get_teams_by_service_resource_calls_api_and_returns_data(
     monkeypatch: pytest.MonkeyPatch,
 ):
     services = load_services_module()
@@ -145,7 +184,7 @@ def test_get_teams_by_service_resource_calls_api_and_returns_data(
     dummy = DummyApiCaller(fake_response)
     monkeypatch.setattr(services, "api_caller", dummy, raising=True)
 
-    result = call_fn(services.get_teams_by_service_resource, "svc-xyz")
+    result = await call_fn(services.get_teams_by_service_resource, "svc-xyz")
 
     assert result == fake_response
     assert dummy.calls == [("GET", "/services/svc-xyz/teams", None)]
@@ -158,7 +197,7 @@ def test_prompt_get_service_risk_mentions_tool_and_resource():
     assert "serviceatlas://services/svc-123/risk" in prompt
 
 
-def test_get_service_risk_tool_calls_api_and_returns_data(monkeypatch: pytest.MonkeyPatch):
+async def test_get_service_risk_tool_calls_api_and_returns_data(monkeypatch: pytest.MonkeyPatch):
     services = load_services_module()
     fake_response = {
         "changeRisk": {"risk": "medium", "score": 60},
@@ -167,13 +206,13 @@ def test_get_service_risk_tool_calls_api_and_returns_data(monkeypatch: pytest.Mo
     dummy = DummyApiCaller(fake_response)
     monkeypatch.setattr(services, "api_caller", dummy, raising=True)
 
-    result = call_fn(services.get_service_risk, "svc-123")
+    result = await call_fn(services.get_service_risk, "svc-123")
 
     assert result == fake_response
     assert dummy.calls == [("GET", "/reports/services/svc-123/risk", None)]
 
 
-def test_get_service_risk_resource_calls_api_and_returns_data(monkeypatch: pytest.MonkeyPatch):
+async def test_get_service_risk_resource_calls_api_and_returns_data(monkeypatch: pytest.MonkeyPatch):
     services = load_services_module()
     fake_response = {
         "changeRisk": {"risk": "low", "score": 20},
@@ -181,13 +220,13 @@ def test_get_service_risk_resource_calls_api_and_returns_data(monkeypatch: pytes
     dummy = DummyApiCaller(fake_response)
     monkeypatch.setattr(services, "api_caller", dummy, raising=True)
 
-    result = call_fn(services.get_service_risk_resource, "svc-456")
+    result = await call_fn(services.get_service_risk_resource, "svc-456")
 
     assert result == fake_response
     assert dummy.calls == [("GET", "/reports/services/svc-456/risk", None)]
 
 
-def test_create_service_tool_calls_api_and_returns_data(monkeypatch: pytest.MonkeyPatch):
+async def test_create_service_tool_calls_api_and_returns_data(monkeypatch: pytest.MonkeyPatch):
     services = load_services_module()
     fake_response = {
         "id": "new-svc-id",
@@ -200,7 +239,7 @@ def test_create_service_tool_calls_api_and_returns_data(monkeypatch: pytest.Monk
     dummy = DummyApiCaller(fake_response)
     monkeypatch.setattr(services, "api_caller", dummy, raising=True)
 
-    result = call_fn(
+    result = await call_fn(
         services.create_service,
         name="NewService",
         description="Description",
@@ -224,13 +263,13 @@ def test_create_service_tool_calls_api_and_returns_data(monkeypatch: pytest.Monk
     ]
 
 
-def test_create_service_tool_uses_defaults(monkeypatch: pytest.MonkeyPatch):
+async def test_create_service_tool_uses_defaults(monkeypatch: pytest.MonkeyPatch):
     services = load_services_module()
     fake_response = {"id": "new-svc-id"}
     dummy = DummyApiCaller(fake_response)
     monkeypatch.setattr(services, "api_caller", dummy, raising=True)
 
-    call_fn(services.create_service, name="Svc", description="Desc")
+    await call_fn(services.create_service, name="Svc", description="Desc")
 
     assert dummy.calls == [
         (
@@ -246,31 +285,31 @@ def test_create_service_tool_uses_defaults(monkeypatch: pytest.MonkeyPatch):
     ]
 
 
-def test_get_service_types_tool_calls_api_and_returns_data(monkeypatch: pytest.MonkeyPatch):
+async def test_get_service_types_tool_calls_api_and_returns_data(monkeypatch: pytest.MonkeyPatch):
     services = load_services_module()
     fake_response = ["service", "library", "resource", "internal"]
     dummy = DummyApiCaller(fake_response)
     monkeypatch.setattr(services, "api_caller", dummy, raising=True)
 
-    result = call_fn(services.get_service_types)
+    result = await call_fn(services.get_service_types)
 
     assert result == fake_response
     assert dummy.calls == [("GET", "/services/types", None)]
 
 
-def test_get_service_types_resource_calls_api_and_returns_data(monkeypatch: pytest.MonkeyPatch):
+async def test_get_service_types_resource_calls_api_and_returns_data(monkeypatch: pytest.MonkeyPatch):
     services = load_services_module()
     fake_response = ["service", "library", "resource", "internal"]
     dummy = DummyApiCaller(fake_response)
     monkeypatch.setattr(services, "api_caller", dummy, raising=True)
 
-    result = call_fn(services.get_service_types_resource)
+    result = await call_fn(services.get_service_types_resource)
 
     assert result == fake_response
     assert dummy.calls == [("GET", "/services/types", None)]
 
 
-def test_update_service_tool_calls_api_and_returns_data(monkeypatch: pytest.MonkeyPatch):
+async def test_update_service_tool_calls_api_and_returns_data(monkeypatch: pytest.MonkeyPatch):
     services = load_services_module()
     fake_response = {
         "id": "svc-123",
@@ -283,7 +322,7 @@ def test_update_service_tool_calls_api_and_returns_data(monkeypatch: pytest.Monk
     dummy = DummyApiCaller(fake_response)
     monkeypatch.setattr(services, "api_caller", dummy, raising=True)
 
-    result = call_fn(
+    result = await call_fn(
         services.update_service,
         service_id="svc-123",
         name="UpdatedService",
@@ -311,3 +350,292 @@ def test_update_service_tool_calls_api_and_returns_data(monkeypatch: pytest.Monk
             }
         )
     ]
+
+
+class PagingDummyApiCaller:
+    def __init__(self, pages: dict):
+        self.pages = pages
+        self.calls: List[Tuple[str, Any]] = []
+
+    def call_get(self, url: str, params: dict | None = None):
+        self.calls.append(("GET", url, params))
+        return self.pages.get(params["page"], [])
+
+
+async def test_get_all_services_fetches_every_page(monkeypatch: pytest.MonkeyPatch):
+    services = load_services_module()
+    pages = {page: [{"id": f"svc-{page}-{i}", "name": f"s{page}{i}", "tier": 2} for i in range(25)] for page in range(1, 7)}
+    dummy = PagingDummyApiCaller(pages)
+    monkeypatch.setattr(services, "api_caller", dummy, raising=True)
+
+    result = await call_fn(services.get_all_services)
+
+    assert result["count"] == 150
+    assert result["truncated"] is False
+    assert result["services"][0] == {"id": "svc-1-0", "name": "s10", "tier": 2}
+    assert result["services"][-1]["id"] == "svc-6-24"
+    assert {call[2]["pageSize"] for call in dummy.calls} == {25}
+
+
+async def test_get_all_services_projects_fields(monkeypatch: pytest.MonkeyPatch):
+    services = load_services_module()
+    pages = {1: [{"id": "a", "name": "A", "description": "long text"}]}
+    dummy = PagingDummyApiCaller(pages)
+    monkeypatch.setattr(services, "api_caller", dummy, raising=True)
+
+    tool_result = await call_fn(services.get_all_services, fields=["id", "name"])
+    resource_result = await call_fn(services.get_all_services_resource, fields="id")
+
+    assert tool_result == {"services": [{"id": "a", "name": "A"}], "count": 1, "truncated": False}
+    assert resource_result["services"] == [{"id": "a"}]
+
+
+async def test_get_all_services_reports_progress_through_client(monkeypatch: pytest.MonkeyPatch):
+    from fastmcp import Client
+
+    services = load_services_module()
+    pages = {page: [{"id": f"svc-{page}"}] for page in range(1, 4)}
+    monkeypatch.setattr(services, "api_caller", PagingDummyApiCaller(pages), raising=True)
+    progress = []
+
+    async def on_progress(value: float, total: float | None, message: str | None):
+        progress.append(value)
+
+    async with Client(services.service_mcp, progress_handler=on_progress) as client:
+        result = await client.call_tool("get_all_services", {"fields": ["id"]})
+
+    assert result.structured_content["count"] == 3
+    assert sorted(progress) == [1, 2, 3]
+
+
+class RoutingDummyApiCaller:
+    def __init__(self, routes: dict):
+        self.routes = routes
+        self.calls: List[str] = []
+
+    async def call_get(self, url: str, params: dict | None = None):
+        self.calls.append(url)
+        response = self.routes[url]
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+async def test_get_teams_for_services_returns_map_with_per_item_errors(monkeypatch: pytest.MonkeyPatch):
+    services = load_services_module()
+    dummy = RoutingDummyApiCaller({
+        "/services/svc-1/teams": [{"id": "team-1", "name": "One"}],
+        "/services/svc-2/teams": RuntimeError("404 Not Found"),
+        "/services/svc-3/teams": [],
+    })
+    monkeypatch.setattr(services, "api_caller", dummy, raising=True)
+
+    result = await call_fn(services.get_teams_for_services, ["svc-1", "svc-2", "svc-3", "svc-1"])
+
+    assert result == {
+        "teams": {"svc-1": [{"id": "team-1", "name": "One"}], "svc-3": []},
+        "errors": {"svc-2": "404 Not Found"},
+    }
+    # Duplicate ids are only fetched once
+    assert sorted(dummy.calls) == ["/services/svc-1/teams", "/services/svc-2/teams", "/services/svc-3/teams"]
+
+
+async def test_get_teams_for_services_requires_ids():
+    services = load_services_module()
+    with pytest.raises(ValueError, match="service_ids"):
+        await call_fn(services.get_teams_for_services, [])
+
+
+def risk_report(level: str, score: float) -> dict:
+    return {"changeRisk": {"level": level, "score": score}, "healthRisk": {"dependentCount": 1}}
+
+
+RISK_ROUTES = {
+    "/reports/services/a/risk": risk_report("low", 12.5),
+    "/reports/services/b/risk": risk_report("high", 88.0),
+    "/reports/services/c/risk": risk_report("Medium", 47.0),
+    "/reports/services/d/risk": RuntimeError("502 Bad Gateway"),
+}
+
+
+async def test_get_service_risks_ranks_by_score(monkeypatch: pytest.MonkeyPatch):
+    services = load_services_module()
+    monkeypatch.setattr(services, "api_caller", RoutingDummyApiCaller(RISK_ROUTES), raising=True)
+
+    result = await call_fn(services.get_service_risks, ["a", "b", "c", "d"])
+
+    assert [(risk["service_id"], risk["level"], risk["score"]) for risk in result["risks"]] == [
+        ("b", "high", 88.0),
+        ("c", "medium", 47.0),
+        ("a", "low", 12.5),
+    ]
+    assert result["risks"][0]["report"] == RISK_ROUTES["/reports/services/b/risk"]
+    assert result["errors"] == {"d": "502 Bad Gateway"}
+
+
+async def test_get_service_risks_filters_by_min_level_and_top_n(monkeypatch: pytest.MonkeyPatch):
+    services = load_services_module()
+    monkeypatch.setattr(services, "api_caller", RoutingDummyApiCaller(RISK_ROUTES), raising=True)
+
+    by_level = await call_fn(services.get_service_risks, ["a", "b", "c"], min_level="medium")
+    top = await call_fn(services.get_service_risks, ["a", "b", "c"], top_n=1)
+
+    assert [risk["service_id"] for risk in by_level["risks"]] == ["b", "c"]
+    assert [risk["service_id"] for risk in top["risks"]] == ["b"]
+
+
+async def test_get_service_risks_puts_reports_without_score_last(monkeypatch: pytest.MonkeyPatch):
+    services = load_services_module()
+    routes = {"/reports/services/x/risk": {"healthRisk": {}}, "/reports/services/y/risk": risk_report("low", 1)}
+    monkeypatch.setattr(services, "api_caller", RoutingDummyApiCaller(routes), raising=True)
+
+    result = await call_fn(services.get_service_risks, ["x", "y"])
+
+    assert [risk["service_id"] for risk in result["risks"]] == ["y", "x"]
+    assert result["risks"][1]["score"] is None
+
+
+async def test_get_service_risks_validates_filters():
+    services = load_services_module()
+    with pytest.raises(ValueError, match="min_level"):
+        await call_fn(services.get_service_risks, ["a"], min_level="critical")
+    with pytest.raises(ValueError, match="top_n"):
+        await call_fn(services.get_service_risks, ["a"], top_n=0)
+
+
+class SearchDummyApiCaller:
+    """Serves one page of services, an empty upstream search, and accepts writes."""
+
+    def __init__(self, services: list):
+        self.services = services
+        self.calls: List[Tuple[str, Any]] = []
+
+    def call_get(self, url: str, params: dict | None = None):
+        self.calls.append(("GET", url, params))
+        if url == "/services":
+            return self.services if params["page"] == 1 else []
+        return []
+
+    def call_post(self, url: str, body: dict | None = None):
+        self.calls.append(("POST", url, body))
+        return {"id": "new"}
+
+    def call_put(self, url: str, body: dict | None = None):
+        self.calls.append(("PUT", url, body))
+        return body
+
+
+def use_search_index(monkeypatch: pytest.MonkeyPatch, services, dummy):
+    search = import_module("search")
+    monkeypatch.setenv("SEARCH_INDEX_ENABLED", "true")
+    monkeypatch.setattr(services, "api_caller", dummy, raising=True)
+    monkeypatch.setattr(search, "api_caller", dummy, raising=True)
+    monkeypatch.setattr(services, "search_snapshot", search.SearchSnapshot(search._fetch), raising=True)
+
+
+async def test_find_service_by_name_uses_local_index_once_built(monkeypatch: pytest.MonkeyPatch):
+    services = load_services_module()
+    dummy = SearchDummyApiCaller([
+        {"id": "svc-1", "name": "payments-api", "tier": 1, "url": "https://payments"}, {"id": "svc-2", "name": "orders"},
+    ])
+    use_search_index(monkeypatch, services, dummy)
+
+    # No index yet: answered by the api while the index is built in the background
+    await call_fn(services.find_service_by_name, "paymnets")
+    assert dummy.calls[0] == ("GET", "/services/search", {"query": "paymnets"})
+    await services.search_snapshot.refresh()
+    dummy.calls.clear()
+
+    result = await call_fn(services.find_service_by_name, "paymnets")
+    live = await call_fn(services.find_service_by_name, "paymnets", live=True)
+
+    assert result == [{"id": "svc-1", "name": "payments-api", "tier": 1}]
+    assert dummy.calls == [("GET", "/services/search", {"query": "paymnets"})]
+    assert live == []
+
+
+async def test_create_and_update_service_drop_the_search_index(monkeypatch: pytest.MonkeyPatch):
+    services = load_services_module()
+    use_search_index(monkeypatch, services, SearchDummyApiCaller([{"id": "svc-1", "name": "orders"}]))
+
+    for write in (
+        lambda: call_fn(services.create_service, name="billing"),
+        lambda: call_fn(services.update_service, service_id="svc-1", name="order-service"),
+    ):
+        await services.search_snapshot.refresh()
+        await write()
+        assert services.search_snapshot.stats()["index"] is None
+
+
+async def test_update_service_drops_the_dependency_graph(monkeypatch: pytest.MonkeyPatch):
+    services = load_services_module()
+    dependency = import_module("dependency")
+    dummy = SearchDummyApiCaller([{"id": "svc-1", "name": "orders"}])
+    monkeypatch.setattr(services, "api_caller", dummy, raising=True)
+
+    async def fetch(url, params=None):
+        return dummy.call_get(url, params)
+
+    snapshot = dependency.GraphSnapshot(fetch)
+    monkeypatch.setattr(dependency, "graph_snapshot", snapshot, raising=True)
+    await snapshot.refresh()
+    assert snapshot.stats()["graph"] is not None
+
+    await call_fn(services.update_service, service_id="svc-1", name="order-service")
+
+    assert snapshot.stats()["graph"] is None
+
+
+async def test_full_service_fetched_then_updated_keeps_its_fields(monkeypatch: pytest.MonkeyPatch):
+    services = load_services_module()
+    stored = {
+        "id": "svc-1", "name": "orders", "description": "Order intake", "type": "service", "tier": 2,
+        "url": "https://orders", "team": "t-1",
+    }
+    dummy = DummyApiCaller([stored])
+    monkeypatch.setattr(services, "api_caller", dummy, raising=True)
+
+    [service] = await call_fn(services.get_services, fields=["*"])
+    await call_fn(
+        services.update_service, service_id=service["id"], name=service["name"], description=service["description"],
+        service_type=service["type"], url=service["url"], tier=1,
+    )
+
+    assert dummy.calls[-1] == ("PUT", "/services/svc-1", {
+        "id": "svc-1", "name": "orders", "description": "Order intake", "type": "service", "tier": 1,
+        "url": "https://orders",
+    })
+
+
+@pytest.fixture
+def sync_client_services(monkeypatch: pytest.MonkeyPatch):
+    # Tools are wrapped when their module is imported, so the module is reloaded with the sync client and back
+    from importlib import reload
+    monkeypatch.setenv("API_CLIENT", "sync")
+    yield reload(load_services_module())
+    monkeypatch.delenv("API_CLIENT")
+    reload(load_services_module())
+
+
+def test_tools_are_callable_synchronously_with_sync_client(monkeypatch: pytest.MonkeyPatch, sync_client_services):
+    services = sync_client_services
+    dummy = DummyApiCaller([{"id": "svc-1", "name": "orders", "tier": 2, "type": "service", "url": "https://orders"}])
+    monkeypatch.setattr(services, "api_caller", dummy, raising=True)
+
+    result = call_fn(services.get_services, page=1)
+
+    assert result == [{"id": "svc-1", "name": "orders", "tier": 2, "type": "service"}]
+    assert dummy.calls == [("GET", "/services", {"page": 1, "pageSize": 25})]
+
+
+async def test_sync_client_tools_are_still_awaited_by_fastmcp(monkeypatch: pytest.MonkeyPatch, sync_client_services):
+    import json
+    from fastmcp import Client
+    services = sync_client_services
+    dummy = DummyApiCaller([{"id": "svc-1", "name": "orders", "tier": 2, "type": "service"}])
+    monkeypatch.setattr(services, "api_caller", dummy, raising=True)
+
+    async with Client(services.service_mcp) as client:
+        result = await client.call_tool("get_services", {"page": 1, "fields": ["id"]})
+
+    assert json.loads(result.content[0].text) == [{"id": "svc-1"}]
@@ -0,0 +1,158 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+
+# Ensure the 'src' directory is on sys.path so that modules like 'singleflight' can be imported.
+PROJECT_ROOT = os.path.dirname(os.path.dirname(__file__))
+SRC_PATH = os.path.join(PROJECT_ROOT, "src")
+if SRC_PATH not in sys.path:
+    sys.path.insert(0, SRC_PATH)
+
+from importlib import import_module  # noqa: E402
+
+
+def load_singleflight_module():
+    return import_module("singleflight")
+
+
+async def test_async_single_flight_shares_one_call():
+    singleflight = load_singleflight_module()
+    flight = singleflight.AsyncSingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"shared": True}
+
+    results = await asyncio.gather(*(flight.do("key", fetch) for _ in range(5)))
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert flight.stats() == {"leaders": 1, "coalesced": 4}
+
+
+async def test_async_single_flight_different_keys_run_separately():
+    singleflight = load_singleflight_module()
+    flight = singleflight.AsyncSingleFlight()
+
+    async def fetch(value):
+        await asyncio.sleep(0)
+        return value
+
+    results = await asyncio.gather(flight.do("a", lambda: fetch("a")), flight.do("b", lambda: fetch("b")))
+
+    assert results == ["a", "b"]
+    assert flight.stats() == {"leaders": 2, "coalesced": 0}
+
+
+async def test_async_single_flight_shares_errors_and_forgets_finished_calls():
+    singleflight = load_singleflight_module()
+    flight = singleflight.AsyncSingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    results = await asyncio.gather(flight.do("key", fail), flight.do("key", fail), return_exceptions=True)
+    assert [str(result) for result in results] == ["upstream down", "upstream down"]
+
+    async def succeed():
+        return "ok"
+
+    # The failed call is not remembered
+    assert await flight.do("key", succeed) == "ok"
+
+
+async def test_async_single_flight_survives_leader_cancellation():
+    singleflight = load_singleflight_module()
+    flight = singleflight.AsyncSingleFlight()
+
+    async def fetch():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    leader = asyncio.create_task(flight.do("key", fetch))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flight.do("key", fetch))
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    assert await follower == "done"
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+
+
+def test_threaded_single_flight_shares_one_call():
+    singleflight = load_singleflight_module()
+    flight = singleflight.SingleFlight()
+    calls = []
+    started = threading.Event()
+
+    def fetch():
+        calls.append(1)
+        started.set()
+        time.sleep(0.05)
+        return ["types"]
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do("key", fetch))) for _ in range(4)]
+    threads[0].start()
+    started.wait()
+    for thread in threads[1:]:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [["types"]] * 4
+    assert flight.stats() == {"leaders": 1, "coalesced": 3}
+
+
+def test_threaded_single_flight_propagates_errors():
+    singleflight = load_singleflight_module()
+    flight = singleflight.SingleFlight()
+
+    def fail():
+        raise ValueError("bad")
+
+    with pytest.raises(ValueError, match="bad"):
+        flight.do("key", fail)
+    assert flight.do("key", lambda: "recovered") == "recovered"
+
+
+async def test_async_single_flight_bounds_the_wait_of_joining_callers():
+    singleflight = load_singleflight_module()
+    flight = singleflight.AsyncSingleFlight()
+
+    async def fetch():
+        await asyncio.sleep(0.2)
+        return "slow"
+
+    leader = asyncio.create_task(flight.do("key", fetch))
+    await asyncio.sleep(0)
+    with pytest.raises(singleflight.FlightTimeout):
+        await flight.do("key", fetch, timeout=0.02)
+
+    assert await leader == "slow"
+
+
+def test_sync_single_flight_bounds_the_wait_of_joining_callers():
+    singleflight = load_singleflight_module()
+    flight = singleflight.SingleFlight()
+
+    def fetch():
+        time.sleep(0.2)
+        return "slow"
+
+    leader = threading.Thread(target=flight.do, args=("key", fetch))
+    leader.start()
+    time.sleep(0.02)
+    with pytest.raises(singleflight.FlightTimeout):
+        flight.do("key", fetch, timeout=0.02)
+    leader.join()
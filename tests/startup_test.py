@@ -0,0 +1,123 @@
+import os
+import subprocess
+import sys
+import types
+
+import pytest
+
+
+# Ensure the 'src' directory is on sys.path so that modules like 'startup' can be imported.
+PROJECT_ROOT = os.path.dirname(os.path.dirname(__file__))
+SRC_PATH = os.path.join(PROJECT_ROOT, "src")
+if SRC_PATH not in sys.path:
+    sys.path.insert(0, SRC_PATH)
+
+from importlib import import_module  # noqa: E402
+
+
+def load_startup_module():
+    return import_module("startup")
+
+
+def run_python(code: str, **env) -> subprocess.CompletedProcess:
+    environment = {key: value for key, value in os.environ.items() if not key.startswith("MCP_")}
+    environment.update(env)
+    environment["PYTHONPATH"] = SRC_PATH
+    return subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=environment, timeout=120)
+
+
+async def test_lazy_provider_imports_the_sub_server_on_first_use(monkeypatch: pytest.MonkeyPatch):
+    from fastmcp import Client, FastMCP
+
+    startup = load_startup_module()
+    imported = []
+
+    def build_module():
+        imported.append(True)
+        module = types.ModuleType("lazy_sub_server")
+        module.sub_mcp = FastMCP("Sub")
+
+        @module.sub_mcp.tool
+        def ping() -> str:
+            return "pong"
+
+        return module
+
+    real_import = startup.import_module
+    monkeypatch.setattr(
+        startup, "import_module", lambda name: build_module() if name == "lazy_sub_server" else real_import(name)
+    )
+    provider = startup.LazyServerProvider("lazy_sub_server", "sub_mcp")
+    root = FastMCP("Root")
+    root.add_provider(provider)
+
+    async with Client(root) as client:
+        assert imported == []
+        assert [tool.name for tool in await client.list_tools()] == ["ping"]
+        assert (await client.call_tool("ping", {})).data == "pong"
+    assert imported == [True]
+    assert provider.loaded
+
+
+def test_lazy_provider_runs_the_parent_constructor_without_loading(monkeypatch: pytest.MonkeyPatch):
+    startup = load_startup_module()
+    servers = []
+    original = startup.FastMCPProvider.__init__
+
+    def spy(self, server):
+        servers.append(server)
+        original(self, server)
+
+    monkeypatch.setattr(startup.FastMCPProvider, "__init__", spy)
+    provider = startup.LazyServerProvider("services", "service_mcp")
+
+    assert servers == [None]
+    assert not provider.loaded
+
+
+def test_lazy_startup_defers_sub_server_imports():
+    code = (
+        "import sys, mcp_server; mcp_server.setup(); "
+        "print(sorted(m for m in ('debt', 'services', 'teams', 'releases', 'dependency', 'api_calls') if m in sys.modules))"
+    )
+    assert run_python(code, MCP_LAZY_STARTUP="true").stdout.strip() == "[]"
+    eager = run_python(code).stdout.strip()
+    assert eager == "['api_calls', 'debt', 'dependency', 'releases', 'services', 'teams']"
+
+
+def test_import_report_lists_slowest_modules():
+    startup = load_startup_module()
+    report = startup.import_report("import json", top=3)
+    assert report["total_ms"] > 0
+    assert len(report["modules"]) <= 3
+    assert "json" in {module["module"] for module in startup.import_report("import json", top=1000)["modules"]}
+    assert "Import time for `import json`" in startup.format_import_report(report)
+
+
+def measure_setup_ms(**env) -> float:
+    # Importing fastmcp dominates a cold start and is outside the server's control, so the budgets time what the
+    # server adds on top of it: importing mcp_server and setting it up. The best of three runs smooths out noise.
+    code = (
+        "import time, fastmcp; started = time.perf_counter(); "
+        "import mcp_server; mcp_server.setup(); print((time.perf_counter() - started) * 1000)"
+    )
+    timings = []
+    for _ in range(3):
+        completed = run_python(code, **env)
+        assert completed.returncode == 0, completed.stderr
+        timings.append(float(completed.stdout.strip().splitlines()[-1]))
+    return min(timings)
+
+
+def test_cold_start_is_within_budget():
+    # Cold start = a fresh interpreter importing and setting up the server, as each STDIO session does
+    budget_ms = float(os.getenv("MCP_STARTUP_BUDGET_MS", "500"))
+    elapsed_ms = measure_setup_ms()
+    assert elapsed_ms <= budget_ms, f"cold start took {elapsed_ms:.0f} ms, budget is {budget_ms:.0f} ms"
+
+
+def test_lazy_cold_start_is_within_budget():
+    # Lazy startup only defines the root server and mounts placeholders, tens of milliseconds on a laptop
+    budget_ms = float(os.getenv("MCP_LAZY_STARTUP_BUDGET_MS", "100"))
+    elapsed_ms = measure_setup_ms(MCP_LAZY_STARTUP="true")
+    assert elapsed_ms <= budget_ms, f"lazy cold start took {elapsed_ms:.0f} ms, budget is {budget_ms:.0f} ms"
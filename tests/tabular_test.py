@@ -0,0 +1,43 @@
+import os
+import sys
+
+
+# Ensure the 'src' directory is on sys.path so that modules like 'tabular' can be imported.
+PROJECT_ROOT = os.path.dirname(os.path.dirname(__file__))
+SRC_PATH = os.path.join(PROJECT_ROOT, "src")
+if SRC_PATH not in sys.path:
+    sys.path.insert(0, SRC_PATH)
+
+from importlib import import_module  # noqa: E402
+
+
+def load_tabular_module():
+    return import_module("tabular")
+
+
+def test_to_table_uses_union_of_keys_in_first_seen_order():
+    tabular = load_tabular_module()
+    items = [{"id": "a", "name": "A"}, {"id": "b", "tier": 1}]
+
+    table = tabular.to_table(items)
+
+    assert table == {"columns": ["id", "name", "tier"], "rows": [["a", "A", None], ["b", None, 1]]}
+    assert tabular.from_table(table) == items
+
+
+def test_to_table_passes_through_values_it_cannot_encode():
+    tabular = load_tabular_module()
+    assert tabular.to_table([]) == {"columns": [], "rows": []}
+    assert tabular.to_table(["a", {"id": "b"}]) == ["a", {"id": "b"}]
+    assert tabular.to_table({"id": "a"}) == {"id": "a"}
+    assert tabular.from_table(["a"]) == ["a"]
+
+
+def test_tabulate_only_encodes_when_asked_and_leaves_the_result_untouched():
+    tabular = load_tabular_module()
+    result = {"services": [{"id": "a"}], "count": 1}
+
+    assert tabular.tabulate(result, False, "services") is result
+    assert tabular.tabulate(result, True, "services") == {"services": {"columns": ["id"], "rows": [["a"]]}, "count": 1}
+    assert result == {"services": [{"id": "a"}], "count": 1}
+    assert tabular.tabulate([{"id": "a"}], True) == {"columns": ["id"], "rows": [["a"]]}
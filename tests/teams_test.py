@@ -19,6 +19,12 @@ def load_teams_module():
     return import_module("teams")
 
 
+@pytest.fixture(autouse=True)
+def disable_search_index(monkeypatch: pytest.MonkeyPatch):
+    # Keep the background index rebuild out of tests that exercise api searches; index tests re-enable it
+    monkeypatch.setenv("SEARCH_INDEX_ENABLED", "false")
+
+
 class DummyApiCaller:
     def __init__(self, response: Any):
         self.response = response
@@ -65,7 +71,7 @@ def test_prompt_get_all_teams_mentions_tool_and_resource():
     assert "id" in prompt and "name" in prompt
 
 
-def test_get_all_teams_tool_paginates_and_aggregates(monkeypatch: pytest.MonkeyPatch):
+async def test_get_all_teams_tool_paginates_and_aggregates(monkeypatch: pytest.MonkeyPatch):
     teams = load_teams_module()
     pages = {
         1: [{"id": "t1", "name": "Team One"}],
@@ -74,19 +80,21 @@ def test_get_all_teams_tool_paginates_and_aggregates(monkeypatch: pytest.MonkeyP
     }
     dummy = PagingDummyApiCaller(pages)
     monkeypatch.setattr(teams, "api_caller", dummy, raising=True)
+    monkeypatch.setenv("API_PAGE_WINDOW", "4")
 
-    result = call_fn(teams.get_all_teams)
+    result = await call_fn(teams.get_all_teams)
 
-    assert result == pages[1] + pages[2]
-    # Expect three calls: pages 1, 2, then 3 (empty -> stop)
-    assert dummy.calls == [
+    assert result == {"teams": pages[1] + pages[2], "count": 2, "truncated": False}
+    # Pages 1-4 are requested as one concurrent window; page 3 is empty so no further window is requested
+    assert sorted(dummy.calls, key=lambda call: call[1]["page"]) == [
         ("/teams", {"page": 1, "pageSize": 20}),
         ("/teams", {"page": 2, "pageSize": 20}),
         ("/teams", {"page": 3, "pageSize": 20}),
+        ("/teams", {"page": 4, "pageSize": 20}),
     ]
 
 
-def test_get_all_teams_resource_paginates_and_aggregates(monkeypatch: pytest.MonkeyPatch):
+async def test_get_all_teams_resource_paginates_and_aggregates(monkeypatch: pytest.MonkeyPatch):
     teams = load_teams_module()
     pages = {
         1: [{"id": "a", "name": "Alpha"}],
@@ -94,18 +102,49 @@ def test_get_all_teams_resource_paginates_and_aggregates(monkeypatch: pytest.Mon
     }
     dummy = PagingDummyApiCaller(pages)
     monkeypatch.setattr(teams, "api_caller", dummy, raising=True)
+    monkeypatch.setenv("API_PAGE_WINDOW", "2")
 
-    result = call_fn(teams.get_all_teams_resource)
+    result = await call_fn(teams.get_all_teams_resource)
 
-    assert result == pages[1] + pages[2]
-    assert dummy.calls == [
+    assert result == {"teams": pages[1] + pages[2], "count": 2, "truncated": False}
+    assert sorted(dummy.calls, key=lambda call: call[1]["page"]) == [
         ("/teams", {"page": 1, "pageSize": 20}),
         ("/teams", {"page": 2, "pageSize": 20}),
         ("/teams", {"page": 3, "pageSize": 20}),
+        ("/teams", {"page": 4, "pageSize": 20}),
     ]
 
 
-def test_get_services_by_team_tool_calls_api_and_returns_data(monkeypatch: pytest.MonkeyPatch):
+async def test_get_all_teams_is_not_capped_at_200(monkeypatch: pytest.MonkeyPatch):
+    teams = load_teams_module()
+    pages = {page: [{"id": f"t{page}-{i}"} for i in range(20)] for page in range(1, 16)}
+    dummy = PagingDummyApiCaller(pages)
+    monkeypatch.setattr(teams, "api_caller", dummy, raising=True)
+
+    result = await call_fn(teams.get_all_teams)
+
+    assert result["count"] == 300
+    assert result["teams"][0] == {"id": "t1-0"}
+    assert result["teams"][-1] == {"id": "t15-19"}
+    assert result["truncated"] is False
+
+
+async def test_get_all_teams_flags_truncation_and_uses_configured_page_size(monkeypatch: pytest.MonkeyPatch):
+    teams = load_teams_module()
+    pages = {page: [{"id": f"t{page}"}] for page in range(1, 10)}
+    dummy = PagingDummyApiCaller(pages)
+    monkeypatch.setattr(teams, "api_caller", dummy, raising=True)
+    monkeypatch.setenv("API_MAX_PAGES", "3")
+    monkeypatch.setenv("API_TEAMS_PAGE_SIZE", "50")
+
+    result = await call_fn(teams.get_all_teams)
+
+    assert result == {"teams": [{"id": "t1"}, {"id": "t2"}, {"id": "t3"}], "count": 3, "truncated": True}
+    assert {call[1]["pageSize"] for call in dummy.calls} == {50}
+    assert max(call[1]["page"] for call in dummy.calls) == 3
+
+
+async def test_get_services_by_team_tool_calls_api_and_returns_data(monkeypatch: pytest.MonkeyPatch):
     teams = load_teams_module()
     fake_response = [
         {"id": "svc-1", "name": "orders"},
@@ -114,13 +153,13 @@ def test_get_services_by_team_tool_calls_api_and_returns_data(monkeypatch: pytes
     dummy = DummyApiCaller(fake_response)
     monkeypatch.setattr(teams, "api_caller", dummy, raising=True)
 
-    result = call_fn(teams.get_services_by_team, "team-123")
+    result = await call_fn(teams.get_services_by_team, "team-123")
 
     assert result == fake_response
     assert dummy.calls == [("/teams/team-123/services", None)]
 
 
-def test_get_services_by_team_resource_calls_api_and_returns_data(monkeypatch: pytest.MonkeyPatch):
+async def test_get_services_by_team_resource_calls_api_and_returns_data(monkeypatch: pytest.MonkeyPatch):
     teams = load_teams_module()
     fake_response = [
         {"id": "svc-x", "name": "search"},
@@ -128,7 +167,54 @@ def test_get_services_by_team_resource_calls_api_and_returns_data(monkeypatch: p
     dummy = DummyApiCaller(fake_response)
     monkeypatch.setattr(teams, "api_caller", dummy, raising=True)
 
-    result = call_fn(teams.get_services_by_team_resource, "my-team")
+    result = await call_fn(teams.get_services_by_team_resource, "my-team")
 
     assert result == fake_response
     assert dummy.calls == [("/teams/my-team/services", None)]
+
+
+async def test_get_services_by_team_projects_fields(monkeypatch: pytest.MonkeyPatch):
+    teams = load_teams_module()
+    fake_response = [{"id": "svc-1", "name": "orders", "tier": 2, "type": "service", "url": "https://orders"}]
+    dummy = DummyApiCaller(fake_response)
+    monkeypatch.setattr(teams, "api_caller", dummy, raising=True)
+
+    compact = await call_fn(teams.get_services_by_team, "team-123")
+    selected = await call_fn(teams.get_services_by_team_resource, "team-123", fields="id,url")
+    full = await call_fn(teams.get_services_by_team, "team-123", fields=["*"])
+
+    assert compact == [{"id": "svc-1", "name": "orders", "tier": 2, "type": "service"}]
+    assert selected == [{"id": "svc-1", "url": "https://orders"}]
+    assert full == fake_response
+
+
+async def test_get_all_teams_returns_table_when_asked(monkeypatch: pytest.MonkeyPatch):
+    teams = load_teams_module()
+    monkeypatch.setattr(teams, "api_caller", PagingDummyApiCaller({1: [{"id": "t1", "name": "Team 1"}]}), raising=True)
+
+    result = await call_fn(teams.get_all_teams, tabular=True)
+
+    assert result == {"teams": {"columns": ["id", "name"], "rows": [["t1", "Team 1"]]}, "count": 1, "truncated": False}
+
+
+async def test_find_team_by_name_uses_local_index_or_searches_every_team(monkeypatch: pytest.MonkeyPatch):
+    teams = load_teams_module()
+    search = import_module("search")
+    pages = {1: [{"id": "t1", "name": "Payments"}, {"id": "t2", "name": "Platform Engineering"}]}
+    dummy = PagingDummyApiCaller(pages)
+    monkeypatch.setattr(teams, "api_caller", dummy, raising=True)
+
+    # Without an index every team is fetched and searched
+    fallback = await call_fn(teams.find_team_by_name_resource, "platfrom")
+    assert fallback == [{"id": "t2", "name": "Platform Engineering"}]
+    assert dummy.calls
+
+    monkeypatch.setenv("SEARCH_INDEX_ENABLED", "true")
+    index = search.NameIndex([], pages[1])
+    monkeypatch.setattr(teams.search_snapshot, "current", lambda: index, raising=True)
+    dummy.calls.clear()
+
+    result = await call_fn(teams.find_team_by_name, "payments")
+
+    assert result == [{"id": "t1", "name": "Payments"}]
+    assert dummy.calls == []
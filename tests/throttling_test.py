@@ -0,0 +1,248 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+
+# Ensure the 'src' directory is on sys.path so that modules like 'throttling' can be imported.
+PROJECT_ROOT = os.path.dirname(os.path.dirname(__file__))
+SRC_PATH = os.path.join(PROJECT_ROOT, "src")
+if SRC_PATH not in sys.path:
+    sys.path.insert(0, SRC_PATH)
+
+from importlib import import_module  # noqa: E402
+
+
+def load_throttling_module():
+    return import_module("throttling")
+
+
+def test_rate_limit_spaces_requests_after_the_burst(monkeypatch: pytest.MonkeyPatch):
+    throttling = load_throttling_module()
+    monkeypatch.setenv("API_RATE_LIMIT", "20")
+    monkeypatch.setenv("API_RATE_BURST", "2")
+    throttle = throttling.Throttle()
+
+    started = time.monotonic()
+    for _ in range(4):
+        throttle.acquire("/teams")
+        throttle.release()
+    elapsed = time.monotonic() - started
+
+    # Two requests from the burst, then one every 50ms
+    assert 0.09 <= elapsed < 0.5
+    stats = throttle.stats()
+    assert stats["rate_limit"] == 20
+    assert stats["admitted"] == 4
+    assert stats["queued"] == 2
+    assert stats["in_flight"] == 0
+
+
+def test_endpoint_rate_limits_only_apply_to_their_template(monkeypatch: pytest.MonkeyPatch):
+    throttling = load_throttling_module()
+    monkeypatch.setenv("API_RATE_LIMITS", '{"/services/{id}/dependents": 1}')
+    throttle = throttling.Throttle()
+    deadlines = import_module("deadlines")
+
+    throttle.acquire("/services/1234/dependents")
+    throttle.release()
+    for _ in range(5):
+        throttle.acquire("/services/1234/dependencies")
+        throttle.release()
+    with deadlines.deadline(0.2), pytest.raises(deadlines.DeadlineExceeded):
+        throttle.acquire("/services/5678/dependents")
+
+    stats = throttle.stats()
+    assert stats["rate_limits"] == {"/services/{id}/dependents": 1.0}
+    assert stats["rejected"] == 1
+    assert stats["queued"] == 0
+    assert stats["in_flight"] == 0
+
+
+async def test_max_in_flight_queues_async_requests_in_order(monkeypatch: pytest.MonkeyPatch):
+    throttling = load_throttling_module()
+    monkeypatch.setenv("API_MAX_IN_FLIGHT", "2")
+    throttle = throttling.Throttle()
+    active = 0
+    peak = 0
+    order = []
+
+    async def request(number: int):
+        nonlocal active, peak
+        await throttle.acquire_async("/teams")
+        active += 1
+        peak = max(peak, active)
+        order.append(number)
+        try:
+            await asyncio.sleep(0.01)
+        finally:
+            active -= 1
+            throttle.release()
+
+    await asyncio.gather(*(request(number) for number in range(6)))
+
+    assert peak == 2
+    assert order == list(range(6))
+    stats = throttle.stats()
+    assert stats["in_flight"] == 0
+    assert stats["waiting"] == 0
+    assert stats["queued"] == 4
+    assert stats["max_queue_seconds"] > 0
+
+
+async def test_queued_async_request_gives_up_at_the_deadline(monkeypatch: pytest.MonkeyPatch):
+    throttling = load_throttling_module()
+    deadlines = import_module("deadlines")
+    monkeypatch.setenv("API_MAX_IN_FLIGHT", "1")
+    throttle = throttling.Throttle()
+
+    await throttle.acquire_async("/teams")
+    with deadlines.deadline(0.05), pytest.raises(deadlines.DeadlineExceeded):
+        await throttle.acquire_async("/teams")
+    throttle.release()
+
+    # The slot is free again, not handed to the request that gave up
+    await asyncio.wait_for(throttle.acquire_async("/teams"), 1)
+    throttle.release()
+    assert throttle.stats()["in_flight"] == 0
+    assert throttle.stats()["rejected"] == 1
+
+
+def test_max_in_flight_bounds_sync_threads(monkeypatch: pytest.MonkeyPatch):
+    throttling = load_throttling_module()
+    monkeypatch.setenv("API_MAX_IN_FLIGHT", "3")
+    throttle = throttling.Throttle()
+    lock = threading.Lock()
+    active = 0
+    peak = 0
+
+    def request():
+        nonlocal active, peak
+        throttle.acquire("/teams")
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.01)
+        with lock:
+            active -= 1
+        throttle.release()
+
+    threads = [threading.Thread(target=request) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert peak == 3
+    assert throttle.stats()["in_flight"] == 0
+    assert throttle.stats()["admitted"] == 10
+
+
+def test_request_priority_can_only_be_lowered():
+    throttling = load_throttling_module()
+
+    assert throttling.current_priority() == throttling.INTERACTIVE
+    with throttling.request_priority(throttling.BACKGROUND):
+        with throttling.request_priority(throttling.FAN_OUT):
+            assert throttling.current_priority() == throttling.BACKGROUND
+    with throttling.request_priority(throttling.FAN_OUT):
+        assert throttling.current_priority() == throttling.FAN_OUT
+    assert throttling.current_priority() == throttling.INTERACTIVE
+    with pytest.raises(ValueError, match="Unknown request priority"):
+        with throttling.request_priority("urgent"):
+            pass
+
+
+async def test_queued_requests_are_served_by_priority_class(monkeypatch: pytest.MonkeyPatch):
+    throttling = load_throttling_module()
+    metrics = import_module("metrics")
+    monkeypatch.setenv("API_MAX_IN_FLIGHT", "1")
+    monkeypatch.setenv("API_BACKGROUND_MAX_IN_FLIGHT", "1")
+    throttle = throttling.Throttle()
+    order = []
+
+    async def request(name: str, priority: str):
+        with throttling.request_priority(priority):
+            admitted = await throttle.acquire_async("/services")
+        order.append(name)
+        await asyncio.sleep(0)
+        throttle.release(admitted)
+
+    holder = await throttle.acquire_async("/teams")
+    tasks = []
+    for name, priority in (
+        ("refresh", throttling.BACKGROUND), ("batch", throttling.FAN_OUT), ("lookup", throttling.INTERACTIVE),
+        ("refresh-2", throttling.BACKGROUND), ("lookup-2", throttling.INTERACTIVE),
+    ):
+        tasks.append(asyncio.create_task(request(name, priority)))
+        await asyncio.sleep(0)
+    stats = throttle.stats()
+    assert stats["waiting"] == 5
+    assert stats["priorities"]["background"]["waiting"] == 2
+    throttle.release(holder)
+    await asyncio.gather(*tasks)
+
+    assert order == ["lookup", "lookup-2", "batch", "refresh", "refresh-2"]
+    stats = throttle.stats()
+    assert stats["in_flight"] == 0
+    assert stats["waiting"] == 0
+    assert stats["priorities"]["background"]["queued"] == 2
+    assert stats["priorities"]["interactive"]["admitted"] == 3
+    depth = metrics.registry.snapshot().get("atlas_upstream_queue_depth", [])
+    assert all(series["value"] == 0 for series in depth)
+
+
+async def test_background_requests_leave_slots_for_tool_calls(monkeypatch: pytest.MonkeyPatch):
+    throttling = load_throttling_module()
+    monkeypatch.setenv("API_MAX_IN_FLIGHT", "4")
+    throttle = throttling.Throttle()
+    background = 0
+    peak = 0
+
+    async def refresh():
+        nonlocal background, peak
+        with throttling.request_priority(throttling.BACKGROUND):
+            priority = await throttle.acquire_async("/services")
+        background += 1
+        peak = max(peak, background)
+        await asyncio.sleep(0.02)
+        background -= 1
+        throttle.release(priority)
+
+    tasks = [asyncio.create_task(refresh()) for _ in range(6)]
+    await asyncio.sleep(0.005)
+    started = time.monotonic()
+    priority = await throttle.acquire_async("/services")
+    waited = time.monotonic() - started
+    throttle.release(priority)
+    await asyncio.gather(*tasks)
+
+    assert throttle.stats()["background_max_in_flight"] == 2
+    assert peak == 2
+    assert waited < 0.01
+    assert throttle.stats()["priorities"]["interactive"]["queued"] == 0
+
+
+async def test_background_requests_do_not_take_tokens_reserved_by_tool_calls(monkeypatch: pytest.MonkeyPatch):
+    throttling = load_throttling_module()
+    monkeypatch.setenv("API_RATE_LIMIT", "20")
+    monkeypatch.setenv("API_RATE_BURST", "1")
+    throttle = throttling.Throttle()
+    order = []
+
+    async def request(name: str, priority: str):
+        with throttling.request_priority(priority):
+            admitted = await throttle.acquire_async("/services")
+        order.append(name)
+        throttle.release(admitted)
+
+    await request("first", throttling.INTERACTIVE)
+    refresh = asyncio.create_task(request("refresh", throttling.BACKGROUND))
+    await asyncio.sleep(0)
+    await request("lookup", throttling.INTERACTIVE)
+    await refresh
+
+    assert order == ["first", "lookup", "refresh"]
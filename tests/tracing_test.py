@@ -0,0 +1,156 @@
+import asyncio
+import json
+import os
+import sys
+
+import pytest
+
+
+# Ensure the 'src' directory is on sys.path so that modules like 'tracing' can be imported.
+PROJECT_ROOT = os.path.dirname(os.path.dirname(__file__))
+SRC_PATH = os.path.join(PROJECT_ROOT, "src")
+if SRC_PATH not in sys.path:
+    sys.path.insert(0, SRC_PATH)
+
+from importlib import import_module  # noqa: E402
+
+
+def load_tracing_module():
+    return import_module("tracing")
+
+
+@pytest.fixture
+def tracing(monkeypatch: pytest.MonkeyPatch):
+    module = load_tracing_module()
+    # Enable the shared tracer, as used by the api callers and the middleware
+    monkeypatch.setattr(module.tracer, "enabled", True)
+    monkeypatch.setattr(module.tracer, "mode", "memory")
+    module.tracer.clear()
+    yield module
+    module.tracer.clear()
+
+
+def test_disabled_tracer_hands_out_noop_spans():
+    module = load_tracing_module()
+    tracer = module.Tracer(mode="off")
+    with tracer.trace("tool") as root:
+        root.set(status=200)
+        with tracer.span("upstream") as child:
+            assert child is root
+    assert tracer.recent() == []
+
+
+def test_unknown_mode_is_rejected():
+    module = load_tracing_module()
+    with pytest.raises(ValueError):
+        module.Tracer(mode="zipkin")
+
+
+def test_spans_are_nested_under_the_trace_root():
+    module = load_tracing_module()
+    tracer = module.Tracer(mode="memory")
+    assert tracer.span("orphan") is module._NOOP
+
+    with tracer.trace("get_blast_radius", kind="tool") as root:
+        with tracer.span("upstream", endpoint="/services/{id}/dependents") as request:
+            request.set(status=200, bytes=12)
+            with tracer.span("decode"):
+                pass
+
+    [trace] = tracer.recent()
+    assert trace["name"] == "get_blast_radius"
+    assert trace["kind"] == "tool"
+    assert trace["status"] == "ok"
+    upstream, decode = trace["spans"]
+    assert upstream["parent_id"] == root.span_id
+    assert upstream["status"] == 200
+    assert decode["parent_id"] == upstream["span_id"]
+    assert trace["duration_ms"] >= upstream["duration_ms"]
+
+
+async def test_spans_of_concurrent_tasks_join_the_trace():
+    module = load_tracing_module()
+    tracer = module.Tracer(mode="memory")
+
+    async def request(index: int):
+        with tracer.span("upstream", index=index):
+            await asyncio.sleep(0)
+
+    with tracer.trace("get_teams_for_services"):
+        await asyncio.gather(*(request(index) for index in range(3)))
+
+    [trace] = tracer.recent()
+    assert sorted(span["index"] for span in trace["spans"]) == [0, 1, 2]
+
+
+def test_errors_are_recorded_and_late_spans_dropped():
+    module = load_tracing_module()
+    tracer = module.Tracer(mode="memory")
+
+    with pytest.raises(RuntimeError):
+        with tracer.trace("tool"):
+            late = tracer.span("upstream")
+            raise RuntimeError("boom")
+    with late:
+        pass
+
+    [trace] = tracer.recent()
+    assert trace["status"] == "error"
+    assert trace["error"] == "RuntimeError: boom"
+    assert trace["spans"] == []
+
+
+def test_ring_buffer_keeps_the_most_recent_traces_and_filters():
+    module = load_tracing_module()
+    tracer = module.Tracer(mode="memory", buffer_size=3)
+    for name in ("a", "b", "c", "d"):
+        with tracer.trace(name):
+            pass
+
+    assert [trace["name"] for trace in tracer.recent()] == ["d", "c", "b"]
+    assert [trace["name"] for trace in tracer.recent(limit=1)] == ["d"]
+    assert [trace["name"] for trace in tracer.recent(name="c")] == ["c"]
+    assert tracer.recent(min_duration_ms=60_000) == []
+
+
+def test_jsonl_mode_appends_one_line_per_trace(tmp_path):
+    module = load_tracing_module()
+    path = tmp_path / "traces.jsonl"
+    tracer = module.Tracer(mode="jsonl", path=str(path))
+    for name in ("a", "b"):
+        with tracer.trace(name):
+            with tracer.span("upstream"):
+                pass
+
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [line["name"] for line in lines] == ["a", "b"]
+    assert lines[0]["spans"][0]["name"] == "upstream"
+
+
+async def test_middleware_traces_tool_calls_with_api_requests(tracing, monkeypatch: pytest.MonkeyPatch):
+    import httpx
+    from fastmcp import Client, FastMCP
+
+    api_calls = import_module("api_calls")
+    client_class = httpx.AsyncClient
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, json=[1]))
+    monkeypatch.setattr(api_calls.httpx, "AsyncClient", lambda **kwargs: client_class(transport=transport, **kwargs))
+    caller = api_calls.AsyncApiCaller()
+    server = FastMCP("traced", middleware=[tracing.ToolTracingMiddleware()])
+
+    @server.tool
+    async def lookup() -> list:
+        return await caller.call_get("/services/4f9a2c1e-2222/dependents")
+
+    async with Client(server) as client:
+        await client.call_tool("lookup", {})
+    await caller.aclose()
+
+    [trace] = tracing.tracer.recent()
+    assert trace["name"] == "lookup"
+    upstream, decode = trace["spans"]
+    assert upstream["name"] == "upstream"
+    assert upstream["endpoint"] == "/services/{id}/dependents"
+    assert upstream["status"] == 200
+    assert upstream["bytes"] == 3
+    assert decode["name"] == "decode"